@@ -0,0 +1,511 @@
+# Benchmarks of the render_to_print addon, running outside Blender against the bpy/mathutils stand-in
+# in benchmarks/standin:
+#
+#   python benchmarks/bench_render_to_print.py [--scenario NAME] [--check-time] [--update-baselines]
+#
+# Each scenario scripts a sequence of user edits (changing print settings, calling operators, drawing
+# the panels) on a fresh scene and reports the edits per second and, per edit, the RNA writes, update
+# callbacks, operator dispatches, depsgraph evaluations, renders and rendered megapixels. Exits non-zero if a count exceeds its
+# baseline in benchmarks/baselines.json (by more than the tolerance) or, with --check-time, if the
+# edits per second dropped below theirs. The counts are deterministic, the timings depend on the machine.
+
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCHMARKS_DIR, "standin"))
+sys.path.insert(0, os.path.dirname(BENCHMARKS_DIR))
+
+import bpy
+import render_to_print
+
+BASELINES_PATH = os.path.join(BENCHMARKS_DIR, "baselines.json")
+
+# Per edit counts compared against the baselines:
+COUNTS = ('rna_writes', 'updates', 'operators', 'depsgraph_evaluations', 'renders', 'megapixels')
+
+PRESETS = [idname for idname, name, descr in render_to_print.paper_presets if not idname.startswith("custom")]
+
+
+
+#
+# Creates a fresh scene with the camera, a scale ratio text and another text object (active and
+# selected), with the print settings applied.
+#
+def setup_scene(update_delay=0.0):
+    scene = bpy.reset_standin()
+    ps = scene.print_settings
+    ps.update_delay = update_delay
+    ps.preset = "A4_21.0_29.7"
+    bpy.app.timers.run_all()
+
+    bpy.ops.object.text_add()
+    text_object = bpy.context.active_object
+    text_object.name = "label"
+    text_object.data.body = "North elevation"
+    bpy.recorder.reset()
+    return scene, ps, text_object
+
+
+
+#
+# SCENARIOS
+#
+# Each scenario sets up its scene and returns a function performing the edits, which returns the number of edits.
+#
+def scenario_preset_sweep():
+    scene, ps, text_object = setup_scene()
+
+    def run():
+        for preset in PRESETS:
+            ps.preset = preset
+        return len(PRESETS)
+    return run
+
+
+
+def scenario_orientation_toggle():
+    scene, ps, text_object = setup_scene()
+
+    def run():
+        for i in range(20):
+            ps.orientation = "Landscape" if i % 2 == 0 else "Portrait"
+        return 20
+    return run
+
+
+
+def scenario_dpi_drag_coalesced():
+    scene, ps, text_object = setup_scene(update_delay=.1)
+
+    # Dragging the dpi slider, the timer fires once the drag stopped:
+    def run():
+        for dpi in range(150, 350, 2):
+            ps.dpi = dpi
+        bpy.app.timers.run_all()
+        return 100
+    return run
+
+
+
+def scenario_margin_edits():
+    scene, ps, text_object = setup_scene()
+
+    def run():
+        for i in range(10):
+            ps.margin_top = .01 + i * .001
+            ps.margin_right = .01 + i * .001
+            ps.margin_bottom = .01 + i * .001
+            ps.margin_left = .01 + i * .001
+        return 40
+    return run
+
+
+
+def scenario_scale_factor_drag():
+    scene, ps, text_object = setup_scene()
+
+    def run():
+        for denominator in range(1, 51):
+            ps.scale_factor = 1.0 / denominator
+        return 50
+    return run
+
+
+
+def scenario_scale_ratio_text_toggle():
+    scene, ps, text_object = setup_scene()
+
+    def run():
+        for i in range(10):
+            ps.add_scale_ratio_text = i % 2 == 1
+        return 10
+    return run
+
+
+
+def scenario_print_settings_update():
+    scene, ps, text_object = setup_scene()
+
+    # A script changing several settings at once:
+    def run():
+        for preset in PRESETS:
+            with render_to_print.print_settings_update(scene) as ps_update:
+                ps_update.preset = preset
+                ps_update.orientation = "Landscape"
+                ps_update.dpi = 200
+                ps_update.scale_factor = .02
+        return len(PRESETS)
+    return run
+
+
+
+def scenario_viewing_distance_drag():
+    scene, ps, text_object = setup_scene()
+    ps.use_viewing_distance = True
+
+    # Most steps do not change the derived dpi:
+    def run():
+        for i in range(50):
+            ps.viewing_distance = 1.0 + i * .05
+        return 50
+    return run
+
+
+
+def scenario_apply_operator():
+    scene, ps, text_object = setup_scene()
+
+    def run():
+        for i in range(20):
+            bpy.ops.render.apply_print_settings()
+        return 20
+    return run
+
+
+
+def scenario_animated_scale_drivers():
+    scene, ps, text_object = setup_scene()
+    ps.use_drivers = True
+
+    # Playing back a keyframed scale factor, which blender writes without calling the update callbacks:
+    def run():
+        for frame in range(1, 51):
+            ps.__dict__['scale_factor'] = 1.0 / frame
+            scene.frame_set(frame)
+        return 50
+    return run
+
+
+
+def scenario_position_operators():
+    scene, ps, text_object = setup_scene()
+    operators = (
+            bpy.ops.object.position_within_render,
+            bpy.ops.object.position_in_top_left_corner,
+            bpy.ops.object.position_in_top_right_corner,
+            bpy.ops.object.position_in_bottom_right_corner,
+            bpy.ops.object.position_in_bottom_left_corner,
+            )
+
+    def run():
+        for i in range(4):
+            for operator in operators:
+                for obj in scene.objects:
+                    obj.select_set(obj == text_object)
+                bpy.context.view_layer.objects.active = text_object
+                operator()
+        return 4 * len(operators)
+    return run
+
+
+
+def scenario_text_operators():
+    scene, ps, text_object = setup_scene()
+
+    def run():
+        for i in range(10):
+            scene.name = "Plan %s" % i
+            bpy.ops.object.text_change()
+            bpy.ops.render.ensure_height()
+        return 20
+    return run
+
+
+
+def scenario_fit_print_to_selection():
+    scene, ps, text_object = setup_scene()
+    bpy.ops.object.add(type='MESH')
+    model = bpy.context.active_object
+    model.scale = (3.0, 2.0, 1.0)
+    scene.camera.location = (0.0, 0.0, 10.0)
+
+    def run():
+        for i in range(10):
+            model.scale[0] = 3.0 + i
+            bpy.ops.render.fit_print_to_selection()
+        return 10
+    return run
+
+
+
+def scenario_camera_space_bounds():
+    import numpy as np
+
+    scene, ps, text_object = setup_scene()
+    bpy.ops.object.add(type='MESH')
+    model = bpy.context.active_object
+    model.data.vertices.foreach_set("co", np.random.default_rng(0).normal(size=100000 * 3).astype(np.float32))
+    scene.camera.location = (0.0, 0.0, 10.0)
+
+    # Checking the coverage while editing the print settings, the geometry changes only once:
+    def run():
+        for i in range(20):
+            if i == 10:
+                model.data.vertices.foreach_set("co", np.random.default_rng(1).normal(size=100000 * 3).astype(np.float32))
+            bpy.ops.render.check_print_coverage()
+        bpy.ops.render.center_camera_on_selection()
+        return 21
+    return run
+
+
+
+def scenario_scene_fingerprint():
+    import numpy as np
+
+    scene, ps, text_object = setup_scene()
+    models = []
+    for i in range(4):
+        bpy.ops.object.add(type='MESH')
+        models.append(bpy.context.active_object)
+        models[-1].data.vertices.foreach_set("co", np.random.default_rng(i).normal(size=250000 * 3).astype(np.float32))
+
+    # Fingerprinting while editing, one object's geometry and another's location change once:
+    def run():
+        for i in range(20):
+            if i == 10:
+                models[0].data.vertices.foreach_set("co", np.random.default_rng(9).normal(size=250000 * 3).astype(np.float32))
+                models[1].location = (1.0, 0.0, 0.0)
+            bpy.ops.render.scene_fingerprint()
+        return 20
+    return run
+
+
+
+def scenario_find_print_fits():
+    # Pure python, the index is built once:
+    render_to_print.find_print_fits(1.0, 1.0)
+
+    def run():
+        for i in range(100):
+            render_to_print.find_print_fits(2.0 + i * .5, 1.5 + i * .2, min_scale_factor=.0005)
+        return 100
+    return run
+
+
+
+def scenario_render_preflight():
+    scene, ps, text_object = setup_scene()
+
+    # Checking each preset against the memory budget before rendering:
+    def run():
+        for preset in PRESETS:
+            ps.preset = preset
+            render_to_print.render_preflight(scene)
+            bpy.ops.render.use_max_dpi()
+        return 3 * len(PRESETS)
+    return run
+
+
+
+def scenario_render_print_tiles():
+    import tempfile
+
+    scene, ps, text_object = setup_scene()
+    ps.tile_memory_budget = 16
+    ps.stitch_format = 'NONE'
+    scene.render.filepath = os.path.join(tempfile.mkdtemp(), "print")
+
+    def run():
+        for i in range(5):
+            bpy.ops.render.render_print_tiles()
+        return 5
+    return run
+
+
+
+def scenario_poster_sheets():
+    import tempfile
+
+    scene, ps, text_object = setup_scene()
+    ps.preset = "A0_84.1_118.9"
+    ps.dpi = 100
+    ps.scale_factor = .01
+    bpy.ops.object.add(type='MESH')
+    bpy.context.active_object.location = (-30.0, 30.0, 0.0)
+    scene.render.filepath = os.path.join(tempfile.mkdtemp(), "poster")
+
+    # Rendering the needed sheets, then resuming (nothing left to render):
+    def run():
+        for i in range(2):
+            bpy.ops.render.render_poster_sheets()
+        return 2
+    return run
+
+
+
+def scenario_render_cache():
+    import tempfile
+
+    scene, ps, text_object = setup_scene()
+    directory = tempfile.mkdtemp()
+    scene.render.filepath = os.path.join(directory, "print")
+    ps.use_render_cache = True
+    ps.render_cache_dir = os.path.join(directory, "cache")
+
+    # Re-exporting after changing a margin back and forth, only the first two renders are not cached:
+    def run():
+        for i in range(10):
+            ps.margin_top = .02 if i % 2 else .015
+            bpy.ops.render.render_print()
+        return 10
+    return run
+
+
+
+def scenario_annotation_rerender():
+    import tempfile
+
+    scene, ps, text_object = setup_scene()
+    bpy.ops.object.add(type='MESH')
+    text_object.data.size = .005
+    bpy.context.view_layer.objects.active = text_object
+    bpy.ops.object.position_within_render()
+    scene.render.filepath = os.path.join(tempfile.mkdtemp(), "print")
+    ps.use_region_render = True
+
+    # Rewording the label between renders, only the first render is a full one:
+    def run():
+        for i in range(10):
+            text_object.data.body = "North elevation (revised)" if i % 2 else "North elevation"
+            bpy.ops.render.render_print()
+        return 10
+    return run
+
+
+
+def scenario_draw_panels():
+    scene, ps, text_object = setup_scene()
+    panels = (render_to_print.RENDER_PT_print(), render_to_print.RENDER_PT_print_profile())
+
+    def run():
+        for i in range(20):
+            for panel in panels:
+                panel.draw(bpy.context)
+        return 20 * len(panels)
+    return run
+
+
+
+def scenario_solve_print_layout():
+    # Pure python, i.e. without any blender data involved:
+    def run():
+        for preset in PRESETS:
+            for orientation in ("Portrait", "Landscape"):
+                render_to_print.solve_print_layout(preset=preset, orientation=orientation, dpi=300, scale_factor=.01)
+        return 2 * len(PRESETS)
+    return run
+
+
+
+SCENARIOS = dict((name[len("scenario_"):], function) for name, function in sorted(globals().items())
+        if name.startswith("scenario_"))
+
+
+
+#
+# Runs a scenario several times (on fresh scenes) and returns its result: the best edits per second
+# and the counts per edit (of the first run, as they are the same each run).
+#
+def run_scenario(scenario, repeat=5):
+    result = None
+    for i in range(repeat):
+        run = scenario()
+        bpy.recorder.reset()
+        start = time.perf_counter()
+        edits = run()
+        elapsed = time.perf_counter() - start
+        if result is None:
+            recorder = bpy.recorder
+            result = dict(
+                    edits=edits,
+                    rna_writes=recorder.rna_writes / edits,
+                    updates=recorder.updates / edits,
+                    operators=recorder.operator_dispatches / edits,
+                    depsgraph_evaluations=recorder.depsgraph_evaluations / edits,
+                    renders=recorder.renders / edits,
+                    megapixels=recorder.rendered_pixels / 1e6 / edits,
+                    operator_calls=dict(recorder.operators),
+                    edits_per_s=0.0,
+                    )
+        result['edits_per_s'] = max(result['edits_per_s'], edits / elapsed)
+    return result
+
+
+
+#
+# Returns the regressions of a result compared to its baseline as list of messages.
+#
+def compare(name, result, baseline, tolerance, check_time, time_tolerance):
+    regressions = []
+    for count in COUNTS:
+        if count in baseline and result[count] > baseline[count] * (1.0 + tolerance) + 1e-9:
+            regressions.append("%s: %s per edit %.2f > baseline %.2f" % (name, count, result[count], baseline[count]))
+    if check_time and 'edits_per_s' in baseline and result['edits_per_s'] < baseline['edits_per_s'] * (1.0 - time_tolerance):
+        regressions.append("%s: %.0f edits/s < baseline %.0f" % (name, result['edits_per_s'], baseline['edits_per_s']))
+    return regressions
+
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the render_to_print addon against the bpy stand-in.")
+    parser.add_argument("--scenario", action='append', choices=sorted(SCENARIOS), help="Run only this scenario (repeatable).")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per scenario, the best time is reported.")
+    parser.add_argument("--baselines", default=BASELINES_PATH, help="Baselines file.")
+    parser.add_argument("--update-baselines", action='store_true', help="Store the results as baselines instead of comparing.")
+    parser.add_argument("--tolerance", type=float, default=.05, help="Relative increase of a count per edit tolerated.")
+    parser.add_argument("--check-time", action='store_true', help="Compare the edits per second too (machine dependent).")
+    parser.add_argument("--time-tolerance", type=float, default=.5, help="Relative slowdown tolerated with --check-time.")
+    parser.add_argument("--json", help="Also write the results to this file.")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.ERROR)
+    render_to_print.register()
+
+    results = {}
+    for name in args.scenario or sorted(SCENARIOS):
+        results[name] = run_scenario(SCENARIOS[name], args.repeat)
+
+    print("%-28s %10s %10s %8s %9s %9s %9s %9s" % ("scenario", "edits/s", "rna/edit", "upd/edit", "ops/edit", "deps/edit",
+            "rend/edit", "Mpx/edit"))
+    for name, result in results.items():
+        print("%-28s %10.0f %10.2f %8.2f %9.2f %9.2f %9.2f %9.2f" % (name, result['edits_per_s'], result['rna_writes'],
+                result['updates'], result['operators'], result['depsgraph_evaluations'], result['renders'],
+                result['megapixels']))
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+
+    baselines = {}
+    if os.path.exists(args.baselines):
+        with open(args.baselines) as f:
+            baselines = json.load(f)
+
+    if args.update_baselines:
+        for name, result in results.items():
+            baselines[name] = dict((key, round(result[key], 4)) for key in COUNTS + ('edits_per_s',))
+        with open(args.baselines, 'w') as f:
+            json.dump(baselines, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print("Stored the baselines of %s scenarios in %s." % (len(results), args.baselines))
+        return 0
+
+    regressions = []
+    for name, result in results.items():
+        if name not in baselines:
+            print("%s: no baseline." % name)
+            continue
+        regressions.extend(compare(name, result, baselines[name], args.tolerance, args.check_time, args.time_tolerance))
+    for regression in regressions:
+        print("REGRESSION " + regression)
+    return 1 if regressions else 0
+
+
+
+if __name__ == "__main__":
+    sys.exit(main())
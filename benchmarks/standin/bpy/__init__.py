@@ -0,0 +1,58 @@
+# Minimal stand-in for Blender's bpy module, just enough to register the render_to_print addon and drive
+# its update callbacks and operators outside Blender (see benchmarks/bench_render_to_print.py).
+#
+# Data is plain python. RNA property and attribute writes, update callbacks, operator dispatches,
+# depsgraph evaluations, renders and rendered pixels are counted by the recorder.
+
+
+
+class Recorder:
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.rna_writes = 0
+        self.updates = 0
+        self.operators = {}
+        self.depsgraph_evaluations = 0
+        self.renders = 0
+        self.rendered_pixels = 0
+
+    def count_write(self):
+        self.rna_writes += 1
+
+    @property
+    def operator_dispatches(self):
+        return sum(self.operators.values())
+
+recorder = Recorder()
+
+
+
+from . import types, props, app, ops, utils, path, msgbus
+
+import mathutils
+mathutils.on_write = recorder.count_write
+
+data = types.BlendData()
+context = types.Context()
+
+
+
+#
+# Clears all data and creates a scene with a camera (like blender's startup file, without cube and light).
+# The load_post handlers are run as if a file was loaded.
+#
+def reset_standin():
+    global data
+    data = types.BlendData()
+    scene = data.scenes.new("Scene")
+    context.reset(scene)
+    camera = data.objects.new("Camera", data.cameras.new("Camera"))
+    scene.collection.objects.link(camera)
+    scene.camera = camera
+    app.timers.clear()
+    for handler in list(app.handlers.load_post):
+        handler(None)
+    recorder.reset()
+    return scene
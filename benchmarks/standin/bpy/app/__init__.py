@@ -0,0 +1,9 @@
+# Stand-in for bpy.app, see bpy/__init__.py.
+
+from . import handlers, timers
+
+background = False
+version = (2, 90, 0)
+
+# Functions driver expressions may call:
+driver_namespace = {}
@@ -0,0 +1,13 @@
+# Stand-in for bpy.app.handlers, see bpy/__init__.py.
+
+depsgraph_update_post = []
+undo_post = []
+redo_post = []
+load_post = []
+render_pre = []
+render_post = []
+
+
+
+def persistent(function):
+    return function
@@ -0,0 +1,34 @@
+# Stand-in for bpy.app.timers, see bpy/__init__.py. There is no event loop, so due timers are run
+# explicitly with run_all().
+
+registered = {}
+
+
+
+def register(function, first_interval=0.0, persistent=False):
+    registered[function] = first_interval
+
+
+
+def unregister(function):
+    del registered[function]
+
+
+
+def is_registered(function):
+    return function in registered
+
+
+
+def clear():
+    registered.clear()
+
+
+
+def run_all():
+    for function in list(registered):
+        if function in registered:
+            del registered[function]
+            interval = function()
+            if interval is not None:
+                registered[function] = interval
@@ -0,0 +1,20 @@
+# Stand-in for bpy.msgbus, see bpy/__init__.py. Notifies subscribers synchronously.
+
+subscriptions = {}
+
+
+
+def subscribe_rna(key, owner, args, notify, options=set()):
+    subscriptions.setdefault(key, []).append((owner, args, notify))
+
+
+
+def clear_by_owner(owner):
+    for key, subscribers in subscriptions.items():
+        subscribers[:] = [subscriber for subscriber in subscribers if subscriber[0] is not owner]
+
+
+
+def publish(key):
+    for owner, args, notify in list(subscriptions.get(key, ())):
+        notify(*args)
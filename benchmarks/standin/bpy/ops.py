@@ -0,0 +1,182 @@
+# Stand-in for bpy.ops, see bpy/__init__.py.
+#
+# Each call is counted by the recorder. Registered operator classes are executed (without poll or invoke),
+# the few built-in operators the addon uses are emulated roughly.
+
+import bpy
+from mathutils import Matrix
+
+
+
+class BPyOpsSubModOp:
+    def __init__(self, module, name, function=None, operator_class=None):
+        self.module = module
+        self.name = name
+        self.function = function
+        self.operator_class = operator_class
+
+    def idname(self):
+        return "%s_OT_%s" % (self.module.upper(), self.name)
+
+    def idname_py(self):
+        return "%s.%s" % (self.module, self.name)
+
+    def __call__(self, *args, **kwargs):
+        operators = bpy.recorder.operators
+        operators[self.idname_py()] = operators.get(self.idname_py(), 0) + 1
+        if self.operator_class is None:
+            return self.function(bpy.context, **kwargs)
+        operator = self.operator_class()
+        for name, value in kwargs.items():
+            setattr(operator, name, value)
+        return operator.execute(bpy.context)
+
+    def __repr__(self):
+        return "bpy.ops.%s()" % self.idname_py()
+
+
+
+class BPyOpsSubMod:
+    def __init__(self, module):
+        self.module = module
+        self.operators = {}
+
+    def __getattr__(self, name):
+        try:
+            return self.__dict__['operators'][name]
+        except KeyError:
+            raise AttributeError("Operator bpy.ops.%s.%s not found" % (self.module, name)) from None
+
+
+
+submodules = {}
+
+
+
+def submodule(module):
+    if module not in submodules:
+        submodules[module] = BPyOpsSubMod(module)
+    return submodules[module]
+
+
+
+def __getattr__(module):
+    return submodule(module)
+
+
+
+def builtin(idname):
+    def decorator(function):
+        module, name = idname.split(".")
+        submodule(module).operators[name] = BPyOpsSubModOp(module, name, function=function)
+        return function
+    return decorator
+
+
+
+def register_operator(cls):
+    module, name = cls.bl_idname.split(".")
+    submodule(module).operators[name] = BPyOpsSubModOp(module, name, operator_class=cls)
+
+
+
+def unregister_operator(cls):
+    module, name = cls.bl_idname.split(".")
+    del submodule(module).operators[name]
+
+
+
+@builtin("object.mode_set")
+def object_mode_set(context, mode='OBJECT', toggle=False):
+    context.mode = mode
+    return {'FINISHED'}
+
+
+
+@builtin("object.select_all")
+def object_select_all(context, action='TOGGLE'):
+    if action == 'TOGGLE':
+        action = 'DESELECT' if context.selected_objects else 'SELECT'
+    for obj in context.view_layer.objects:
+        obj.select_set(action == 'SELECT')
+    return {'FINISHED'}
+
+
+
+@builtin("object.delete")
+def object_delete(context, use_global=False, confirm=True):
+    for obj in context.selected_objects:
+        for collection in obj.users_collection:
+            collection.objects.unlink(obj)
+        bpy.data.objects.remove(obj)
+        if context.view_layer.objects.active is obj:
+            context.view_layer.objects.active = None
+    return {'FINISHED'}
+
+
+
+def add_object(context, name, data):
+    obj = bpy.data.objects.new(name, data)
+    context.scene.collection.objects.link(obj)
+    for o in context.view_layer.objects:
+        o.select_set(False)
+    obj.select_set(True)
+    context.view_layer.objects.active = obj
+    return {'FINISHED'}
+
+
+
+@builtin("object.add")
+def object_add(context, type='EMPTY', align='WORLD', location=(0.0, 0.0, 0.0), **kwargs):
+    data = None
+    if type == 'CAMERA':
+        data = bpy.data.cameras.new("Camera")
+    elif type == 'MESH':
+        data = bpy.data.meshes.new("Mesh")
+    return add_object(context, type.capitalize(), data)
+
+
+
+@builtin("object.text_add")
+def object_text_add(context, align='WORLD', enter_editmode=False, **kwargs):
+    return add_object(context, "Text", bpy.data.curves.new("Text", type='FONT'))
+
+
+
+@builtin("object.parent_set")
+def object_parent_set(context, type='OBJECT', keep_transform=False, **kwargs):
+    parent = context.active_object
+    for obj in context.selected_objects:
+        if obj is not parent:
+            obj.parent = parent
+            obj.parent_type = 'OBJECT'
+            obj.matrix_parent_inverse = Matrix.Identity(4)
+    return {'FINISHED'}
+
+
+
+@builtin("render.render")
+def render_render(context, animation=False, write_still=False, use_viewport=False, layer="", scene=""):
+    scene = bpy.data.scenes[scene] if scene else context.scene
+    # The render evaluates the scene, drivers included:
+    bpy.types.evaluate_drivers()
+    for handler in bpy.app.handlers.render_pre:
+        handler(scene)
+    render = scene.render
+    width = render.resolution_x * render.resolution_percentage // 100
+    height = render.resolution_y * render.resolution_percentage // 100
+    bpy.recorder.renders += 1
+    bpy.recorder.rendered_pixels += width * height
+    if write_still:
+        # Just the size, the stand-in renders no pixels (see bpy.types.Image):
+        with open(bpy.path.abspath(render.frame_path(frame=scene.frame_current)), 'wb') as f:
+            f.write(b"%d %d\n" % (width, height))
+    for handler in bpy.app.handlers.render_post:
+        handler(scene)
+    return {'FINISHED'}
+
+
+
+@builtin("wm.open_mainfile")
+def wm_open_mainfile(context, filepath="", **kwargs):
+    raise RuntimeError("Error: Loading .blend files is not supported by the stand-in: %s" % filepath)
@@ -0,0 +1,4 @@
+# Stand-in for bpy.path, see bpy/__init__.py.
+
+def abspath(path):
+    return path
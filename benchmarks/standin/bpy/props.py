@@ -0,0 +1,164 @@
+# Stand-in for bpy.props, see bpy/__init__.py.
+#
+# The properties are descriptors storing their value per instance. Like blender's, values are coerced
+# (ints and floats clamped to min, max, floats stored in single precision, enum identifiers checked)
+# and the update callback is called on every write, even if the value did not change.
+
+import struct
+
+import bpy
+
+
+
+class Property:
+    def __init__(self, name="", description="", default=None, min=None, max=None, update=None, options=set(), **kwargs):
+        self.name = name
+        self.description = description
+        self.default = default
+        self.min = min
+        self.max = max
+        self.update = update
+        self.options = options
+        self.kwargs = kwargs
+        self.attr = None
+
+    def __set_name__(self, owner, attr):
+        self.attr = attr
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+        try:
+            return instance.__dict__[self.attr]
+        except KeyError:
+            return self.coerce(self.default)
+
+    def __set__(self, instance, value):
+        instance.__dict__[self.attr] = self.coerce(value)
+        if self.update:
+            bpy.recorder.updates += 1
+            self.update(instance, bpy.context)
+
+    def coerce(self, value):
+        return value
+
+    def clamp(self, value):
+        if self.min is not None and value < self.min:
+            value = self.min
+        if self.max is not None and value > self.max:
+            value = self.max
+        return value
+
+
+
+def float32(value):
+    return struct.unpack('f', struct.pack('f', value))[0]
+
+
+
+class IntPropertyType(Property):
+    def coerce(self, value):
+        return self.clamp(int(value or 0))
+
+
+
+class FloatPropertyType(Property):
+    def coerce(self, value):
+        return float32(self.clamp(float(value or 0.0)))
+
+
+
+class BoolPropertyType(Property):
+    def coerce(self, value):
+        return bool(value)
+
+
+
+class StringPropertyType(Property):
+    def coerce(self, value):
+        return str(value or "")
+
+
+
+class EnumPropertyType(Property):
+    def coerce(self, value):
+        identifiers = [item[0] for item in self.kwargs['items']]
+        if value is None:
+            return identifiers[0]
+        if value not in identifiers:
+            raise TypeError('bpy_struct: item.attr = val: enum "%s" not found in %s' % (value, tuple(identifiers)))
+        return value
+
+
+
+class IntVectorPropertyType(Property):
+    def coerce(self, value):
+        value = (0,) * self.kwargs.get('size', 3) if value is None else value
+        return tuple(self.clamp(int(v)) for v in value)
+
+
+
+class FloatVectorPropertyType(Property):
+    def coerce(self, value):
+        value = (0.0,) * self.kwargs.get('size', 3) if value is None else value
+        return tuple(float32(self.clamp(float(v))) for v in value)
+
+
+
+class PointerPropertyType(Property):
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+        if issubclass(self.kwargs['type'], bpy.types.PropertyGroup) and self.attr not in instance.__dict__:
+            group = self.kwargs['type']()
+            object.__setattr__(group, 'id_data', instance)
+            instance.__dict__[self.attr] = group
+        return instance.__dict__.get(self.attr)
+
+    def __set__(self, instance, value):
+        if issubclass(self.kwargs['type'], bpy.types.PropertyGroup):
+            raise AttributeError('bpy_struct: attribute "%s" from "%s" is read-only' % (self.attr, type(instance).__name__))
+        if value is not None and not isinstance(value, self.kwargs['type']):
+            raise TypeError('bpy_struct: item.attr = val: %s expected a %s type, not %s' % (
+                    self.attr, self.kwargs['type'].__name__, type(value).__name__))
+        super().__set__(instance, value)
+
+
+
+def IntProperty(**kwargs):
+    return IntPropertyType(**kwargs)
+
+
+
+def FloatProperty(**kwargs):
+    return FloatPropertyType(**kwargs)
+
+
+
+def BoolProperty(**kwargs):
+    return BoolPropertyType(**kwargs)
+
+
+
+def StringProperty(**kwargs):
+    return StringPropertyType(**kwargs)
+
+
+
+def EnumProperty(**kwargs):
+    return EnumPropertyType(**kwargs)
+
+
+
+def IntVectorProperty(**kwargs):
+    return IntVectorPropertyType(**kwargs)
+
+
+
+def FloatVectorProperty(**kwargs):
+    return FloatVectorPropertyType(**kwargs)
+
+
+
+def PointerProperty(**kwargs):
+    return PointerPropertyType(**kwargs)
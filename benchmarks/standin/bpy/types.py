@@ -0,0 +1,761 @@
+# Stand-in for bpy.types, see bpy/__init__.py.
+
+import os
+import array
+
+from mathutils import Vector, Matrix
+
+import bpy
+from . import props
+
+
+
+#
+# Properties assigned to a registered class afterwards (e.g. Scene.print_settings = PointerProperty(..))
+# get their name like those defined in the class body.
+#
+class bpy_struct_meta(type):
+    def __setattr__(cls, name, value):
+        if isinstance(value, props.Property):
+            value.__set_name__(cls, name)
+        super().__setattr__(name, value)
+
+
+
+#
+# Writes to public attributes count as RNA writes, writes to IDs tag them for the next depsgraph evaluation.
+#
+class bpy_struct(metaclass=bpy_struct_meta):
+    def __setattr__(self, name, value):
+        if not name.startswith('_'):
+            bpy.recorder.count_write()
+            if isinstance(self, ID):
+                bpy.data.tag_update(self)
+        object.__setattr__(self, name, value)
+
+    def as_pointer(self):
+        return id(self)
+
+
+
+class AnimData:
+    def __init__(self):
+        self.drivers = []
+
+
+
+class DriverTarget:
+    def __init__(self):
+        self.id_type = 'OBJECT'
+        self.id = None
+        self.data_path = ""
+
+
+
+class DriverVariable:
+    def __init__(self):
+        self.name = "var"
+        self.type = 'SINGLE_PROP'
+        self.targets = [DriverTarget()]
+
+
+
+class DriverVariables(list):
+    def new(self):
+        variable = DriverVariable()
+        self.append(variable)
+        return variable
+
+
+
+class Driver:
+    def __init__(self):
+        self.type = 'SCRIPTED'
+        self.expression = ""
+        self.variables = DriverVariables()
+
+
+
+class FCurve:
+    def __init__(self, data_path, array_index):
+        self.data_path = data_path
+        self.array_index = array_index
+        self.driver = Driver()
+        self.mute = False
+
+
+
+#
+# Evaluates the drivers of all IDs like blender does on each depsgraph evaluation and frame change.
+# Enum variables are passed as their item's index, driven values are written without counting.
+#
+def evaluate_drivers():
+    for collection in (bpy.data.scenes, bpy.data.objects, bpy.data.cameras):
+        for id in collection:
+            if id.animation_data is None:
+                continue
+            for fcurve in id.animation_data.drivers:
+                if fcurve.mute:
+                    continue
+                variables = dict((variable.name, resolve_driver_target(variable.targets[0])) for variable in fcurve.driver.variables)
+                value = eval(fcurve.driver.expression, dict(bpy.app.driver_namespace), variables)
+                owner, attr = id, fcurve.data_path
+                if "." in attr:
+                    path, attr = attr.rsplit(".", 1)
+                    for name in path.split("."):
+                        owner = getattr(owner, name)
+                current = getattr(owner, attr)
+                if hasattr(current, '__setitem__'):
+                    values = list(current)
+                    values[fcurve.array_index] = value
+                    value = values
+                object.__setattr__(owner, attr, type(current)(value))
+
+
+
+def resolve_driver_target(target):
+    owner = target.id
+    path = target.data_path.split(".")
+    for name in path[:-1]:
+        owner = getattr(owner, name)
+    value = getattr(owner, path[-1])
+    descriptor = getattr(type(owner), path[-1], None)
+    if isinstance(descriptor, props.EnumPropertyType):
+        return [item[0] for item in descriptor.kwargs['items']].index(value)
+    return value
+
+
+
+class PropertyGroup(bpy_struct):
+    id_data = None
+
+
+
+class Panel:
+    bl_options = set()
+
+    def __init__(self):
+        self.layout = UILayout()
+
+
+
+class Operator:
+    bl_options = set()
+
+    def __init__(self):
+        self.reports = []
+
+    def report(self, type, message):
+        self.reports.append((type, message))
+
+
+
+#
+# Draws nothing, but checks that the drawn properties and operators exist.
+#
+class UILayout:
+    active = True
+    enabled = True
+
+    def row(self, align=False):
+        return UILayout()
+
+    def column(self, align=False):
+        return UILayout()
+
+    def split(self, factor=0.0, align=False):
+        return UILayout()
+
+    def prop(self, data, property, text="", icon='NONE', **kwargs):
+        if not hasattr(data, property):
+            raise AttributeError("rna_uiItemR: property not found: %s.%s" % (type(data).__name__, property))
+
+    def operator(self, operator, text="", icon='NONE', **kwargs):
+        module, name = operator.split(".")
+        getattr(getattr(bpy.ops, module), name)
+
+    def label(self, text="", icon='NONE'):
+        pass
+
+    def separator(self, factor=1.0):
+        pass
+
+
+
+class ID(bpy_struct):
+    animation_data = None
+
+    def __init__(self, name):
+        self._name = name
+        self._custom_properties = {}
+
+    # Drivers are stored on the ID, with the data path relative to it:
+    def driver_add(self, path, index=-1):
+        if self.animation_data is None:
+            object.__setattr__(self, 'animation_data', AnimData())
+        drivers = self.animation_data.drivers
+        for fcurve in drivers:
+            if fcurve.data_path == path and fcurve.array_index == max(index, 0):
+                return fcurve
+        fcurve = FCurve(path, max(index, 0))
+        drivers.append(fcurve)
+        return fcurve
+
+    def driver_remove(self, path, index=-1):
+        if self.animation_data is None:
+            return False
+        drivers = self.animation_data.drivers
+        removed = [fcurve for fcurve in drivers if fcurve.data_path == path and index in (-1, fcurve.array_index)]
+        for fcurve in removed:
+            drivers.remove(fcurve)
+        return bool(removed)
+
+    @property
+    def name(self):
+        return self._name
+
+    @name.setter
+    def name(self, name):
+        self._name = name
+
+    def get(self, key, default=None):
+        return self._custom_properties.get(key, default)
+
+    def __getitem__(self, key):
+        return self._custom_properties[key]
+
+    def __setitem__(self, key, value):
+        bpy.recorder.count_write()
+        self._custom_properties[key] = value
+
+    def __repr__(self):
+        return "bpy.data.%s['%s']" % (type(self).__name__.lower() + "s", self._name)
+
+
+
+class Camera(ID):
+    def __init__(self, name):
+        super().__init__(name)
+        self._set(type='PERSP', ortho_scale=6.0, lens=50.0, shift_x=0.0, shift_y=0.0, sensor_fit='AUTO')
+
+    def _set(self, **values):
+        for name, value in values.items():
+            object.__setattr__(self, name, value)
+
+
+
+class TextCurve(ID):
+    def __init__(self, name, type='FONT'):
+        super().__init__(name)
+        object.__setattr__(self, 'body', "Text")
+        object.__setattr__(self, 'size', 1.0)
+
+    # Rough glyph metrics, enough for the text's extents to depend on its length:
+    def _bound_box(self):
+        if not self.body:
+            return box((0.0, 0.0, 0.0), (0.0, 0.0, 0.0))
+        return box((0.0, -.2 * self.size, 0.0), (.55 * self.size * len(self.body), .52 * self.size, 0.0))
+
+
+
+#
+# The vertex coordinates are kept in a flat single precision array, like blender's.
+#
+class MeshVertices:
+    def __init__(self, mesh, co):
+        self._mesh = mesh
+        self._co = array.array('f', co)
+
+    def __len__(self):
+        return len(self._co) // 3
+
+    def foreach_get(self, attr, seq):
+        if attr != 'co':
+            raise TypeError("foreach_get(attr, sequence) the stand-in only supports 'co', not '%s'" % attr)
+        if len(seq) != len(self._co):
+            raise RuntimeError("internal error setting the array")
+        seq[:] = self._co
+
+    def foreach_set(self, attr, seq):
+        if attr != 'co':
+            raise TypeError("foreach_set(attr, sequence) the stand-in only supports 'co', not '%s'" % attr)
+        self._co = array.array('f', seq)
+        bpy.data.tag_update(self._mesh)
+
+
+
+class Mesh(ID):
+    def __init__(self, name):
+        super().__init__(name)
+        # A cube:
+        object.__setattr__(self, 'vertices', MeshVertices(self,
+                [c for x in (-1.0, 1.0) for y in (-1.0, 1.0) for z in (-1.0, 1.0) for c in (x, y, z)]))
+
+    def _bound_box(self):
+        co = self.vertices._co
+        if not co:
+            return box((0.0, 0.0, 0.0), (0.0, 0.0, 0.0))
+        return box(*(tuple(f(co[axis::3]) for axis in range(3)) for f in (min, max)))
+
+
+
+def box(bound_min, bound_max):
+    (x0, y0, z0), (x1, y1, z1) = bound_min, bound_max
+    return [(x0, y0, z0), (x0, y0, z1), (x0, y1, z1), (x0, y1, z0),
+            (x1, y0, z0), (x1, y0, z1), (x1, y1, z1), (x1, y1, z0)]
+
+
+
+class Light(ID):
+    def __init__(self, name, type='POINT'):
+        super().__init__(name)
+        for attr, value in (('type', type), ('energy', 1000.0), ('color', (1.0, 1.0, 1.0)), ('shadow_soft_size', .25),
+                ('use_shadow', True), ('use_nodes', False), ('node_tree', None)):
+            object.__setattr__(self, attr, value)
+
+
+
+class Material(ID):
+    def __init__(self, name):
+        super().__init__(name)
+        for attr, value in (('diffuse_color', (.8, .8, .8, 1.0)), ('metallic', 0.0), ('roughness', .4),
+                ('use_nodes', False), ('node_tree', None)):
+            object.__setattr__(self, attr, value)
+
+
+
+class MaterialSlot(bpy_struct):
+    def __init__(self, material=None):
+        object.__setattr__(self, 'material', material)
+
+
+
+class World(ID):
+    def __init__(self, name):
+        super().__init__(name)
+        for attr, value in (('color', (.05, .05, .05)), ('use_nodes', False), ('node_tree', None)):
+            object.__setattr__(self, attr, value)
+
+
+
+class Object(ID):
+    VECTORS = ('location', 'delta_location', 'scale', 'rotation_euler', 'rotation_quaternion', 'rotation_axis_angle')
+
+    def __init__(self, name, data=None):
+        super().__init__(name)
+        for attr, value in (
+                ('data', data),
+                ('location', Vector((0.0, 0.0, 0.0))),
+                ('delta_location', Vector((0.0, 0.0, 0.0))),
+                ('scale', Vector((1.0, 1.0, 1.0))),
+                ('rotation_euler', Vector((0.0, 0.0, 0.0))),
+                ('rotation_quaternion', Vector((1.0, 0.0, 0.0, 0.0))),
+                ('rotation_axis_angle', Vector((0.0, 0.0, 1.0, 0.0))),
+                ('parent', None),
+                ('parent_type', 'OBJECT'),
+                ('matrix_parent_inverse', Matrix.Identity(4)),
+                ('show_in_front', False),
+                ('hide_render', False),
+                ('material_slots', []),
+                ('modifiers', []),
+                ('_select', False),
+                ):
+            object.__setattr__(self, attr, value)
+
+    def __setattr__(self, name, value):
+        if name in Object.VECTORS:
+            value = Vector(value)
+        super().__setattr__(name, value)
+
+    @ID.name.setter
+    def name(self, name):
+        self._name = bpy.data.objects.unique_name(name, self)
+        bpy.msgbus.publish((Object, "name"))
+
+    @property
+    def type(self):
+        if self.data is None:
+            return 'EMPTY'
+        return {Camera: 'CAMERA', TextCurve: 'FONT', Mesh: 'MESH', Light: 'LIGHT'}[type(self.data)]
+
+    @property
+    def children(self):
+        return tuple(o for o in bpy.data.objects if o.parent is self)
+
+    @property
+    def users_collection(self):
+        return tuple(c for c in bpy.data.all_collections() if self in c.objects)
+
+    @property
+    def bound_box(self):
+        if self.type in ('FONT', 'MESH'):
+            return self.data._bound_box()
+        return box((-1.0, -1.0, -1.0), (1.0, 1.0, 1.0))
+
+    @property
+    def matrix_basis(self):
+        return (Matrix.Translation(self.location + self.delta_location) @ Matrix.Euler(self.rotation_euler)
+                @ Matrix.Diagonal(list(self.scale) + [1.0]))
+
+    @property
+    def matrix_world(self):
+        if self.parent is None:
+            return self.matrix_basis
+        return self.parent.matrix_world @ self.matrix_parent_inverse @ self.matrix_basis
+
+    @property
+    def dimensions(self):
+        bound_box = self.bound_box
+        return Vector((max(c[axis] for c in bound_box) - min(c[axis] for c in bound_box)) * self.scale[axis] for axis in range(3))
+
+    def evaluated_get(self, depsgraph):
+        return self
+
+    @property
+    def original(self):
+        return self
+
+    # Texts are converted to their bounding box:
+    def to_mesh(self):
+        mesh = Mesh(self.data.name)
+        object.__setattr__(mesh, 'vertices', MeshVertices(mesh, [c for corner in self.bound_box for c in corner]))
+        return mesh
+
+    def to_mesh_clear(self):
+        pass
+
+    def select_set(self, state):
+        self._select = bool(state)
+
+    def select_get(self):
+        return self._select
+
+    def visible_get(self):
+        return True
+
+
+
+class PropCollection:
+    def __init__(self, items=()):
+        self._items = list(items)
+
+    def __iter__(self):
+        return iter(list(self._items))
+
+    def __len__(self):
+        return len(self._items)
+
+    def __contains__(self, item):
+        return item in self._items
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            item = self.get(key)
+            if item is None:
+                raise KeyError('bpy_prop_collection[key]: key "%s" not found' % key)
+            return item
+        return self._items[key]
+
+    def get(self, key, default=None):
+        for item in self._items:
+            if item.name == key:
+                return item
+        return default
+
+
+
+class CollectionObjects(PropCollection):
+    def link(self, obj):
+        if obj in self._items:
+            raise RuntimeError("Object '%s' already in collection" % obj.name)
+        self._items.append(obj)
+
+    def unlink(self, obj):
+        self._items.remove(obj)
+
+
+
+class Collection(ID):
+    def __init__(self, name):
+        super().__init__(name)
+        object.__setattr__(self, 'objects', CollectionObjects())
+        object.__setattr__(self, 'children', [])
+        object.__setattr__(self, 'hide_render', False)
+
+    @property
+    def all_objects(self):
+        objects = list(self.objects)
+        for child in self.children:
+            objects.extend(o for o in child.all_objects if o not in objects)
+        return PropCollection(objects)
+
+
+
+class ImageFormatSettings(bpy_struct):
+    def __init__(self):
+        object.__setattr__(self, 'file_format', 'PNG')
+        object.__setattr__(self, 'color_depth', '8')
+
+
+
+class RenderSettings(bpy_struct):
+    def __init__(self):
+        for attr, value in (('resolution_x', 1920), ('resolution_y', 1080), ('resolution_percentage', 100),
+                ('filepath', "/tmp/"), ('engine', 'BLENDER_EEVEE'), ('image_settings', ImageFormatSettings()),
+                ('use_border', False), ('use_crop_to_border', False), ('use_compositing', True),
+                ('border_min_x', 0.0), ('border_min_y', 0.0), ('border_max_x', 1.0), ('border_max_y', 1.0)):
+            object.__setattr__(self, attr, value)
+
+    def frame_path(self, frame=1):
+        return "%s%04d.png" % (self.filepath, frame)
+
+
+
+class UnitSettings(bpy_struct):
+    def __init__(self):
+        object.__setattr__(self, 'system', 'METRIC')
+        object.__setattr__(self, 'scale_length', 1.0)
+
+
+
+class LayerObjects(PropCollection, bpy_struct):
+    def __init__(self, scene):
+        self._scene = scene
+        object.__setattr__(self, 'active', None)
+
+    @property
+    def _items(self):
+        return list(self._scene.objects)
+
+
+
+class ViewLayer(bpy_struct):
+    def __init__(self, scene, name="View Layer"):
+        self._name = name
+        self._scene = scene
+        object.__setattr__(self, 'objects', LayerObjects(scene))
+
+    @property
+    def depsgraph(self):
+        return Depsgraph(self._scene, self)
+
+    @property
+    def name(self):
+        return self._name
+
+
+
+class ColorManagedViewSettings(bpy_struct):
+    def __init__(self):
+        for attr, value in (('view_transform', 'Filmic'), ('look', 'None'), ('exposure', 0.0), ('gamma', 1.0)):
+            object.__setattr__(self, attr, value)
+
+
+
+class ColorManagedDisplaySettings(bpy_struct):
+    def __init__(self):
+        object.__setattr__(self, 'display_device', 'sRGB')
+
+
+
+class SceneEEVEE(bpy_struct):
+    def __init__(self):
+        object.__setattr__(self, 'taa_render_samples', 64)
+
+
+
+class Scene(ID):
+    def __init__(self, name):
+        super().__init__(name)
+        for attr, value in (('camera', None), ('render', RenderSettings()), ('unit_settings', UnitSettings()),
+                ('collection', Collection("Scene Collection")), ('frame_current', 1), ('eevee', SceneEEVEE()),
+                ('world', None), ('view_settings', ColorManagedViewSettings()), ('use_nodes', False), ('node_tree', None),
+                ('display_settings', ColorManagedDisplaySettings())):
+            object.__setattr__(self, attr, value)
+        object.__setattr__(self, 'view_layers', PropCollection([ViewLayer(self)]))
+
+    @property
+    def objects(self):
+        return self.collection.all_objects
+
+    def frame_set(self, frame, subframe=0.0):
+        object.__setattr__(self, 'frame_current', frame)
+        bpy.recorder.depsgraph_evaluations += 1
+        evaluate_drivers()
+
+    # Two triangles per mesh vertex, roughly:
+    def statistics(self, view_layer):
+        objects = list(self.objects)
+        triangles = sum(2 * len(o.data.vertices) for o in objects if o.type == 'MESH')
+        return "%s | Objects:0/%s | Tris:%s" % (view_layer.name, len(objects), "{:,}".format(triangles))
+
+
+
+class DepsgraphUpdate:
+    def __init__(self, id, is_updated_geometry=False, is_updated_transform=False):
+        self.id = id
+        self.is_updated_geometry = is_updated_geometry
+        self.is_updated_transform = is_updated_transform
+
+
+
+class Depsgraph:
+    def __init__(self, scene, view_layer, updated=()):
+        self.scene = scene
+        self.view_layer = view_layer
+        # Changed geometry data updates the objects using it:
+        geometry = set(id for id in updated if isinstance(id, (Mesh, TextCurve)))
+        self.updates = [DepsgraphUpdate(id, is_updated_transform=isinstance(id, Object)) for id in updated]
+        self.updates.extend(DepsgraphUpdate(o, is_updated_geometry=True) for o in bpy.data.objects if o.data in geometry)
+
+    def update(self):
+        bpy.recorder.depsgraph_evaluations += 1
+        evaluate_drivers()
+
+    # Nothing is tracked, thus everything may have been updated:
+    def id_type_updated(self, id_type):
+        return True
+
+
+
+class Context:
+    def reset(self, scene):
+        self.scene = scene
+        self.view_layer = scene.view_layers[0]
+        self.mode = 'OBJECT'
+
+    @property
+    def active_object(self):
+        return self.view_layer.objects.active
+
+    @property
+    def object(self):
+        return self.active_object
+
+    @property
+    def selected_objects(self):
+        return [o for o in self.view_layer.objects if o.select_get()]
+
+    def evaluated_depsgraph_get(self):
+        bpy.recorder.depsgraph_evaluations += 1
+        evaluate_drivers()
+        depsgraph = Depsgraph(self.scene, self.view_layer, bpy.data.pop_updated())
+        for handler in list(bpy.app.handlers.depsgraph_update_post):
+            handler(self.scene, depsgraph)
+        return depsgraph
+
+
+
+class BlendDataCollection(PropCollection):
+    def __init__(self, id_type):
+        super().__init__()
+        self._id_type = id_type
+
+    def unique_name(self, name, item=None):
+        names = set(i.name for i in self._items if i is not item)
+        unique = name
+        number = 0
+        while unique in names:
+            number += 1
+            unique = "%s.%03d" % (name, number)
+        return unique
+
+    def new(self, name, *args, **kwargs):
+        item = self._id_type(self.unique_name(name), *args, **kwargs)
+        self._items.append(item)
+        return item
+
+    def remove(self, item, do_unlink=True):
+        if do_unlink and isinstance(item, Object):
+            for collection in item.users_collection:
+                collection.objects.unlink(item)
+            if bpy.context.view_layer.objects.active is item:
+                bpy.context.view_layer.objects.active = None
+        self._items.remove(item)
+
+
+
+#
+# Image files of the stand-in are a "width height" line followed by the float RGBA pixels, bottom row first
+# (rendered images have no pixels, i.e. are black).
+#
+class ImagePixels:
+    def __init__(self, count, data=b""):
+        self._values = array.array('f')
+        if len(data) == count * self._values.itemsize:
+            self._values.frombytes(data)
+        else:
+            self._values.frombytes(bytes(count * self._values.itemsize))
+
+    def __len__(self):
+        return len(self._values)
+
+    def foreach_get(self, seq):
+        if len(seq) != len(self._values):
+            raise RuntimeError("internal error setting the array")
+        seq[:] = self._values
+
+    def foreach_set(self, seq):
+        if len(seq) != len(self._values):
+            raise RuntimeError("internal error setting the array")
+        values = array.array('f')
+        values.frombytes(memoryview(seq).cast('B'))
+        self._values = values
+
+
+
+class Image(ID):
+    def __init__(self, name, filepath=""):
+        super().__init__(name)
+        with open(filepath, 'rb') as f:
+            width, height = (int(value) for value in f.readline().split())
+            data = f.read()
+        object.__setattr__(self, 'filepath', filepath)
+        object.__setattr__(self, 'size', (width, height))
+        object.__setattr__(self, 'channels', 4)
+        object.__setattr__(self, 'pixels', ImagePixels(width * height * 4, data))
+
+    def save(self):
+        with open(self.filepath, 'wb') as f:
+            f.write(b"%d %d\n" % self.size)
+            f.write(self.pixels._values.tobytes())
+
+
+
+class BlendDataImages(BlendDataCollection):
+    def __init__(self):
+        super().__init__(Image)
+
+    def load(self, filepath, check_existing=False):
+        return self.new(os.path.basename(filepath), filepath)
+
+
+
+class BlendData:
+    def __init__(self):
+        self.scenes = BlendDataCollection(Scene)
+        self.objects = BlendDataCollection(Object)
+        self.cameras = BlendDataCollection(Camera)
+        self.curves = BlendDataCollection(TextCurve)
+        self.meshes = BlendDataCollection(Mesh)
+        self.collections = BlendDataCollection(Collection)
+        self.images = BlendDataImages()
+        self.lights = BlendDataCollection(Light)
+        self.materials = BlendDataCollection(Material)
+        self.worlds = BlendDataCollection(World)
+        self.filepath = ""
+
+        self._updated = []
+
+    def tag_update(self, id):
+        if id not in self._updated:
+            self._updated.append(id)
+
+    def pop_updated(self):
+        updated, self._updated = self._updated, []
+        return updated
+
+    def all_collections(self):
+        collections = [scene.collection for scene in self.scenes]
+        collections.extend(self.collections)
+        return collections
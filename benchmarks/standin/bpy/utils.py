@@ -0,0 +1,21 @@
+# Stand-in for bpy.utils, see bpy/__init__.py.
+
+import bpy
+
+registered_classes = []
+
+
+
+def register_class(cls):
+    if cls in registered_classes:
+        raise ValueError("register_class(...): already registered as a subclass '%s'" % cls.__name__)
+    registered_classes.append(cls)
+    if issubclass(cls, bpy.types.Operator):
+        bpy.ops.register_operator(cls)
+
+
+
+def unregister_class(cls):
+    registered_classes.remove(cls)
+    if issubclass(cls, bpy.types.Operator):
+        bpy.ops.unregister_operator(cls)
@@ -0,0 +1,143 @@
+# Minimal stand-in for Blender's mathutils (Vector, Matrix), just enough for the render_to_print
+# addon to run outside Blender, see benchmarks/bench_render_to_print.py.
+
+# Called with no arguments on element writes, e.g. to count them as RNA writes:
+on_write = None
+
+
+
+class Vector:
+    __slots__ = ('_values',)
+
+    def __init__(self, values=(0.0, 0.0, 0.0)):
+        self._values = [float(v) for v in values]
+
+    def __len__(self):
+        return len(self._values)
+
+    def __iter__(self):
+        return iter(self._values)
+
+    def __getitem__(self, index):
+        return self._values[index]
+
+    def __setitem__(self, index, value):
+        if on_write:
+            on_write()
+        self._values[index] = float(value)
+
+    def __eq__(self, other):
+        return list(self) == list(other)
+
+    def __add__(self, other):
+        return Vector(a + b for a, b in zip(self, other))
+
+    def __sub__(self, other):
+        return Vector(a - b for a, b in zip(self, other))
+
+    def __mul__(self, scalar):
+        return Vector(a * scalar for a in self)
+
+    __rmul__ = __mul__
+
+    def __truediv__(self, scalar):
+        return Vector(a / scalar for a in self)
+
+    def __neg__(self):
+        return Vector(-a for a in self)
+
+    def __repr__(self):
+        return "Vector(%s)" % (tuple(self._values),)
+
+    def copy(self):
+        return Vector(self._values)
+
+    @property
+    def x(self):
+        return self._values[0]
+
+    @property
+    def y(self):
+        return self._values[1]
+
+    @property
+    def z(self):
+        return self._values[2]
+
+
+
+class Matrix:
+    __slots__ = ('rows',)
+
+    def __init__(self, rows):
+        self.rows = [[float(v) for v in row] for row in rows]
+
+    @classmethod
+    def Identity(cls, size):
+        return cls([[1.0 if i == j else 0.0 for j in range(size)] for i in range(size)])
+
+    @classmethod
+    def Translation(cls, vector):
+        matrix = cls.Identity(4)
+        for axis in range(3):
+            matrix.rows[axis][3] = float(vector[axis])
+        return matrix
+
+    # The rotation matrix (4x4) of euler angles in XYZ order:
+    @classmethod
+    def Euler(cls, angles):
+        import math
+
+        x, y, z = angles
+        rotation_x = cls([[1, 0, 0, 0], [0, math.cos(x), -math.sin(x), 0], [0, math.sin(x), math.cos(x), 0], [0, 0, 0, 1]])
+        rotation_y = cls([[math.cos(y), 0, math.sin(y), 0], [0, 1, 0, 0], [-math.sin(y), 0, math.cos(y), 0], [0, 0, 0, 1]])
+        rotation_z = cls([[math.cos(z), -math.sin(z), 0, 0], [math.sin(z), math.cos(z), 0, 0], [0, 0, 1, 0], [0, 0, 0, 1]])
+        return rotation_z @ rotation_y @ rotation_x
+
+    @classmethod
+    def Diagonal(cls, values):
+        values = list(values)
+        return cls([[values[i] if i == j else 0.0 for j in range(len(values))] for i in range(len(values))])
+
+    def __matmul__(self, other):
+        if isinstance(other, Matrix):
+            columns = list(zip(*other.rows))
+            return Matrix([[sum(a * b for a, b in zip(row, column)) for column in columns] for row in self.rows])
+        if len(self.rows) == 4 and len(other) == 3:
+            # A point, i.e. translated too:
+            return Vector(sum(a * b for a, b in zip(row, other)) + row[3] for row in self.rows[:3])
+        return Vector(sum(a * b for a, b in zip(row, other)) for row in self.rows)
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __getitem__(self, index):
+        return Vector(self.rows[index])
+
+    def inverted(self):
+        size = len(self.rows)
+        rows = [row[:] + [1.0 if i == j else 0.0 for j in range(size)] for i, row in enumerate(self.rows)]
+        for column in range(size):
+            pivot = max(range(column, size), key=lambda i: abs(rows[i][column]))
+            if abs(rows[pivot][column]) < 1e-12:
+                raise ValueError("Matrix.inverted(): matrix does not have an inverse")
+            rows[column], rows[pivot] = rows[pivot], rows[column]
+            pivot_value = rows[column][column]
+            rows[column] = [v / pivot_value for v in rows[column]]
+            for i in range(size):
+                if i != column and rows[i][column]:
+                    factor = rows[i][column]
+                    rows[i] = [a - factor * b for a, b in zip(rows[i], rows[column])]
+        return Matrix([row[size:] for row in rows])
+
+    def to_3x3(self):
+        return Matrix([row[:3] for row in self.rows[:3]])
+
+    def to_translation(self):
+        return Vector(row[3] for row in self.rows[:3])
+
+    def __eq__(self, other):
+        return self.rows == other.rows
+
+    def copy(self):
+        return Matrix(self.rows)
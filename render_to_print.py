@@ -19,10 +19,18 @@
 # <pep8 compliant>
 
 import math
+import time
+import logging
+import functools
+from collections import namedtuple
+from contextlib import contextmanager
 import bpy
-from bpy.types import Panel, Operator, Scene, PropertyGroup
+from bpy.app.handlers import persistent
+from bpy.types import Panel, Operator, Scene, PropertyGroup, Object
 from bpy.props import (IntProperty,
                        FloatProperty,
+                       IntVectorProperty,
+                       FloatVectorProperty,
                        StringProperty,
                        EnumProperty,
                        PointerProperty,
@@ -46,6 +54,13 @@ LAYERS_ALL = (
         True, True, True, True, True
         )
 
+# The range of the dpi setting (prints viewed from a distance need little, see viewing_distance_dpi()):
+DPI_MIN = 10
+DPI_MAX = 1800
+
+# Blender's render resolution limit (per dimension), larger prints can only be rendered in tiles:
+RENDER_RESOLUTION_MAX = 65536
+
 paper_presets = (
     ("A5_14.8_21.0", "default (A5)", ""),
     ("custom_1_1", "custom", ""),
@@ -114,59 +129,439 @@ def paper_enum_parse(idname):
 paper_presets_data = {idname: paper_enum_parse(idname)
                       for idname, name, descr in paper_presets}
 
+# The presets poster sheets may use (see POSTER SHEETS):
+sheet_presets = tuple(item for item in paper_presets if paper_presets_data[item[0]][0] != "custom")
+
+
+log = logging.getLogger(__name__)
+
+
+
+#
+# PROFILING
+#
+# When enabled (print settings' profile option), each apply of the print settings is recorded: the wall
+# time per stage (inclusive of nested stages), the operators dispatched and the depsgraph updates. The
+# latest record is shown in the Profile panel and appended as JSON line to the profile path if given.
+# When disabled (and not tracing) the cost is two attribute checks per stage.
+#
+# Nested stages (e.g. read_print_inputs, which the panel and the depsgraph handlers call too) are only
+# recorded within another stage, so redraws don't replace the record of the latest apply.
+#
+class PrintProfiler:
+    enabled = False
+    path = ""
+    depth = 0
+    record = None # The record of the apply in progress.
+    last = None # The latest complete record.
+
+print_profiler = PrintProfiler()
+
+
+
+def profiled(stage, nested=False):
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            profiling = print_profiler.enabled and not (nested and print_profiler.depth == 0)
+            if print_tracer.enabled and not (nested and print_tracer.node is None):
+                if profiling:
+                    return run_traced(dict(stage=stage), run_profiled, stage, function, args, kwargs)
+                return run_traced(dict(stage=stage), function, *args, **kwargs)
+            if not profiling:
+                return function(*args, **kwargs)
+            return run_profiled(stage, function, args, kwargs)
+        return wrapper
+    return decorator
+
+
+
+def run_profiled(stage, function, args, kwargs):
+    profiler = print_profiler
+    if profiler.depth == 0:
+        profiler.record = dict(time=time.time(), stage=stage, stages={}, operators={}, depsgraph_updates=0)
+    record = profiler.record
+    profiler.depth += 1
+    start = time.perf_counter()
+    try:
+        return function(*args, **kwargs)
+    finally:
+        elapsed = time.perf_counter() - start
+        profiler.depth -= 1
+        entry = record['stages'].setdefault(stage, dict(s=0.0, calls=0))
+        entry['s'] += elapsed
+        entry['calls'] += 1
+        if profiler.depth == 0:
+            record['total_s'] = elapsed
+            finish_profile_record(record)
+
+
+
+def finish_profile_record(record):
+    import json
+
+    print_profiler.record = None
+    print_profiler.last = record
+    log.debug("Profile: %s", record)
+    if print_profiler.path:
+        try:
+            with open(bpy.path.abspath(print_profiler.path), 'a') as f:
+                f.write(json.dumps(record) + "\n")
+        except OSError as e:
+            log.warning("Could not write the profile to %s: %s", print_profiler.path, e)
+
+
+
+#
+# Dispatches an operator, counting it if profiling.
+#
+def run_operator(operator, *args, **kwargs):
+    if print_profiler.record is not None:
+        operators = print_profiler.record['operators']
+        idname = operator.idname_py()
+        operators[idname] = operators.get(idname, 0) + 1
+    if print_tracer.enabled:
+        return run_traced(dict(operator=operator.idname_py()), operator, *args, **kwargs)
+    return operator(*args, **kwargs)
+
+
+
+@persistent
+def profile_depsgraph_update(scene, depsgraph=None):
+    if print_profiler.record is not None:
+        print_profiler.record['depsgraph_updates'] += 1
+
+
+
+def update_profile_cb(self, context):
+    print_profiler.enabled = self.profile
+    print_profiler.path = self.profile_path
+
+
+
+#
+# The profiler is module state, thus enabled again from the scenes' print settings once a file is loaded.
+#
+@persistent
+def profile_load_post(*args):
+    profiling = [scene.print_settings for scene in bpy.data.scenes if scene.print_settings.profile]
+    print_profiler.enabled = bool(profiling)
+    print_profiler.path = profiling[0].profile_path if profiling else ""
+    print_profiler.depth = 0
+    print_profiler.record = None
+
+
+
+#
+# CALLBACK TRACING
+#
+# When enabled (print settings' trace option), the full call tree of each user edit is recorded: which
+# print setting's write triggered which update callback, the stages (see profiled()) and operators these
+# run and the print settings they write in turn, each with its nesting depth and time. A write is
+# redundant if it did not change the value (its callback runs nonetheless).
+#
+# The tree starts with the first traced call outside of any other, e.g. the update callback of the
+# edited setting or the timer applying coalesced edits (nested stages, see profiled(), don't start one). The latest tree is shown in the Profile panel,
+# see format_trace(). If a trace path is given, each tree is appended to it in the folded stack format
+# of flame graph tools (one line per call path with its own time in microseconds), see trace_folded().
+#
+class PrintTracer:
+    enabled = False
+    path = ""
+    node = None # The innermost call in progress.
+    last = None # The latest complete trace.
+    values = {} # (scene name, setting) -> value as of the latest write, to detect redundant writes.
+
+print_tracer = PrintTracer()
+
+# The print settings whose update callbacks are traced, see traced_update():
+traced_settings = []
+
+
+
+#
+# Wraps a print setting's update callback to be traced.
+#
+def traced_update(setting, callback):
+    traced_settings.append(setting)
+
+    @functools.wraps(callback)
+    def update(self, context):
+        if not print_tracer.enabled:
+            return callback(self, context)
+        value = getattr(self, setting)
+        key = (self.id_data.name, setting)
+        node = dict(setting=setting, callback=callback.__name__, value=value,
+                redundant=key in print_tracer.values and print_tracer.values[key] == value)
+        print_tracer.values[key] = value
+        return run_traced(node, callback, self, context)
+    return update
+
+
+
+def run_traced(node, function, *args, **kwargs):
+    tracer = print_tracer
+    parent = tracer.node
+    node['depth'] = parent['depth'] + 1 if parent else 0
+    node['calls'] = []
+    if parent:
+        parent['calls'].append(node)
+    tracer.node = node
+    start = time.perf_counter()
+    try:
+        return function(*args, **kwargs)
+    finally:
+        node['s'] = time.perf_counter() - start
+        tracer.node = parent
+        if parent is None:
+            finish_trace(node)
+
+
+
+def finish_trace(root):
+    nodes = list(iter_trace(root))
+    writes = [node for node in nodes if 'setting' in node]
+    print_tracer.last = dict(
+            time=time.time(),
+            root=root,
+            calls=len(nodes),
+            writes=len(writes),
+            redundant_writes=sum(1 for node in writes if node['redundant']),
+            depth=max(node['depth'] for node in nodes),
+            )
+    log.debug("Trace:\n%s", "\n".join(format_trace(root)))
+    if print_tracer.path:
+        try:
+            with open(bpy.path.abspath(print_tracer.path), 'a') as f:
+                f.writelines(line + "\n" for line in trace_folded(root))
+        except OSError as e:
+            log.warning("Could not write the trace to %s: %s", print_tracer.path, e)
+
+
+
+def iter_trace(node):
+    yield node
+    for call in node['calls']:
+        yield from iter_trace(call)
+
+
+
+def trace_node_name(node, values=True):
+    if 'setting' in node:
+        if not values:
+            return "%s -> %s" % (node['setting'], node['callback'])
+        value = node['value']
+        # Float properties are single precision:
+        if isinstance(value, float):
+            value = float("%.7g" % value)
+        return "%s=%r -> %s" % (node['setting'], value, node['callback'])
+    if 'operator' in node:
+        return "bpy.ops.%s" % node['operator']
+    return node['stage']
+
+
+
+#
+# The trace as indented lines, one per call.
+#
+def format_trace(node):
+    lines = ["%s%s  %.2f ms%s" % ("  " * node['depth'], trace_node_name(node), node['s'] * 1000.0,
+            "  (redundant)" if node.get('redundant') else "")]
+    for call in node['calls']:
+        lines.extend(format_trace(call))
+    return lines
+
+
+
+#
+# The trace in folded stack format: "root;call;..;call microseconds" per call, the time excluding nested calls.
+# The values written are left out, so the same call paths of different edits add up.
+#
+def trace_folded(node, stack=()):
+    stack = stack + (trace_node_name(node, values=False).replace(";", ",").replace(" ", "_"),)
+    own_s = node['s'] - sum(call['s'] for call in node['calls'])
+    lines = ["%s %d" % (";".join(stack), max(round(own_s * 1e6), 1))]
+    for call in node['calls']:
+        lines.extend(trace_folded(call, stack))
+    return lines
+
+
+
+def update_trace_cb(self, context):
+    print_tracer.enabled = self.trace
+    print_tracer.path = self.trace_path
+    # The values before the first traced write:
+    print_tracer.values = dict(((self.id_data.name, setting), getattr(self, setting)) for setting in traced_settings)
+
+
+
+#
+# The tracer is module state, thus enabled again from the scenes' print settings once a file is loaded.
+#
+@persistent
+def trace_load_post(*args):
+    tracing = [scene.print_settings for scene in bpy.data.scenes if scene.print_settings.trace]
+    print_tracer.enabled = bool(tracing)
+    print_tracer.path = tracing[0].trace_path if tracing else ""
+    print_tracer.node = None
+    print_tracer.values = dict(((ps.id_data.name, setting), getattr(ps, setting))
+            for ps in tracing for setting in traced_settings)
+
 
 def update_settings_cb(self, context):
     # annoying workaround for recursive call
-    if update_settings_cb.level == False:
-        update_settings_cb.level = True
-        ps = self
-        rendersettings = context.scene.render
-        render_x_m = pixels_to_printed_m(rendersettings.resolution_x, ps)
-        render_y_m = pixels_to_printed_m(rendersettings.resolution_y, ps)
-        pixels_from_print(context, ps)
-        offset_camera(context)
-        if ps.add_scale_ratio_text:
-            height_max = ps.width_cm / m_TO_cm
-            if ps.text_height > height_max:
-                ps.text_height = height_max
-            #elif ps.text_height < height_min:
-            #    ps.text_height = height_min
-        if ps.use_margins:
-            # HORIZONTAL
-            margin_left_m = rel_to_abs_m(ps.margin_left, render_x_m)
-            margin_right_m = rel_to_abs_m(ps.margin_right, render_x_m)
+    if not self.updating:
+        schedule_print_update(context, self)
+
+
+
+#
+# Applies the print settings after they changed: the print layout is solved and written and
+# unless updating manually the camera and scale ratio text are updated.
+#
+# Like the operators, a layout whose render the preflight refuses (e.g. a typo in the dpi slider) is not
+# applied to the render and the camera, only the print settings show it (and the panel the refusal).
+#
+@profiled('update_print_settings')
+def update_print_settings(context, ps):
+    ps.updating = True
+    try:
+        # Read all inputs once, derive everything in one go and write back in a single pass
+        # (instead of deriving each value on its own, re-reading the print and render settings each time):
+        layout = solve_print_layout(**read_print_inputs(context, ps))
+        preflight = render_preflight(context.scene, layout.width_px, layout.height_px)
+        refused = preflight.status == 'REFUSED'
+        if refused:
+            log.warning("Print settings of scene %s not applied to the render, %s. Lower the dpi or render in tiles.",
+                    context.scene.name, preflight.message)
+        elif preflight.status == 'WARNING':
+            log.warning("Print settings of scene %s: %s.", context.scene.name, preflight.message)
+        write_print_layout(context, ps, layout, to_render=not ps.update_manually and not refused, to_camera=not refused)
+
+        if not ps.update_manually and not refused:
+            print2scale(ps, context, layout)
+    finally:
+        ps.updating = False
+
+
+
+#
+# UPDATE SCHEDULING
+#
+# Changing a print setting marks it pending instead of applying it right away. All changes
+# within the scene's update delay (e.g. while dragging a slider) are then applied at once by a timer.
+# Scripts changing print settings may call flush_print_updates() to apply them synchronously
+# or use print_settings_update() to apply several changes at once.
+#
+def schedule_print_update(context, ps):
+    if ps.update_delay <= 0 or bpy.app.background:
+        # No event loop to run timers in background mode.
+        update_print_settings(context, ps)
+        return
+
+    ps.update_pending = True
+    if not bpy.app.timers.is_registered(flush_print_updates):
+        bpy.app.timers.register(flush_print_updates, first_interval=ps.update_delay)
+
+
+
+#
+# Applies all pending print settings changes. Registered as timer by schedule_print_update(), thus returns
+# None to not be called again.
+#
+def flush_print_updates():
+    if bpy.app.timers.is_registered(flush_print_updates):
+        bpy.app.timers.unregister(flush_print_updates)
+
+    for scene in bpy.data.scenes:
+        if scene.print_settings.update_pending:
+            update_scene_print_settings(scene)
+    return None
+
+
+
+#
+# Applies a scene's print settings, see update_print_settings().
+#
+# The camera and scale ratio text are updated through the data API only, thus scenes other than the one of
+# the (given or current) context are updated just the same, in a context of their own (see scene_context()).
+#
+def update_scene_print_settings(scene, context=None):
+    if context is None:
+        context = bpy.context
+    ps = scene.print_settings
+    ps.update_pending = False
+    if scene != context.scene:
+        context = scene_context(scene)
+    update_print_settings(context, ps)
+
+
+
+#
+# A context for applying a scene's print settings without a UI context, e.g. for a scene other than the
+# current one: the data API paths only need the scene, a view layer and its evaluated depsgraph.
+#
+def scene_context(scene):
+    from types import SimpleNamespace
+
+    return SimpleNamespace(scene=scene, view_layer=scene.view_layers[0], mode='OBJECT',
+            evaluated_depsgraph_get=lambda: scene_depsgraph(scene))
+
+
+
+#
+# Transient update state per scene, e.g. whether its print settings are being applied. Kept out of the
+# .blend file (unlike properties), so a crash while updating leaves no suppressed callbacks behind.
+#
+print_update_state = {} # scene pointer -> {name: value}
+
 
-            length_available = render_x_m - margin_right_m
-            # May be considered a bug because it changes relative percentage to an absolute value (does no harm though).
-            if margin_left_m > length_available:
-                ps.margin_left = length_available
 
-            length_available = render_x_m - margin_left_m
-            # May be considered a bug because it changes relative percentage to an absolute value (does no harm though).
-            if margin_right_m > length_available:
-                ps.margin_right = length_available
+def transient_print_state(name):
+    def get(self):
+        return print_update_state.get(self.id_data.as_pointer(), {}).get(name, False)
 
+    def set(self, value):
+        print_update_state.setdefault(self.id_data.as_pointer(), {})[name] = value
 
-            # VERTICAL
-            margin_top_m = rel_to_abs_m(ps.margin_top, render_y_m)
-            margin_bottom_m = rel_to_abs_m(ps.margin_bottom, render_y_m)
+    return property(get, set)
 
-            length_available = render_y_m - margin_bottom_m
-            # May be considered a bug because it changes relative percentage to an absolute value (does no harm though).
-            if margin_top_m > length_available:
-                ps.margin_top = length_available
 
-            length_available = render_y_m - margin_top_m
-            # May be considered a bug because it changes relative percentage to an absolute value (does no harm though).
-            if margin_bottom_m > length_available:
-                ps.margin_bottom = length_available
 
-        if not ps.update_manually:
-            bpy.ops.render.apply_print_settings()
+# Undo and loading files reallocate the scenes:
+@persistent
+def print_update_state_load_post(*args):
+    print_update_state.clear()
 
-        update_settings_cb.level = False
 
-update_settings_cb.level = False
+
+#
+# Context manager for changing several print settings of a scene at once, e.g.
+#
+#     for scene in scenes:
+#         with print_settings_update(scene) as ps:
+#             ps.preset = "A3_29.7_42.0"
+#             ps.scale_factor = .01
+#
+# The update callbacks are suppressed meanwhile, the changes are applied once on exit (unless apply is False).
+# As all state lives in the scene's print settings, scenes don't affect each other.
+#
+@contextmanager
+def print_settings_update(scene, apply=True, context=None):
+    ps = scene.print_settings
+    updating_old = ps.updating
+    updating_scale_old = ps.updating_scale
+    ps.updating = True
+    ps.updating_scale = True
+    try:
+        yield ps
+    finally:
+        ps.updating = updating_old
+        ps.updating_scale = updating_scale_old
+        # Set explicitly, thus don't round on the next change:
+        ps.scale_factor_previous = ps.scale_factor
+    if apply and not updating_old:
+        update_scene_print_settings(scene, context)
 
 
 
@@ -197,95 +592,66 @@ def rel_to_abs_m_horizontal(context, rel_or_abs):
 
 
 
-def offset_camera(context):
-    ps = context.scene.print_settings
-    if not ps.use_margins:
-        return # no offset required if no margins.
-    camera = context.scene.camera
-    if camera:
-
-        margin_left_m = rel_to_abs_m(
-                ps.margin_left,
-                pixels_to_printed_m(context.scene.render.resolution_x, ps)
-                )
-        margin_right_m = rel_to_abs_m(
-                ps.margin_right,
-                pixels_to_printed_m(context.scene.render.resolution_x, ps)
-                )
-        camera.delta_location[0] = margin_left_m - margin_right_m
-
-        margin_top_m = rel_to_abs_m(
-                ps.margin_top,
-                pixels_to_printed_m(context.scene.render.resolution_y, ps)
-                )
-        margin_bottom_m = rel_to_abs_m(
-                ps.margin_bottom,
-                pixels_to_printed_m(context.scene.render.resolution_y, ps)
-                )
-        camera.delta_location[1] = margin_bottom_m - margin_top_m
-
-
-
-print2scale_scale_factor_previous = 1
 def print2scale_recalculate_camera_focal_length_or_orthographic_scale(self, context):
 
     # annoying workaround for recursive call
-    if print2scale_recalculate_camera_focal_length_or_orthographic_scale.level == False:
-        print2scale_recalculate_camera_focal_length_or_orthographic_scale.level = True
-        print2scale_processInput(self, context)
-        if not self.update_manually:
-            print2scale(self, context)
-        print2scale_recalculate_camera_focal_length_or_orthographic_scale.level = False
-
-print2scale_recalculate_camera_focal_length_or_orthographic_scale.level = False
+    if not self.updating_scale:
+        self.updating_scale = True
+        try:
+            print2scale_processInput(self, context)
+        finally:
+            self.updating_scale = False
+        # The scale only matters to the camera and scale ratio text, which are left alone when updating manually:
+        if not self.updating and not self.update_manually:
+            schedule_print_update(context, self)
 
 
 
 def print2scale_processInput(self, context):
-    global print2scale_scale_factor_previous
-
     ps = self
 
-    if (print2scale_scale_factor_previous == ps.scale_factor):
+    if (ps.scale_factor_previous == ps.scale_factor):
         return {'FINISHED'}
 
     if (ps.scale_factor < 1):
         #ps.scale_factor = round(ps.scale_factor, 1)
-        print2scale_scale_factor_previous = ps.scale_factor
+        ps.scale_factor_previous = ps.scale_factor
         return {'FINISHED'}
 
 
     # If the scale factor is changed by an amount less than 1 it has to be either incremented or
     # decremented and NOT rounded as this will result in the old result.
     # This special case is treated for convenience only.
-    if ps.scale_factor > print2scale_scale_factor_previous:
+    if ps.scale_factor > ps.scale_factor_previous:
         #then round up:
         ps.scale_factor = math.ceil(ps.scale_factor)
 
-    elif ps.scale_factor < print2scale_scale_factor_previous:
+    elif ps.scale_factor < ps.scale_factor_previous:
        ps.scale_factor = math.floor(ps.scale_factor)
 
     #else: equal! nothing to change!
 
     # Store the current value for next time:
-    print2scale_scale_factor_previous = ps.scale_factor
+    ps.scale_factor_previous = ps.scale_factor
 
 
 
-def print2scale(ps, context):
-    print2scale__calculate_camera_paramaters(ps, context)
+@profiled('print2scale')
+def print2scale(ps, context, layout=None):
+    print2scale__calculate_camera_paramaters(ps, context, layout)
+    # Before the text is positioned, which checks if the print settings are in sync:
+    store_print_layout_cache(context, ps, layout)
     print2scale_add_update_text(ps, context)
 
 
-def print2scale__calculate_camera_paramaters(ps, context):
+@profiled('calculate_camera_paramaters')
+def print2scale__calculate_camera_paramaters(ps, context, layout=None):
     if (ps.print_to_scale):
 
-        if (bpy.context.active_object != None and (bpy.context.active_object.type == 'OBJECT' or bpy.context.active_object.type == 'MESH')):
-            bpy.ops.object.mode_set(mode='OBJECT', toggle=False)
-            print('Switched to Object mode.')
-        else:
-            if (context.mode != 'OBJECT'):
-                print('Warning: Switched not to Object mode but are in Edit mode.')
+        # The camera is changed through the data API, which works in any mode. Thus no mode switch
+        # (an operator, which would fail in timers and other contexts without a window).
+        if getattr(context, 'mode', 'OBJECT') != 'OBJECT':
+            log.debug('Applying the print settings in %s mode.', context.mode)
 
 
         find_or_create_camera_and_assign(context)
@@ -296,72 +662,24 @@ def print2scale__calculate_camera_paramaters(ps, context):
         #######
         # SET THE CAMERA's ZOOM OR ORTHOGRAPHIC SCALE
         #######
-        aspect_ratio = ps.height_cm / ps.width_cm #as it's a ratio converting to meter or not does not matter here!
         if (not context.scene.camera.type == 'CAMERA'):
-            print("Camera does not have type 'CAMERA', instead: ", context.scene.camera.type)
+            log.warning("Camera does not have type 'CAMERA', instead: %s", context.scene.camera.type)
             return {'CANCELLED'}
 
-
-        longer_side = ps.height_cm / m_TO_cm
-
-        if ps.use_margins:
-            margin_top_m = rel_to_abs_m(
-                    ps.margin_top,
-                    pixels_to_printed_m(context.scene.render.resolution_y, ps)
-                    )
-            margin_bottom_m = rel_to_abs_m(
-                    ps.margin_bottom,
-                    pixels_to_printed_m(context.scene.render.resolution_y, ps)
-                    )
-            longer_side = longer_side - margin_top_m - margin_bottom_m
-        if (ps.width_cm > ps.height_cm): #if (ps.orientation == 'Landscape'):
-            longer_side = ps.width_cm / m_TO_cm
-            if ps.use_margins:
-                margin_left_m = rel_to_abs_m(
-                        ps.margin_left,
-                        pixels_to_printed_m(context.scene.render.resolution_x, ps)
-                        )
-                margin_right_m = rel_to_abs_m(
-                        ps.margin_right,
-                        pixels_to_printed_m(context.scene.render.resolution_x, ps)
-                        )
-                longer_side = longer_side - margin_left_m - margin_right_m
+        if not layout:
+            layout = solve_print_layout(**read_print_inputs(context, ps))
 
         #print('old ortho scale: ', context.scene.camera.data.ortho_scale)
+        # TODO Perspective cameras: somehow involve the location and the field of view! (Until then ORTHO is enforced.)
         if not context.scene.camera.data.type == 'ORTHO':
             context.scene.camera.data.type = 'ORTHO'
-        zoom_result = 1 # May result in too big a text representation of the scale ratio but better than too small (can resize later).
-        if context.scene.camera.data.type == 'ORTHO':    #ORTHO, PANO, PERSP
-            #blenderartists.org/forum/showthread.php?257556-Render-to-Scale-in-Blender-using-the-Render-to-Print-addon-!
-            #They use the magic number 1.3648 - wonder why, its origin needs to be determined.
-            #     Orthographic_scale                = 1.3648 x L_format_real x L_real / L_virtual
-            # <=> Orthographic_scale * scale_factor = 1.3648 x L_format_real
-            # <=> Orthographic_scale * scale_factor = H_format_real
-            #                                                       where L_real = scale factor * L_virtual
-            #And as the orthographic scale does not take the Scene.unit_settings scale_length into account (for some reason?):
-            # The H_format_real now in the model has to be 'unscaled' too for consistency as the model is scaled with the scale_length setting
-            # too while strangely the orthographic is not scaled, so the right hand side will also be divided by the scale to make it equal again:
-            # <=> Orthographic_scale * scale_factor = H_format_real / unit_settings_scale_length
-            # <=> Orthographic_scale = H_format_real / unit_settings_scale_length / scale_factor
-            #
-            #print('unit setting: ', context.scene.unit_settings.scale_length, ' longer_side in meters: ', longer_side)
-            context.scene.camera.data.ortho_scale = (longer_side / context.scene.unit_settings.scale_length) / ps.scale_factor
-            zoom_result = context.scene.camera.data.ortho_scale
-
-
-        elif (context.scene.camera.data.type == 'PERSP'):
-            #TODO: somehow involve the location and the field of view!
-            context.scene.camera.data.focal_length = (longer_side / context.scene.unit_settings.scale_length) / ps.scale_factor
-            zoom_result = context.scene.camera.data.focal_length
-
-        #else:
-            #PANO
-            #TODO
-
+        # See solve_print_layout() for how the orthographic scale is derived.
+        context.scene.camera.data.ortho_scale = layout.ortho_scale
         #print('new ortho scale: ', context.scene.camera.data.ortho_scale)
 
 
 
+@profiled('add_update_text')
 def print2scale_add_update_text(ps, context):
     #ps = context.scene.print_settings
     if (ps.print_to_scale):
@@ -372,24 +690,14 @@ def print2scale_add_update_text(ps, context):
         #if (hasattr(ps, 'cache_scale_ratio_text_object')):
         #    print('cache is: ' + str(ps.cache_scale_ratio_text_object))
         #if (not hasattr(ps, 'cache_scale_ratio_text_object') or not ps.cache_scale_ratio_text_object):
-        scale_ratio_text_object = None
-        for o in context.scene.camera.children:
-            # to allow other text/font objects as camera children, check for scale_ratio too:
-            if (o and o.type == 'FONT' and o.name.find('scale_ratio') != -1):
-                scale_ratio_text_object = o
-                break
-        set_camera_as_parent = False
-        if not scale_ratio_text_object:
-            for o in context.scene.objects:
-                # to allow other text/font objects as camera children, check for scale_ratio too:
-                if (o and o.type == 'FONT' and o.name.find('scale_ratio') != -1):
-                    scale_ratio_text_object = o
-                    set_camera_as_parent = True # because it's not yet been parented.
-                    break
+        scale_ratio_text_object = find_scale_ratio_text_object(context.scene)
+        # Parent if not yet been parented:
+        set_camera_as_parent = scale_ratio_text_object is not None and scale_ratio_text_object.parent != context.scene.camera
 
         if (not scale_ratio_text_object and ps.add_scale_ratio_text):
             # Add a text for the scale factor e.g. 1:10 on the print.
             scale_ratio_text_object = add_text(context, object_name="scale_ratio")
+            ps.scale_ratio_text_object = scale_ratio_text_object
             scale_ratio_text_object.location[0] = 0
             scale_ratio_text_object.location[1] = 0
             scale_ratio_text_object.location[2] = 0
@@ -408,14 +716,13 @@ def print2scale_add_update_text(ps, context):
             set_camera_as_parent = True
 
         if scale_ratio_text_object and set_camera_as_parent:
-            set_parent(context, to_be_child_objects=[scale_ratio_text_object], parent_object=context.scene.camera)
+            # The camera becomes the parent when the text is placed within the render area (see
+            # place_within_render()), no operators involved.
 
             ######
             # ADD TRACK TO CONSTRAINT (enable and debug if parenting approach above fails)
             # If enabled then increase distance of the object to the camera.
             ######
-            # Make sure nothing is selected:
-            bpy.ops.object.select_all(action='DESELECT')
             ## Add track to contraint to properly align the text object towards the camera even if the camera position changed and the scale ratio text object is reused:
             ## Select the objects that shall be looked to:
             #context.scene.camera.select = True
@@ -438,47 +745,172 @@ def print2scale_add_update_text(ps, context):
         if scale_ratio_text_object and not ps.add_scale_ratio_text:
             # Remove the text object:
             #objects_to_be_deleted.append(scale_ratio_text_object)
-            bpy.ops.object.select_all(action='DESELECT')
-            context.view_layer.objects.active = scale_ratio_text_object #zhengbo context.scene.objects.active = scale_ratio_text_object
-            scale_ratio_text_object.select_set(True) #zhengbo context.scene.objects.active.select = True
-            bpy.ops.object.delete()
+            ps.scale_ratio_text_object = None
+            bpy.data.objects.remove(scale_ratio_text_object, do_unlink=True)
             return {'FINISHED'}
 
         elif not scale_ratio_text_object:
-            print("Warning: No scale ratio text object.")
+            log.warning("No scale ratio text object.")
             return {'FINISHED'}
 
         #else:
         #zhengbo scale_ratio_text_object.layers = list(LAYERS_ALL)
-        scale_ratio_text = convertScaleFactorToRatioString(scale_factor=ps.scale_factor);
-        change_text(context, scale_ratio_text_object, scale_ratio_text)
-        ensure_height(obj=scale_ratio_text_object, print_settings=ps)
-        #position_in_top_right_corner(context, obj=scale_ratio_text_object, ps=ps)
-        # for more flexibility let the margins be chosen freely:
-        position_within_render(context, obj=scale_ratio_text_object, ps=ps)
-        # Note this call can lead to endless recursion if width_px or height_px differ from resolution_x.
+        update_scale_ratio_text(context, ps, scale_ratio_text_object)
+
+
+
+#
+# Shows the print settings' scale on the scale ratio text object without operators (thus without a UI
+# context, e.g. in print jobs): its text, its printed height and its placement within the render area.
+#
+def update_scale_ratio_text(context, ps, obj, depsgraph=None):
+    change_texts([obj], convertScaleFactorToRatioString(scale_factor=ps.scale_factor))
+    if depsgraph is None:
+        # Evaluated once for the changed text, the sizing and placement read the local bounds only:
+        depsgraph = scene_depsgraph(context.scene)
+    ensure_heights([obj], ps, depsgraph=depsgraph)
+    #position_in_top_right_corner(context, obj=obj, ps=ps)
+    # for more flexibility let the margins be chosen freely:
+    place_within_render(context, [obj], ps, depsgraph)
+    # Note this call can lead to endless recursion if width_px or height_px differ from resolution_x.
 
 
 
 def find_or_create_camera_and_assign(context):
-    if (context.scene.camera is None):
-        for scene_o in context.scene.objects:
-            if scene_o.type == 'CAMERA':
-                print("Assigning found camera %s to scene." % scene_o)
-                context.scene.camera = scene_o
-                #zhengbo context.scene.camera.layers = list(LAYERS_ALL)
-                return
+    if context.scene.camera is not None:
+        return
+
+    ps = context.scene.print_settings
+    camera = ps.camera_object
+    # Referenced objects may have been unlinked meanwhile (deleted ones are dereferenced by blender):
+    if not (camera and camera.type == 'CAMERA' and camera.users_collection):
+        camera = indexed_object(context.scene, 'camera')
+    if camera:
+        log.info("Assigning found camera %s to scene.", camera)
+        context.scene.camera = camera
+        ps.camera_object = camera
+        #zhengbo context.scene.camera.layers = list(LAYERS_ALL)
+        return
+
+    # Create a camera (through the data API, thus neither the active object changes nor a UI context is required):
+    camera = bpy.data.objects.new("Camera", bpy.data.cameras.new("Camera"))
+    context.scene.collection.objects.link(camera)
+    context.scene.camera = camera
+    ps.camera_object = camera
+
+
+
+#
+# The scale ratio text object: Referenced by the print settings, if not (yet) set, it is looked up in the
+# object index (a camera child named 'scale_ratio' is preferred) and referenced from then on.
+#
+def find_scale_ratio_text_object(scene):
+    ps = scene.print_settings
+    obj = ps.scale_ratio_text_object
+    if obj and obj.type == 'FONT' and obj.users_collection:
+        return obj
+    obj = indexed_object(scene, 'scale_ratio')
+    if obj:
+        ps.scale_ratio_text_object = obj
+    return obj
+
+
+
+#
+# OBJECT INDEX
+#
+# Fallback for finding the scale ratio text object and the camera by name or type when the print
+# settings' references are not set. Built with a single scan of a scene's objects (on the next lookup)
+# after objects were added, removed or changed (depsgraph_update_post, undo) or renamed (message bus).
+# Python renames do not notify the message bus, thus an entry not matching its object anymore is rebuilt
+# on lookup too.
+#
+# Holds names only, as references to blender objects may become invalid (e.g. by undo).
+#
+object_index = {} # scene name -> {'scale_ratio': object name, 'camera': object name}
+object_index_object_count = -1
+object_index_msgbus_owner = object()
+
+
+
+def build_object_index(scene):
+    index = {}
+    camera_children = set(o.name for o in scene.camera.children) if scene.camera else set()
+    for o in scene.objects:
+        # to allow other text/font objects as camera children, check for scale_ratio too:
+        if o.type == 'FONT' and o.name.find('scale_ratio') != -1:
+            if 'scale_ratio' not in index or o.name in camera_children and index['scale_ratio'] not in camera_children:
+                index['scale_ratio'] = o.name
+        elif o.type == 'CAMERA' and 'camera' not in index:
+            index['camera'] = o.name
+    return index
+
+
+
+def indexed_object(scene, key):
+    index = object_index.get(scene.name)
+    if index is None:
+        index = object_index[scene.name] = build_object_index(scene)
+    obj = indexed_object_valid(scene, index, key)
+    if obj is False:
+        # Stale, e.g. renamed or replaced:
+        index = object_index[scene.name] = build_object_index(scene)
+        obj = indexed_object_valid(scene, index, key)
+    return obj or None
+
+
+
+#
+# The indexed object if it still matches its key, False if the entry is stale.
+#
+def indexed_object_valid(scene, index, key):
+    name = index.get(key)
+    if name is None:
+        return None
+    obj = scene.objects.get(name)
+    if obj is None:
+        return False
+    if key == 'scale_ratio' and not (obj.type == 'FONT' and 'scale_ratio' in obj.name):
+        return False
+    if key == 'camera' and obj.type != 'CAMERA':
+        return False
+    return obj
+
+
+
+def invalidate_object_index(*args):
+    global object_index_object_count
+    object_index.clear()
+    object_index_object_count = len(bpy.data.objects)
+
+
+
+@persistent
+def object_index_depsgraph_update(scene, depsgraph=None):
+    if len(bpy.data.objects) != object_index_object_count:
+        invalidate_object_index()
+    elif object_index and depsgraph is not None:
+        # E.g. an object deleted and another added in one update, the index is rebuilt on the next lookup:
+        if any(isinstance(update.id, Object) for update in depsgraph.updates):
+            invalidate_object_index()
 
-    active_old = bpy.context.active_object #zhengbo active_old = context.scene.objects.active
 
-    if (context.scene.camera is None):
-        # Create a camera:
-        bpy.ops.object.add(type='CAMERA')
-        context.scene.camera = bpy.context.active_object #zhengbo context.scene.objects.active
-        ##the added object keeps the short name, while the others are renamed
-        #context.scene.selected_object['Camera']
 
-    context.view_layer.objects.active = active_old #zhengbo context.scene.objects.active = active_old
+@persistent
+def object_index_load_post(*args):
+    invalidate_object_index()
+    subscribe_object_renames()
+
+
+
+def subscribe_object_renames():
+    bpy.msgbus.clear_by_owner(object_index_msgbus_owner)
+    bpy.msgbus.subscribe_rna(
+            key=(bpy.types.Object, "name"),
+            owner=object_index_msgbus_owner,
+            args=(),
+            notify=invalidate_object_index,
+            )
 
 
 
@@ -493,7 +925,7 @@ def set_parent(context, to_be_child_objects, parent_object):
     # PARENT TO CAMERA
     ######
     # Make sure nothing is selected:
-    bpy.ops.object.select_all(action='DESELECT')
+    run_operator(bpy.ops.object.select_all, action='DESELECT')
 
     # Select the to-be-child objects:
     for o in to_be_child_objects:
@@ -503,7 +935,7 @@ def set_parent(context, to_be_child_objects, parent_object):
     parent_object.select_set(True) #zhengbo parent_object.select = True
     context.view_layer.objects.active = parent_object #zhengbo context.scene.objects.active = parent_object
 
-    bpy.ops.object.parent_set(type='OBJECT', keep_transform=False)
+    run_operator(bpy.ops.object.parent_set, type='OBJECT', keep_transform=False)
 
 
 
@@ -517,13 +949,76 @@ def is_out_of_sync(context):
     if not ps.print_to_scale:
         return True
 
-    if not context.scene.camera or context.scene.camera.type != 'ORTHO':# or ps.camera_zoom_cache != context.scene.camera.ortho_scale: TODO Cache the camera parameter calculation result?
-        print2scale__calculate_camera_paramaters(ps, context) # <- Currently required until the scale ratio -> camera orthographic/perspective scale calculation result is cached?
+    if not print_layout_in_sync(context, ps):
+        return True
 
     return False
 
 
 
+#
+# PRINT LAYOUT CACHE
+#
+# When the print settings are applied, a fingerprint of all inputs of the print layout solver is stored
+# together with the resulting resolution, orthographic scale and camera offset. As long as the inputs
+# and these outputs are unchanged, nothing needs to be recomputed. A depsgraph handler invalidates the
+# cache when an input (e.g. the unit scale) or output (e.g. the orthographic scale) is changed elsewhere.
+#
+def print_layout_fingerprint(context, ps):
+    import hashlib
+
+    inputs = read_print_inputs(context, ps)
+    camera = context.scene.camera
+    key = repr((sorted(inputs.items()), ps.print_to_scale, camera.name if camera else None))
+    return hashlib.blake2b(key.encode(), digest_size=8).hexdigest()
+
+
+
+def store_print_layout_cache(context, ps, layout=None):
+    if layout is None:
+        layout = solve_print_layout(**read_print_inputs(context, ps))
+    ps.layout_fingerprint = print_layout_fingerprint(context, ps)
+    ps.cached_ortho_scale = layout.ortho_scale
+    ps.cached_resolution = (min(layout.width_px, RENDER_RESOLUTION_MAX), min(layout.height_px, RENDER_RESOLUTION_MAX))
+    if layout.camera_delta_x is not None:
+        ps.cached_camera_delta = (layout.camera_delta_x, layout.camera_delta_y)
+
+
+
+def print_layout_in_sync(context, ps):
+    if not ps.layout_fingerprint:
+        return False
+    scene = context.scene
+    if tuple(ps.cached_resolution) != (scene.render.resolution_x, scene.render.resolution_y):
+        return False
+    camera = scene.camera
+    if ps.print_to_scale:
+        if not camera or camera.type != 'CAMERA' or camera.data.type != 'ORTHO':
+            return False
+        if not math.isclose(camera.data.ortho_scale, ps.cached_ortho_scale, rel_tol=1e-6):
+            return False
+    if ps.use_margins and camera:
+        if not (math.isclose(camera.delta_location[0], ps.cached_camera_delta[0], rel_tol=1e-6, abs_tol=1e-9)
+                and math.isclose(camera.delta_location[1], ps.cached_camera_delta[1], rel_tol=1e-6, abs_tol=1e-9)):
+            return False
+    return print_layout_fingerprint(context, ps) == ps.layout_fingerprint
+
+
+
+@persistent
+def print_layout_depsgraph_update(scene, depsgraph=None):
+    from types import SimpleNamespace
+
+    ps = scene.print_settings
+    if not ps.layout_fingerprint or ps.updating:
+        return
+    if depsgraph is not None and not (depsgraph.id_type_updated('SCENE') or depsgraph.id_type_updated('CAMERA')):
+        return
+    if not print_layout_in_sync(SimpleNamespace(scene=scene), ps):
+        ps.layout_fingerprint = ""
+
+
+
 def position_in_top_left_corner(context, obj=None, ps=None):
     if not ps:
         ps = context.scene.print_settings
@@ -535,7 +1030,7 @@ def position_in_top_left_corner(context, obj=None, ps=None):
     margin_top_bottom_old = ps.margin_top_bottom
 
     if is_out_of_sync(context):
-        bpy.ops.render.apply_print_settings()
+        run_operator(bpy.ops.render.apply_print_settings)
 
     #ps.margin_left_right = 10
     #ps.margin_top_bottom = 10
@@ -562,7 +1057,7 @@ def position_in_top_right_corner(context, obj=None, ps=None):
     margin_top_bottom_old = ps.margin_top_bottom
 
     if is_out_of_sync(context):
-        bpy.ops.render.apply_print_settings()
+        run_operator(bpy.ops.render.apply_print_settings)
 
     #ps.margin_left_right = 90 # TODO Depends on object dimensions.
     #ps.margin_top_bottom = 1
@@ -589,7 +1084,7 @@ def position_in_bottom_right_corner(context, obj=None, ps=None):
     margin_top_bottom_old = ps.margin_top_bottom
 
     if is_out_of_sync(context):
-        bpy.ops.render.apply_print_settings()
+        run_operator(bpy.ops.render.apply_print_settings)
 
     #ps.margin_left_right = 90 #
     #ps.margin_top_bottom = 90
@@ -628,7 +1123,7 @@ def position_in_bottom_left_corner(context, obj=None, ps=None):
     margin_top_bottom_old = ps.margin_top_bottom
 
     if is_out_of_sync(context):
-        bpy.ops.render.apply_print_settings()
+        run_operator(bpy.ops.render.apply_print_settings)
 
     #ps.margin_left_right = 1
     #ps.margin_top_bottom = 90
@@ -646,177 +1141,106 @@ def position_in_bottom_left_corner(context, obj=None, ps=None):
 
 
 def position_within_render(context, obj=None, ps=None):
-    print('Positioning within render ...')
-    active_old = None
     if not obj:
         obj = bpy.context.active_object #zhengbo context.scene.objects.active
-    else:
-        active_old = bpy.context.active_object #zhengbo context.scene.objects.active
     if not obj:
-        print('No object. obj: ', obj)
+        log.warning('No object to position within render.')
         return {'CANCELLED'}
-    if not ps:
-        ps = context.scene.print_settings
-    find_or_create_camera_and_assign(context)
-
-    if is_out_of_sync(context):
-        print(ps.width_px, context.scene.render.resolution_x, ps.height_px, context.scene.render.resolution_y)
-        bpy.ops.render.apply_print_settings()
+    return place_within_render(context, [obj], ps)
 
-    rendersettings = context.scene.render
 
-    #Introduces bugs easily if margin is derived from initial object dimensions:ensure_height(obj=obj, print_settings=ps)
 
+#
+# Derives the camera local location of an object's geometry center such that the object is placed
+# within the render area at the given distances to its left/right and top/bottom edges.
+#
+# render_x_m, render_y_m: printed size of the render area.
+# margin_left_right, margin_top_bottom: distance to the edges (printed), interpreted as percentage if >= 1.
+# extents: the object's size along the camera's x, y, z axes (model units).
+#
+def solve_placement(render_x_m, render_y_m, margin_left_right, margin_top_bottom, scale_factor, extents):
     #######
     # Position in a corner. Note: It is extra complicated in PERSPECTIVE mode which is TODO.
-    #SPACE_PER_CHAR = 2
     # Extra margin also is required because dimensions of a text object can be smaller than the required space, because the center is a bit too far left because chars start farther to the right, e.g. a 1.
-    if ps.margin_left_right >= 1.0: # interprete as percentage
-        MARGIN_TO_EDGE_HORIZONTAL = pixels_to_printed_m(context.scene.render.resolution_x, ps) * ps.margin_left_right / 100.0
+    if margin_left_right >= 1.0: # interprete as percentage
+        MARGIN_TO_EDGE_HORIZONTAL = render_x_m * margin_left_right / 100.0
     else:
-        MARGIN_TO_EDGE_HORIZONTAL = ps.margin_left_right
+        MARGIN_TO_EDGE_HORIZONTAL = margin_left_right
 
-    if ps.margin_top_bottom >= 1.0: # interprete as percentage
-        MARGIN_TO_EDGE_VERTICAL = pixels_to_printed_m(context.scene.render.resolution_y, ps) * ps.margin_top_bottom / 100.0
+    if margin_top_bottom >= 1.0: # interprete as percentage
+        MARGIN_TO_EDGE_VERTICAL = render_y_m * margin_top_bottom / 100.0
     else:
-        MARGIN_TO_EDGE_VERTICAL = ps.margin_top_bottom
+        MARGIN_TO_EDGE_VERTICAL = margin_top_bottom
 
-    #MARGIN_TO_EDGE_VERTICAL /= ps.scale_factor
-    #MARGIN_TO_EDGE_HORIZONTAL /= ps.scale_factor
-    #print('MARGIN_TO_EDGE_HORIZONTAL: ', MARGIN_TO_EDGE_HORIZONTAL)
-    #print('MARGIN_TO_EDGE_VERTICAL: ', MARGIN_TO_EDGE_VERTICAL)
+    req_space_x = extents[0] / 2.0
+    req_space_y = extents[1] / 2.0
+    req_space_z = extents[2] / 2.0
 
-    # x = camera origin.x (global) + render sizeX / 2 - space * number_of_characters
-    smallest_index, second_largest_index, largest_index = get_smallest_central_and_largest(obj.dimensions)
-    req_space_x = obj.dimensions[largest_index] / 2.0# * zoom_result
-    req_space_y = obj.dimensions[second_largest_index] / 2.0# * zoom_result
-    req_space_z = obj.dimensions[smallest_index] / 2.0# * zoom_result
-    #print('Object dimensions: ' + str(obj.dimensions))
-
-    # Allow to restore the initial origin later: (NOTE This depends on the blender functionality that setting the origin maintains the position.)
-    #TODO Determine why poll function fails:
-    #bpy.ops.view3d.snap_cursor_to_active()
-    #origin_old = context.scene.cursor_location
-
-    # TODO Correct the wrong math, to allow for reusing blender functionality.
-    p = obj.parent
-    if p:
-        bpy.ops.object.parent_clear(type='CLEAR')
-    ## clear rotation temporarily:
-    #rotation_old = obj.rotation.copy()
-    #obj.rotation = [0.0, 0.0, 0.0]
-    origin_old = obj.location + obj.delta_location#TODO Calc rotation matrix from obj.rotation_* # because origin_set influences location only.
-    #bpy.ops.object.location_clear()
-    #obj.delta_location = [0.0, 0.0, 0.0]
-    # HACK Works around the need to execute position within render twice. TODO Why is rotation clear a fix for this weirdness?
-    bpy.ops.object.rotation_clear()
-    obj.location[0] = 0
-    obj.location[1] = 0
-    obj.location[2] = 0
-    location_old = obj.location.copy()
-    delta_location_old = obj.delta_location.copy()
-    #print("origin_old: ", origin_old)
-    #if not p:
-    #    # No parent => Use the camera as this is the soon to be parent.
-    #    p = context.scene.camera
-    #origin_old = p.location + obj.location * p.matrix_world + obj.delta_location * obj.matrix_world * p.matrix_world
-    bpy.ops.object.origin_set(type='ORIGIN_GEOMETRY')#, center='BOUNDS')
-    # Create a delta, such that the missing parent information doesn't matter:
-    origin_delta = location_old - obj.location
-    #origin_new = obj.location + obj.delta_location
-    #origin_delta = origin_new - origin_old
-    #print("origin_delta: ", origin_delta, " from location_old: ", location_old, " - location: ", obj.location)
-
-
-    #    Camera -
-    #     | |   |
-    #    |   |  z
-    #   |     | |
-    #   |--x--| -   Assuming global Z-axis location is the greatest may not be always true.
-    # So better determine the biggest distance to scene's center first (I think this won't
-    # work without taking care of the camera's local/delta rotation)?
-    # Instead of scene center in this case it might be favourable to use all the objects' medians' median.
-    # Not to forget that the camera object's rotation is crucial as it influences the direction of the render
-    # resolution x and y. So this is TODO if the parenting approach fails but it ain't (inheriting the camera
-    # rotation is easiest).
-    x = - pixels_to_printed_m(rendersettings.resolution_x, ps) / 2.0 + MARGIN_TO_EDGE_HORIZONTAL + req_space_x * ps.scale_factor # Because the object's origin is moved to the center explicitely.
-    y = pixels_to_printed_m(rendersettings.resolution_y, ps) / 2.0 - MARGIN_TO_EDGE_VERTICAL - req_space_y * ps.scale_factor
-    print("x: %s y: %s scale_factor: %s " % (x, y, ps.scale_factor))
-    #if ps.scale_factor >= 1.0:
-    x /= ps.scale_factor
-    y /= ps.scale_factor
-    #elif ps.scale_factor < 1.0:
-    #    x /= ps.scale_factor * 4
-    #    y /= ps.scale_factor
+    # x = camera origin.x + render sizeX / 2 - space required, all in the camera's frame (the object is parented to the camera):
+    x = - render_x_m / 2.0 + MARGIN_TO_EDGE_HORIZONTAL + req_space_x * scale_factor
+    y = render_y_m / 2.0 - MARGIN_TO_EDGE_VERTICAL - req_space_y * scale_factor
+    x /= scale_factor
+    y /= scale_factor
     #TODO debug scale length. x = x / context.scene.unit_settings.scale_length
-    #y = y / context.scene.unit_settings.scale_length
     # Because the camera's z axis points in the direction of the incoming rays, parenting and offsetting in negative Z direction is enough:
     z = -.1 - req_space_z # Along the camera's normal (Z) axis. (To move it out of the clipping minimum distance.)
-    #z = z / context.scene.unit_settings.scale_length / ps.scale_factor
-    obj.delta_location = (x, y, z)
-    #print('Object.Delta Location: ' + str(obj.delta_location.x) + ', ' +  str(obj.delta_location.y) + ', ' + str(obj.delta_location.z) )
-
-
-    # Restore the original origin, maintaining the overall location:
-    #origin_new = obj.location + obj.delta_location #TODO Rotation.
-    ##if obj.parent: # should have a parent object (camera).
-    #origin_new = origin_new + obj.parent.location
-    #origin_old_relative = origin_old - origin_new # tip - foot
-    #context.scene.cursor_location = origin_old
-    #context.scene.cursor_location += origin_delta
-    #context.scene.cursor_location = origin_new - origin_delta # valid, because the parent object was cleared.
-    delta_location_delta = obj.delta_location - delta_location_old
-    cursor_location_old = context.scene.cursor.location.copy()
-    context.scene.cursor.location = origin_old + delta_location_delta # valid, because the parent object was cleared
-    #raise Error
-    bpy.ops.object.origin_set(type='ORIGIN_CURSOR')#, center='BOUNDS')
-    context.scene.cursor.location = cursor_location_old
-
-    # Adapt the delta location to take the origin offset into account:
-    # Remove the LOCAL_WITH_PARENT transform first, remember the old:
-    # TODO Simply calculate the rotation matrix Rot(axis, angle) manually from obj.rotation_angles.
-    #matrix_world_old = obj.matrix_world.copy()
-    #matrix_world_without_parent = obj.convert_space(matrix=obj.matrix_world, from_space='LOCAL_WITH_PARENT', to_space='LOCAL')
-    #obj.matrix_world = matrix_world_without_parent
-    # With the transform removed, the object is effectively in world/most global space, hence the delta can be applied:
-    # Possible because the origin delta is linear to the object's dimensions!
-    obj.delta_location += origin_delta
-
-    #print('origin_delta:   ', origin_delta)
-    #print('delta_location: ', obj.delta_location)
-    #th_i, h_i, w_i = get_smallest_central_and_largest(origin_delta)
-    #if obj.delta_location[largest_index] < 0:
-    #    obj.delta_location[largest_index] += abs(origin_delta[w_i])
-    #else:
-    #    obj.delta_location[largest_index] -= abs(origin_delta[w_i])
-    #
-    #if obj.delta_location[second_largest_index] < 0:
-    #    obj.delta_location[second_largest_index] += abs(origin_delta[h_i])
-    #else:
-    #    obj.delta_location[second_largest_index] -= abs(origin_delta[h_i])
-
-    #obj.delta_location[smallest_index] -= origin_delta[th_i]
-
-    #obj.matrix_world = matrix_world_old * Matrix([1,0,0],[0,1,0],[0,0,1], origin_delta)
-    #obj.rotation = rotation_old
-
-    # Set camera as parent if necessary:
-    if not obj.parent:
-       set_parent(context, to_be_child_objects=[obj], parent_object=context.scene.camera)
-    elif obj.parent.type != 'CAMERA':
-        print("obj: ", obj, " shall be positioned within render area, but does have another object assigned as parent: ", obj.parent)
-    # TODO Remove once the delta position in combination with parenting isn't buggy anymore. This works around random object position (sometimes at least, which is weird too):
-    obj.parent_type = 'OBJECT'
-    bpy.ops.object.select_all(action='DESELECT')
-    context.view_layer.objects.active = obj #zhengbo context.scene.objects.active = obj
-    obj.select_set(True) #zhengbo context.scene.objects.active.select = True
-    #bpy.ops.object.transform_apply(rotation=True)#, location=False, scale=False)
-    bpy.ops.object.rotation_clear()
-
-    #context.scene.cursor_location = obj.parent.location + obj.parent.delta_location + (origin_old + delta_location_delta) * obj.matrix_parent_inverse # valid, because the parent object was cleared.
-
-    if active_old:
-        context.view_layer.objects.active = active_old #zhengbo context.scene.objects.active = active_old
+    return x, y, z
+
+
+
+#
+# Places objects within the render area of the scene's camera, see solve_placement().
+#
+# Each object is parented to the camera (with identity parent inverse, so its local frame is the camera's),
+# its rotation is cleared and its delta location set such that its geometry center is at the solved
+# location. The objects' origins and geometry are left untouched. Everything is computed with mathutils
+# from the evaluated local bounding boxes, thus no operators are involved and any number of objects is
+# placed with a single depsgraph evaluation.
+#
+# The margins are taken from the print settings, unless an object has the custom properties
+# 'print_margin_left_right' or 'print_margin_top_bottom'.
+#
+@profiled('position_within_render')
+def place_within_render(context, objects, ps=None, depsgraph=None):
+    from mathutils import Matrix, Vector
+
+    if not ps:
+        ps = context.scene.print_settings
+    find_or_create_camera_and_assign(context)
+    camera = context.scene.camera
+
+    if is_out_of_sync(context):
+        apply_print_settings(context, ps)
+
+    render_x_m = pixels_to_printed_m(context.scene.render.resolution_x, ps)
+    render_y_m = pixels_to_printed_m(context.scene.render.resolution_y, ps)
+    if depsgraph is None:
+        depsgraph = context.evaluated_depsgraph_get()
+
+    for obj in objects:
+        bound_box = [Vector(corner) for corner in obj.evaluated_get(depsgraph).bound_box]
+        bound_min = Vector([min(corner[axis] for corner in bound_box) for axis in range(3)])
+        bound_max = Vector([max(corner[axis] for corner in bound_box) for axis in range(3)])
+        # With the rotation cleared and the camera as parent, the object's local axes are the camera's:
+        scale = Matrix.Diagonal(obj.scale)
+        extents = scale @ (bound_max - bound_min)
+        center = scale @ ((bound_min + bound_max) / 2.0)
+
+        location = Vector(solve_placement(render_x_m, render_y_m,
+                obj.get('print_margin_left_right', ps.margin_left_right),
+                obj.get('print_margin_top_bottom', ps.margin_top_bottom),
+                ps.scale_factor, extents))
+
+        if obj.parent and obj.parent != camera:
+            log.warning("%s shall be positioned within render area, but has another parent which is replaced by the camera: %s", obj, obj.parent)
+        obj.parent = camera
+        obj.parent_type = 'OBJECT'
+        obj.matrix_parent_inverse = Matrix.Identity(4)
+        obj.rotation_euler = (0.0, 0.0, 0.0)
+        obj.rotation_quaternion = (1.0, 0.0, 0.0, 0.0)
+        obj.rotation_axis_angle = (0.0, 0.0, 1.0, 0.0)
+        obj.location = (0.0, 0.0, 0.0)
+        obj.delta_location = location - center
 
     return {'FINISHED'}
 
@@ -865,33 +1289,32 @@ def get_smallest_central_and_largest(vector_3d):
 #
 def change_text(context, text_object, text=""):
     if not text_object:
-        print('No text object: ', text_object)
-    if not context:
-        print('No context: ', context)
+        log.warning('No text object: %s', text_object)
+        return {'CANCELLED'}
+    change_texts([text_object], text)
+    return {'FINISHED'}
 
-    # Make sure nothing is selected:
-    #if len(context.selected_objects) > 0: complains about context.
-    bpy.ops.object.select_all(action='DESELECT')
-
-    context.view_layer.objects.active = text_object #zhengbo context.scene.objects.active = text_object
-    text_object.select_set(True) #zhengbo context.scene.objects.active.select = True
-
-    # Enter edit mode:
-    bpy.ops.object.mode_set(mode='EDIT', toggle=False)
-    if (not text_object.visible_get()):
-        print("Notice: Could not change text of text object because the object isn't visible currently.")
-    elif (text_object.type == 'FONT'):
-        bpy.ops.font.select_all()
-        bpy.ops.font.text_cut()
-        print('setting text: ' + text)
-        bpy.ops.font.text_insert(text=text)
-    else:
-        print('Notice: Could not set scale ratio text representation because object appears to be no text/font object: ' + text_object)
 
-    # Leave editmode to objectmode:
-    #bpy.ops.object.editmode_toggle()
-    bpy.ops.object.mode_set(mode='OBJECT', toggle=False)
-    return {'FINISHED'}
+
+#
+# Changes the text of several text objects at once by writing the text (FONT) curve's body,
+# i.e. without selection changes, edit mode or operators. Thus it works for hidden objects
+# and in background mode too.
+#
+# Returns the text objects, i.e. those that now show the text.
+#
+@profiled('change_text')
+def change_texts(text_objects, text=""):
+    changed = []
+    for text_object in text_objects:
+        if text_object.type != 'FONT':
+            log.info('Could not set text because object appears to be no text/font object: %s', text_object)
+            continue
+        # Text objects may share their curve, compare to write it only once:
+        if text_object.data.body != text:
+            text_object.data.body = text
+        changed.append(text_object)
+    return changed
 
 
 
@@ -904,22 +1327,17 @@ def add_text(context, text="", object_name="", print_settings=None):
     if not print_settings:
         print_settings = context.scene.print_settings
 
-    bpy.ops.object.text_add(align='WORLD', enter_editmode=False)
-    # type='FONT'
-    # The following results in the just added text object:
-    #text_object = getLastObjectInSelection(context)    
-    #print('active object: ' + str(context.active_object))
-    text_object = context.active_object
+    # Through the data API (instead of bpy.ops.object.text_add), thus no UI context is required:
+    text_object = bpy.data.objects.new(object_name or "Text", bpy.data.curves.new(object_name or "Text", type='FONT'))
+    context.scene.collection.objects.link(text_object)
     text_object.select_set(True)
-    if object_name:
-       text_object.name = object_name
 
     # Make sure it's easier to find, i.e. draw it in front of any other objects:
     text_object.show_in_front = True
     #zhengbo text_object.layers = list(LAYERS_ALL) # Copy to allow layer visibility changes affect only this object.
     # Note it's a constant and a reference at the same time if it's not copied using list(). Thus it should not be changed - and if then the side effect is that all objects that have LAYERS_ALL assigned, no longer show on all layers too.
 
-    ensure_height(obj=text_object, print_settings=print_settings)# <- TODO Maybe not enforce the same height currently. Instead, the calling function should be responsible?
+    ensure_heights([text_object], print_settings, depsgraph=context.evaluated_depsgraph_get())# <- TODO Maybe not enforce the same height currently. Instead, the calling function should be responsible?
 
     # Add text.
     if text:
@@ -936,10 +1354,14 @@ def add_text(context, text="", object_name="", print_settings=None):
 # If none are found, the print settings are evaluated for a text height.
 # If still no desired height could be determined, it defaults to .01 meter resulting height.
 def ensure_height(obj, print_settings, resulting_height=0.0):
-    # Reset scale for the case the value was set to zero earlier (which leads to division by zero):
-    #obj.scale.x = 1.0
-    #obj.scale.y = 1.0
-    #obj.scale.z = 1.0
+    return ensure_heights([obj], print_settings, resulting_height)
+
+
+
+#
+# Resolves the height (in model units) an object needs to be printed in the desired height, see ensure_height().
+#
+def target_model_height(print_settings, resulting_height=0.0):
     target_height = max(resulting_height, 0.0) # 0, i.e. invisible by default.
     if resulting_height < 1:
         # speedier try: x except NameError: not exists else: exists.
@@ -953,36 +1375,64 @@ def ensure_height(obj, print_settings, resulting_height=0.0):
         elif print_settings.text_height:
             resulting_height = print_settings.text_height
         else:
-            print('WARNING: No text size defined, defaulting to .01m text height when printed out.')
+            log.warning('No text size defined, defaulting to .01m text height when printed out.')
             resulting_height = .010 # meters = 1cm = 10mm
 
     # TODO Support more text sizes, e.g. a GUI field for getting input.
     if resulting_height:
         target_height = resulting_height / print_settings.scale_factor
     else:
-        print("Desired resulting height (as printed) is invalid: %s => Defaulting to 0, i.e. invisible." % resulting_height)
+        log.warning("Desired resulting height (as printed) is invalid: %s => Defaulting to 0, i.e. invisible.", resulting_height)
+    return target_height
+
 
-    # Assumption: text object's width is largest. Height is 2nd longest. Depth/thickness comes third.
-    # TODO Figuring text height directly possible?
-    smallest_index, second_largest_index, largest_index = get_smallest_central_and_largest(obj.dimensions)
-    #print("object dimensions: ", obj.dimensions, " smallest: ", smallest_index, " central: ", second_largest_index, " largest: ", largest_index)
-    object_height = obj.dimensions[second_largest_index]
-    #print(object_height, ' target height: ', target_height)
-    # The height determines the scale factor, the other dimensions are scaled with the same factor to avoid distortion:
-    scale_factor = target_height / object_height
-    #target_dim = obj.dimensions * scale_factor # Vector times scalar.
-    #scale_object_to_target_dimensions(target_dim=target_dim)
-    obj.scale.x *= scale_factor
-    obj.scale.y *= scale_factor
-    obj.scale.z *= scale_factor
-    # Workaround scale not taking effect until mode was toggled:
-    bpy.ops.object.mode_set(mode='EDIT')
-    bpy.ops.object.mode_set(mode='OBJECT')
+
+#
+# Sizes several objects at once such that they are printed in the desired height (see ensure_height()).
+#
+# The size is computed from the local bounding box of the evaluated object and the object's own scale,
+# so neither mode toggles nor a depsgraph update after each object are required (the depsgraph is
+# evaluated once for all objects, e.g. for texts that just changed). An object's custom property
+# 'print_text_height' (meters as printed) overrides the desired height, whatever its size (see target_model_height()).
+#
+@profiled('ensure_height')
+def ensure_heights(objects, print_settings, resulting_height=0.0, depsgraph=None):
+    if depsgraph is None:
+        depsgraph = bpy.context.evaluated_depsgraph_get()
+    target_height_default = target_model_height(print_settings, resulting_height)
+
+    for obj in objects:
+        target_height = target_height_default
+        if obj.get('print_text_height'):
+            # Meters as printed, used as is (unlike the resulting height, see target_model_height()):
+            target_height = (obj['print_text_height'] / print_settings.scale_factor
+                    / print_settings.id_data.unit_settings.scale_length)
+
+        bound_box = obj.evaluated_get(depsgraph).bound_box
+        extents = [(max(corner[axis] for corner in bound_box) - min(corner[axis] for corner in bound_box)) * obj.scale[axis]
+                for axis in range(3)]
+        # Assumption: text object's width is largest. Height is 2nd longest. Depth/thickness comes third.
+        smallest_index, second_largest_index, largest_index = get_smallest_central_and_largest(extents)
+        object_height = extents[second_largest_index]
+        if not object_height:
+            log.info('Could not ensure height of object %s without extent (e.g. empty text).', obj)
+            continue
+        # The height determines the scale factor, the other dimensions are scaled with the same factor to avoid distortion:
+        scale_factor = target_height / object_height
+        obj.scale = (obj.scale[0] * scale_factor, obj.scale[1] * scale_factor, obj.scale[2] * scale_factor)
 
     return {'FINISHED'}
 
 
 
+#
+# Sizes every text (annotation) object in a collection, including nested collections, see ensure_heights().
+#
+def ensure_collection_heights(collection, print_settings, resulting_height=0.0):
+    return ensure_heights([o for o in collection.all_objects if o.type == 'FONT'], print_settings, resulting_height)
+
+
+
 def convertScaleFactorToRatioString(scale_factor, precision=2):
     text = None
     if (scale_factor < 1):
@@ -1014,532 +1464,3921 @@ in_TO_cm = 2.54 # conversion factor
 
 #def printed_distance_to_pixel(resulting_distance_m):
 def printed_m_to_pixels(m, ps): # inline function
-    return round(m * m_TO_cm / in_TO_cm * float(ps.dpi))
+    return m_to_pixels(m, ps.dpi)
 
 
 
-def derive_width_pixels(context, ps):
-    m = ps.width_cm / m_TO_cm
-    if ps.use_margins:
-        m = m - rel_to_abs_m(ps.margin_left, pixels_to_printed_m(context.scene.render.resolution_x, ps)) - rel_to_abs_m(ps.margin_right, pixels_to_printed_m(context.scene.render.resolution_x, ps))
-    ps.width_px = max(printed_m_to_pixels(m, ps), 4)
+def m_to_pixels(m, dpi):
+    return round(m * m_TO_cm / in_TO_cm * float(dpi))
 
 
 
-def derive_height_pixels(context, ps):
-    m = ps.height_cm / m_TO_cm
-    if ps.use_margins:
-        m = m - rel_to_abs_m(ps.margin_top, pixels_to_printed_m(context.scene.render.resolution_y, ps)) - rel_to_abs_m(ps.margin_bottom, pixels_to_printed_m(context.scene.render.resolution_y, ps))
-    ps.height_px = max(printed_m_to_pixels(m, ps), 4)
+def pixels_to_printed_m(pixel, ps):
+    return pixels_to_m(pixel, ps.dpi)
 
 
 
-def pixels_to_printed_m(pixel, ps):
-    return float(pixel) / float(ps.dpi) * in_TO_cm / m_TO_cm
+def pixels_to_m(pixel, dpi):
+    return float(pixel) / float(dpi) * in_TO_cm / m_TO_cm
 
 
 
+#
+# (Re)loads the paper dimensions from the preset and updates potentially outdated pixel
+# (or for custom pixel input centimeter) values of the print settings.
+#
+@profiled('pixels_from_print')
 def pixels_from_print(context, ps):
-    tipo, dim_w, dim_h = paper_presets_data[ps.preset]
-
-    if tipo != "custom":
-        # (Re)load all parameters from the preset:
-        if ps.orientation == "Landscape":
-            ps.width_cm = dim_h
-            ps.height_cm = dim_w
-        elif ps.orientation == "Portrait":
-            ps.width_cm = dim_w
-            ps.height_cm = dim_h
-        # Update potentially outdated pixel values:
-        derive_width_pixels(context, ps)
-        derive_height_pixels(context, ps)
-
-    else:
-        #dim_w = ps.width_cm
-        #dim_h = ps.height_cm
-        if ps.unit_from == "CM_TO_PIXELS":
-            derive_width_pixels(context, ps)
-            derive_height_pixels(context, ps)
-        else: #PIXELS_TO_CM
-            ps.width_cm = float(ps.width_px) / float(ps.dpi) * in_TO_cm
-            ps.height_cm = float(ps.height_px) / float(ps.dpi) * in_TO_cm
-            if ps.use_margins:
-                margin_left_m = rel_to_abs_m(
-                        ps.margin_left,
-                        pixels_to_printed_m(context.scene.render.resolution_x, ps)
-                        )
-                margin_right_m = rel_to_abs_m(
-                        ps.margin_right,
-                        pixels_to_printed_m(context.scene.render.resolution_x, ps)
-                        )
-                ps.width_cm += margin_left_m * m_TO_cm + margin_right_m * m_TO_cm
-            if ps.use_margins:
-                margin_top_m = rel_to_abs_m(
-                        ps.margin_top,
-                        pixels_to_printed_m(context.scene.render.resolution_y, ps)
-                        )
-                margin_bottom_m = rel_to_abs_m(
-                        ps.margin_bottom,
-                        pixels_to_printed_m(context.scene.render.resolution_y, ps)
-                        )
-                ps.height_cm += margin_top_m * m_TO_cm + margin_bottom_m * m_TO_cm
+    layout = solve_print_layout(**read_print_inputs(context, ps))
+    write_print_layout(context, ps, layout, to_render=False, to_camera=False)
+    return layout
 
 
 
+#
+# The result of solve_print_layout(). Immutable, so it may be shared and cached freely.
+#
+# Margins are given twice: as stored in the print settings (clamped to the space available,
+# relative or absolute) and resolved to absolute meters.
+# The camera delta is None if margins are not in use (as the camera then must not be touched).
+#
+PrintLayout = namedtuple('PrintLayout', (
+        'width_cm', 'height_cm',
+        'width_px', 'height_px',
+        'margin_top', 'margin_right', 'margin_bottom', 'margin_left',
+        'margin_top_m', 'margin_right_m', 'margin_bottom_m', 'margin_left_m',
+        'printable_width_m', 'printable_height_m',
+        'camera_delta_x', 'camera_delta_y',
+        'ortho_scale',
+        'text_height',
+        ))
 
 
 
-class RENDER_PT_print(Panel):
-    bl_idname = "OBJECT_PT_print_panel"
-    bl_label = "Print"
-    bl_space_type = 'VIEW_3D'
-    bl_region_type = 'UI'
-    bl_category = 'Print'
+#
+# Derives the render resolution, the camera parameters and the clamped margins from the
+# raw print settings in one go.
+#
+# Pure python, i.e. does neither read nor write any blender data. Thus it can be used by
+# batch scripts without a scene, see read_print_inputs() for getting the inputs from a scene
+# and write_print_layout() for applying the result.
+#
+# Relative margins (>= 1, percent) refer to the current render resolution (resolution_x, resolution_y),
+# which defaults to the pixel dimensions.
+#
+def solve_print_layout(preset="custom_1_1", orientation="Portrait", unit_from="CM_TO_PIXELS",
+        dpi=300, width_cm=5.0, height_cm=3.0, width_px=900, height_px=600,
+        use_margins=True, margin_top=.015, margin_right=.015, margin_bottom=.015, margin_left=.015,
+        scale_factor=1.0, scale_length=1.0, resolution_x=None, resolution_y=None,
+        add_scale_ratio_text=True, text_height=.005):
+
+    if resolution_x is None:
+        resolution_x = width_px
+    if resolution_y is None:
+        resolution_y = height_px
+    render_x_m = pixels_to_m(resolution_x, dpi)
+    render_y_m = pixels_to_m(resolution_y, dpi)
+
+    tipo, dim_w, dim_h = paper_presets_data[preset]
+    if tipo != "custom":
+        # (Re)load all parameters from the preset:
+        if orientation == "Landscape":
+            width_cm = dim_h
+            height_cm = dim_w
+        elif orientation == "Portrait":
+            width_cm = dim_w
+            height_cm = dim_h
+
+    margin_top_m = margin_right_m = margin_bottom_m = margin_left_m = 0.0
+    if use_margins:
+        # HORIZONTAL
+        margin_left_m = rel_to_abs_m(margin_left, render_x_m)
+        margin_right_m = rel_to_abs_m(margin_right, render_x_m)
+
+        length_available = render_x_m - margin_right_m
+        # May be considered a bug because it changes relative percentage to an absolute value (does no harm though).
+        if margin_left_m > length_available:
+            margin_left = margin_left_m = length_available
+
+        length_available = render_x_m - margin_left_m
+        # May be considered a bug because it changes relative percentage to an absolute value (does no harm though).
+        if margin_right_m > length_available:
+            margin_right = margin_right_m = length_available
+
+        # VERTICAL
+        margin_top_m = rel_to_abs_m(margin_top, render_y_m)
+        margin_bottom_m = rel_to_abs_m(margin_bottom, render_y_m)
+
+        length_available = render_y_m - margin_bottom_m
+        # May be considered a bug because it changes relative percentage to an absolute value (does no harm though).
+        if margin_top_m > length_available:
+            margin_top = margin_top_m = length_available
+
+        length_available = render_y_m - margin_top_m
+        # May be considered a bug because it changes relative percentage to an absolute value (does no harm though).
+        if margin_bottom_m > length_available:
+            margin_bottom = margin_bottom_m = length_available
+
+    if tipo != "custom" or unit_from == "CM_TO_PIXELS":
+        # Update potentially outdated pixel values:
+        width_px = max(m_to_pixels(width_cm / m_TO_cm - margin_left_m - margin_right_m, dpi), 4)
+        height_px = max(m_to_pixels(height_cm / m_TO_cm - margin_top_m - margin_bottom_m, dpi), 4)
+    else: #PIXELS_TO_CM
+        width_cm = float(width_px) / float(dpi) * in_TO_cm + (margin_left_m + margin_right_m) * m_TO_cm
+        height_cm = float(height_px) / float(dpi) * in_TO_cm + (margin_top_m + margin_bottom_m) * m_TO_cm
+
+    if add_scale_ratio_text:
+        height_max = width_cm / m_TO_cm
+        if text_height > height_max:
+            text_height = height_max
+        #elif text_height < height_min:
+        #    text_height = height_min
+
+    camera_delta_x = camera_delta_y = None
+    if use_margins:
+        camera_delta_x = margin_left_m - margin_right_m
+        camera_delta_y = margin_bottom_m - margin_top_m
+
+    longer_side = height_cm / m_TO_cm - margin_top_m - margin_bottom_m
+    if (width_cm > height_cm): #if (orientation == 'Landscape'):
+        longer_side = width_cm / m_TO_cm - margin_left_m - margin_right_m
+
+    #blenderartists.org/forum/showthread.php?257556-Render-to-Scale-in-Blender-using-the-Render-to-Print-addon-!
+    #They use the magic number 1.3648 - wonder why, its origin needs to be determined.
+    #     Orthographic_scale                = 1.3648 x L_format_real x L_real / L_virtual
+    # <=> Orthographic_scale * scale_factor = 1.3648 x L_format_real
+    # <=> Orthographic_scale * scale_factor = H_format_real
+    #                                                       where L_real = scale factor * L_virtual
+    #And as the orthographic scale does not take the Scene.unit_settings scale_length into account (for some reason?):
+    # The H_format_real now in the model has to be 'unscaled' too for consistency as the model is scaled with the scale_length setting
+    # too while strangely the orthographic is not scaled, so the right hand side will also be divided by the scale to make it equal again:
+    # <=> Orthographic_scale * scale_factor = H_format_real / unit_settings_scale_length
+    # <=> Orthographic_scale = H_format_real / unit_settings_scale_length / scale_factor
+    #
+    ortho_scale = (longer_side / scale_length) / scale_factor
+
+    return PrintLayout(
+            width_cm=width_cm, height_cm=height_cm,
+            width_px=width_px, height_px=height_px,
+            margin_top=margin_top, margin_right=margin_right,
+            margin_bottom=margin_bottom, margin_left=margin_left,
+            margin_top_m=margin_top_m, margin_right_m=margin_right_m,
+            margin_bottom_m=margin_bottom_m, margin_left_m=margin_left_m,
+            printable_width_m=pixels_to_m(width_px, dpi),
+            printable_height_m=pixels_to_m(height_px, dpi),
+            camera_delta_x=camera_delta_x, camera_delta_y=camera_delta_y,
+            ortho_scale=ortho_scale,
+            text_height=text_height,
+            )
 
-    def draw(self, context):
 
-        layout = self.layout
-        scene = context.scene
-        ps = scene.print_settings
 
+#
+# Reads the inputs of solve_print_layout() from the print settings and the scene (once).
+#
+@profiled('read_print_inputs', nested=True)
+def read_print_inputs(context, ps):
+    scene = context.scene
+    return dict(
+            preset=ps.preset,
+            orientation=ps.orientation,
+            unit_from=ps.unit_from,
+            dpi=ps.dpi,
+            width_cm=ps.width_cm,
+            height_cm=ps.height_cm,
+            width_px=ps.width_px,
+            height_px=ps.height_px,
+            use_margins=ps.use_margins,
+            margin_top=ps.margin_top,
+            margin_right=ps.margin_right,
+            margin_bottom=ps.margin_bottom,
+            margin_left=ps.margin_left,
+            scale_factor=ps.scale_factor,
+            scale_length=scene.unit_settings.scale_length,
+            resolution_x=scene.render.resolution_x,
+            resolution_y=scene.render.resolution_y,
+            add_scale_ratio_text=ps.add_scale_ratio_text,
+            text_height=ps.text_height,
+            )
 
-        #PRINT2SCALE
-        row00 = layout.row(align=True)
-        text = "Print to scale "
-        text = text + convertScaleFactorToRatioString(ps.scale_factor)
 
-        row00.prop(ps, "print_to_scale", text=text)
 
-        row = layout.row(align=True)
-        row.active = ps.print_to_scale
-        row.prop(ps, "scale_factor", text="Scale factor")
+# The print settings derived by solve_print_layout(), in write order:
+PRINT_LAYOUT_SETTINGS = (
+        'width_cm', 'height_cm',
+        'margin_top', 'margin_right', 'margin_bottom', 'margin_left',
+        'width_px', 'height_px',
+        'text_height',
+        )
 
-        row = layout.row(align=True)
-        row.active = ps.print_to_scale
-        row.prop(ps, "add_scale_ratio_text", text="Add scale ratio text")
 
-        row = layout.row(align=True)
-        row.active = ps.print_to_scale
-        row.prop(ps, "text_height", text="Text height")
 
-        row = layout.row(align=True)
-        row.active = ps.print_to_scale
-        #row.label(text="Positioning margins:")
-        row.operator("object.position_within_render")#, icon="",
-        row.prop(ps, "margin_left_right", text="Margin left, right.")
-        row.prop(ps, "margin_top_bottom", text="Margin top, bottom.")
-        #PRINT2SCALE -END
+#
+# Applies a PrintLayout in a single write pass.
+#
+# Only values that differ are written and the update callbacks are suppressed meanwhile
+# as the layout already is consistent.
+# The camera's orthographic scale is left to print2scale__calculate_camera_paramaters().
+#
+@profiled('write_print_layout')
+def write_print_layout(context, ps, layout, to_render=True, to_camera=True):
+    updating_old = ps.updating
+    ps.updating = True
+    try:
+        for name in PRINT_LAYOUT_SETTINGS:
+            value = getattr(layout, name)
+            if getattr(ps, name) != value:
+                setattr(ps, name, value)
+    finally:
+        ps.updating = updating_old
 
-        #GENERAL PRINT SETTINGS
-        # Not needed directly by render to print, nevertheless located in print settings for single source principle, may be used by various extensions that require margin information:
-        row = layout.row(align=True)
-        row.prop(ps, "use_margins", text="")
-        row.prop(ps, "margin_top", text="Top margin")
-        row.prop(ps, "margin_right", text="Right margin")
-        row.prop(ps, "margin_bottom", text="Bottom margin")
-        row.prop(ps, "margin_left", text="Left margin")
-        row.active = ps.use_margins
+    camera = context.scene.camera
+    if to_camera and camera and layout.camera_delta_x is not None:
+        camera.delta_location[0] = layout.camera_delta_x
+        camera.delta_location[1] = layout.camera_delta_y
 
-        row = layout.row(align=True)
-        row1 = layout.row(align=True)
-        row2 = layout.row(align=True)
-        row3 = layout.row(align=True)
-        row4 = layout.row(align=True)
-        row5 = layout.row(align=True)
-        row6 = layout.row(align=True)
-        row7 = layout.row(align=True)
-        col = layout.column(align=True)
+    if to_render:
+        # Blender clamps the resolution like the pixel settings, see render_preflight():
+        render = context.scene.render
+        if render.resolution_x != min(layout.width_px, RENDER_RESOLUTION_MAX):
+            render.resolution_x = min(layout.width_px, RENDER_RESOLUTION_MAX)
+        if render.resolution_y != min(layout.height_px, RENDER_RESOLUTION_MAX):
+            render.resolution_y = min(layout.height_px, RENDER_RESOLUTION_MAX)
 
-        row.prop(ps, "unit_from")
-        row1.prop(ps, "orientation")
-        row2.prop(ps, "preset")
 
-        col.separator()
-        row3.prop(ps, "width_cm")
-        row3.separator()
-        row3.prop(ps, "height_cm")
-        col.separator()
-        row4.prop(ps, "dpi")
-        col.separator()
-        row5.prop(ps, "width_px")
-        row5.separator()
-        row5.prop(ps, "height_px")
 
-        col.separator()
-        row6.label(text="Inch Width: %.2f" % (ps.width_cm / in_TO_cm))
-        row6.label(text="Inch Height: %.2f" % (ps.height_cm / in_TO_cm))
-        col.separator()
+#
+# Applies the print settings to the render settings and the camera.
+#
+@profiled('apply_print_settings')
+def apply_print_settings(context, ps=None, layout=None):
+    if not ps:
+        ps = context.scene.print_settings
+    if not layout:
+        layout = solve_print_layout(**read_print_inputs(context, ps))
 
-        #split = row7.split()
-        #row = split.row()
-        row71 = row7
-        row71.active = True
-        row71.prop(ps, "update_manually")
-        #row = split.row()
-        if ps.update_manually:
-        #    row.active = True
-        #else:
-        #    row.active = False
-            row71.operator("render.apply_print_settings", icon="RENDER_STILL")
+    write_print_layout(context, ps, layout, to_render=True)
 
-        # Hide UI elements when logic demands it:
-        tipo = paper_presets_data[ps.preset][0]
+    print2scale(ps, context, layout)
 
-        if tipo != "custom":
-            #ps.unit_from = 'CM_TO_PIXELS' TODO
-            row.active = False
-            row.enabled = False
+    return {'FINISHED'}
 
-        if ps.unit_from == "CM_TO_PIXELS":
-            row5.active = False
-            row5.enabled = False
 
-            if tipo == "custom":
-                row3.active = True
-                row3.enabled = True
-                row1.active = False
-                row1.enabled = False
-            elif tipo != "custom" and ps.orientation == "Landscape":
-                row3.active = False
-                row3.enabled = False
-                row1.active = True
-                row1.enabled = True
-            elif tipo != "custom" and ps.orientation == "Portrait":
-                row3.active = False
-                row3.enabled = False
-                row1.active = True
-                row1.enabled = True
+
+#
+# RENDER PREFLIGHT
+#
+# Estimates the memory and time a render takes before the render resolution is set, so an accidentally
+# huge print (e.g. a typo in the dpi on a B0 sheet) is refused instead of exhausting a render node's memory.
+#
+# The memory is that of the float render buffers of the enabled passes (held twice, by the render engine
+# and the render result), the display buffers and the output image of the chosen color depth. The time
+# is proportional to the pixels, the samples and the scene complexity (triangles). Its factor is
+# calibrated by completed renders, thus the estimate improves once a scene has been rendered. Each
+# measurement is blended into the factor (exponential moving average), so one unusual render doesn't
+# throw it off. Tiles, regions, border renders and small renders are dominated by the fixed cost of a
+# render (e.g. building the BVH) and thus not measured.
+#
+
+# Channels of the render passes besides the combined pass, by view layer setting:
+RENDER_PASS_CHANNELS = (
+        ('use_pass_z', 1), ('use_pass_mist', 1), ('use_pass_normal', 3), ('use_pass_vector', 4),
+        ('use_pass_uv', 3), ('use_pass_object_index', 1), ('use_pass_material_index', 1),
+        ('use_pass_diffuse_direct', 3), ('use_pass_diffuse_indirect', 3), ('use_pass_diffuse_color', 3),
+        ('use_pass_glossy_direct', 3), ('use_pass_glossy_indirect', 3), ('use_pass_glossy_color', 3),
+        ('use_pass_transmission_direct', 3), ('use_pass_transmission_indirect', 3), ('use_pass_transmission_color', 3),
+        ('use_pass_subsurface_direct', 3), ('use_pass_subsurface_indirect', 3), ('use_pass_subsurface_color', 3),
+        ('use_pass_emit', 3), ('use_pass_environment', 3), ('use_pass_shadow', 3), ('use_pass_ambient_occlusion', 3),
+        )
+
+# The scene complexity at which the render time per sample doubles:
+PREFLIGHT_TRIANGLES_REFERENCE = 1000000
+
+# Renders with fewer pixels don't calibrate the time factor:
+PREFLIGHT_CALIBRATION_MIN_PIXELS = 1000000
+# Weight of a render's measured time factor against the previous one:
+PREFLIGHT_CALIBRATION_WEIGHT = .3
+
+RenderPreflight = namedtuple('RenderPreflight', (
+        'width_px', 'height_px',
+        'memory_bytes', 'time_s',
+        'samples', 'triangles',
+        'status', # 'OK', 'WARNING' (above the budgets) or 'REFUSED' (above the memory limit)
+        'message',
+        ))
+
+
+
+def render_bytes_per_pixel(scene, view_layer=None):
+    if view_layer is None:
+        view_layer = scene.view_layers[0]
+    channels = 4 + sum(count for name, count in RENDER_PASS_CHANNELS if getattr(view_layer, name, False))
+    # Float buffers of the engine and the render result, 8 bit RGBA display buffer, RGBA output image:
+    color_depth = int(getattr(scene.render.image_settings, 'color_depth', '8') or '8')
+    return channels * 4 * 2 + 4 + 4 * color_depth // 8
+
+
+
+def render_samples(scene):
+    if scene.render.engine == 'CYCLES' and hasattr(scene, 'cycles'):
+        return scene.cycles.samples
+    if scene.render.engine in ('BLENDER_EEVEE', 'BLENDER_EEVEE_NEXT') and hasattr(scene, 'eevee'):
+        return scene.eevee.taa_render_samples
+    return 1
+
+
+
+#
+# The triangles of the scene as counted by blender's scene statistics ("... | Tris:1,234 | ..."), 0 if unknown.
+#
+def scene_triangles(scene, view_layer=None):
+    import re
+
+    if view_layer is None:
+        view_layer = scene.view_layers[0]
+    try:
+        match = re.search(r"Tris:\s*([\d,.' ]+)", scene.statistics(view_layer))
+    except (AttributeError, RuntimeError, TypeError):
+        return 0
+    if not match:
+        return 0
+    return int(re.sub(r"\D", "", match.group(1)) or 0)
+
+
+
+#
+# Estimates a render of the scene at the given resolution (defaults to the render resolution), see RENDER PREFLIGHT.
+#
+def render_preflight(scene, width_px=None, height_px=None, triangles=None):
+    ps = scene.print_settings
+    render = scene.render
+    if width_px is None:
+        width_px = render.resolution_x
+    if height_px is None:
+        height_px = render.resolution_y
+    pixels = (width_px * render.resolution_percentage // 100) * (height_px * render.resolution_percentage // 100)
+    samples = render_samples(scene)
+    if triangles is None:
+        triangles = scene_triangles(scene)
+
+    memory_bytes = pixels * render_bytes_per_pixel(scene)
+    time_s = pixels * samples * (1.0 + triangles / PREFLIGHT_TRIANGLES_REFERENCE) * ps.preflight_time_factor * 1e-9
+
+    status = 'OK'
+    messages = []
+    if max(width_px, height_px) > RENDER_RESOLUTION_MAX:
+        status = 'REFUSED'
+        messages.append("%s x %s px above the render resolution limit of %s px" % (width_px, height_px, RENDER_RESOLUTION_MAX))
+    elif ps.preflight_memory_limit and memory_bytes > ps.preflight_memory_limit * 1024 * 1024:
+        status = 'REFUSED'
+        messages.append("%s render memory above the limit of %s" % (format_bytes(memory_bytes),
+                format_bytes(ps.preflight_memory_limit * 1024 * 1024)))
+    elif ps.preflight_memory_budget and memory_bytes > ps.preflight_memory_budget * 1024 * 1024:
+        status = 'WARNING'
+        messages.append("%s render memory above the budget of %s" % (format_bytes(memory_bytes),
+                format_bytes(ps.preflight_memory_budget * 1024 * 1024)))
+    if ps.preflight_time_budget and time_s > ps.preflight_time_budget:
+        if status == 'OK':
+            status = 'WARNING'
+        messages.append("about %s render time above the budget of %s" % (format_duration(time_s),
+                format_duration(ps.preflight_time_budget)))
+
+    return RenderPreflight(
+            width_px=width_px, height_px=height_px,
+            memory_bytes=memory_bytes, time_s=time_s,
+            samples=samples, triangles=triangles,
+            status=status,
+            message=", ".join(messages) or "%s render memory, about %s" % (format_bytes(memory_bytes), format_duration(time_s)),
+            )
+
+
+
+#
+# The highest dpi (within the dpi setting's range) whose render fits into memory_budget bytes
+# (and the render resolution limit), None if not even the lowest does.
+#
+def max_dpi_for_memory(context, ps, memory_budget):
+    scene = context.scene
+    inputs = read_print_inputs(context, ps)
+    bytes_per_pixel = render_bytes_per_pixel(scene)
+    percentage = scene.render.resolution_percentage
+
+    def fits(dpi):
+        layout = solve_print_layout(**dict(inputs, dpi=dpi))
+        if max(layout.width_px, layout.height_px) > RENDER_RESOLUTION_MAX:
+            return False
+        pixels = (layout.width_px * percentage // 100) * (layout.height_px * percentage // 100)
+        return pixels * bytes_per_pixel <= memory_budget
+
+    # The pixels grow with the dpi, thus bisect:
+    low, high = DPI_MIN, DPI_MAX
+    if not fits(low):
+        return None
+    while low < high:
+        middle = (low + high + 1) // 2
+        if fits(middle):
+            low = middle
         else:
-            row3.active = False
-            row3.enabled = False
+            high = middle - 1
+    return low
 
-            if tipo == "custom":
-                row1.active = False
-                row1.enabled = False
-            elif tipo != "custom" and ps.orientation == "Landscape":
-                row1.active = True
-                row1.enabled = True
-                row5.active = False
-                row5.enabled = False
-            elif tipo != "custom" and ps.orientation == "Portrait":
-                row1.active = True
-                row1.enabled = True
-                row5.active = False
-                row5.enabled = False
 
 
-m_TO_cm = 100.0
+def format_bytes(count):
+    for unit in ("B", "KB", "MB", "GB"):
+        if count < 1024:
+            return "%.3g %s" % (count, unit)
+        count /= 1024.0
+    return "%.3g TB" % count
 
-class OBJECT_OT_text_change(Operator):
-    bl_idname = "object.text_change"
-    bl_label = "Change text."
-    bl_description = "Change the text of a text object."
-    bl_options = {'REGISTER', 'UNDO'}
 
-    def execute(self, context):#, text_object, text=""):
-        return change_text(context, text_object=bpy.context.active_object, text=context.scene.name)#<- HACK. TODO Solve properly. Maybe blender could add this as a built-in operator. Or use self.text if possible and reliable?)
 
+def format_duration(seconds):
+    if seconds < 60:
+        return "%.0f s" % seconds
+    if seconds < 3600:
+        return "%.0f min" % (seconds / 60.0)
+    return "%.1f h" % (seconds / 3600.0)
 
 
-class OBJECT_OT_position_within_render(Operator):
-    '''Position within render, e.g. in a corner if margins are set as such. Note that proper results may require the print settings to be applied to the camera, render settings.'''
-    bl_idname = "object.position_within_render"
-    bl_label = "Position within render"
-    bl_description = "Position within render, e.g. in a corner if margins are set as such. Note that proper results may require the print settings to be applied to the camera, render settings."
-    bl_options = {'REGISTER', 'UNDO'}
 
-    def execute(self, context):#, text_object, text=""):
-        #HACK rotation_clear() now fixed it. position_within_render(context)
-        #bpy.ops.render.apply_print_settings() <- some extensions may prefer or require to handle this own their own. Also if the position within render operator is called frequently then not applying the print settings may save performance (this could be mitigated by checking if the settings changed before applying, e.g. comparing render settings' and the print settings' resolution).
-        return position_within_render(context)
+# Calibrates the render time estimate, see RENDER PREFLIGHT:
+render_start = {} # scene name -> start time of its render in progress
+
+
+
+@persistent
+def preflight_render_pre(scene, *args):
+    render_start[scene.name] = time.perf_counter()
+
+
+
+@persistent
+def preflight_render_post(scene, *args):
+    start = render_start.pop(scene.name, None)
+    if start is None:
+        return
+    ps = scene.print_settings
+    render = scene.render
+    if ps.rendering_tiles or render.use_border:
+        return
+    preflight = render_preflight(scene)
+    pixels = (preflight.width_px * render.resolution_percentage // 100) * (preflight.height_px * render.resolution_percentage // 100)
+    if pixels < PREFLIGHT_CALIBRATION_MIN_PIXELS:
+        return
+    work = preflight.time_s / ps.preflight_time_factor
+    if work > 0:
+        measured = (time.perf_counter() - start) / work
+        ps.preflight_time_factor = ((1.0 - PREFLIGHT_CALIBRATION_WEIGHT) * ps.preflight_time_factor
+                + PREFLIGHT_CALIBRATION_WEIGHT * measured)
+
+
+
+#
+# VIEWING DISTANCE
+#
+# A print viewed from a distance needs no more dots than the eye resolves there: at the visual acuity
+# (the smallest angle resolved, 1 arcminute for normal vision) a dot spans distance * tan(acuity).
+# A wall-sized plan viewed from 3 m thus needs about 30 dpi instead of the habitual 300, a hundredth
+# of the pixels. When enabled (print settings' use_viewing_distance), the dpi follows the viewing distance.
+#
+
+# The dpi the savings are stated against:
+VIEWING_DISTANCE_REFERENCE_DPI = 300
+
+
+
+def viewing_distance_dpi(distance_m, acuity_arcmin=1.0):
+    dot_m = distance_m * math.tan(math.radians(acuity_arcmin / 60.0))
+    if dot_m <= 0.0:
+        return DPI_MAX
+    return min(max(int(math.ceil(in_TO_cm / m_TO_cm / dot_m)), DPI_MIN), DPI_MAX)
+
+
+
+def update_viewing_distance_cb(self, context):
+    if not self.use_viewing_distance:
+        return
+    dpi = viewing_distance_dpi(self.viewing_distance, self.visual_acuity)
+    if self.dpi != dpi:
+        self.dpi = dpi # Applied by the dpi's update callback.
+
+
+
+ViewingDistanceSavings = namedtuple('ViewingDistanceSavings', (
+        'dpi', 'reference_dpi',
+        'pixels', 'reference_pixels',
+        'time_s', 'reference_time_s',
+        ))
+
+
+
+#
+# The pixels and render time at the current dpi compared to those at VIEWING_DISTANCE_REFERENCE_DPI.
+#
+def viewing_distance_savings(context, ps):
+    inputs = read_print_inputs(context, ps)
+    triangles = scene_triangles(context.scene)
+    layout = solve_print_layout(**inputs)
+    reference = solve_print_layout(**dict(inputs, dpi=VIEWING_DISTANCE_REFERENCE_DPI))
+    preflight = render_preflight(context.scene, layout.width_px, layout.height_px, triangles)
+    reference_preflight = render_preflight(context.scene, reference.width_px, reference.height_px, triangles)
+    return ViewingDistanceSavings(
+            dpi=ps.dpi, reference_dpi=VIEWING_DISTANCE_REFERENCE_DPI,
+            pixels=layout.width_px * layout.height_px, reference_pixels=reference.width_px * reference.height_px,
+            time_s=preflight.time_s, reference_time_s=reference_preflight.time_s,
+            )
+
+
+
+#
+# CAMERA DRIVERS
+#
+# The update callbacks apply the print settings only when a setting is edited. Keyframed or driven
+# settings (e.g. an animated scale factor) or a changed unit scale thus are not applied during playback or
+# when rendering an animation in background mode. Optionally (print settings' use_drivers), drivers are
+# installed on the camera's orthographic scale and delta location and on the render resolution instead,
+# which blender evaluates natively per frame: each calls print_layout_driver() (registered in the driver
+# namespace) with the print settings as driver variables, so the depsgraph knows the dependencies.
+#
+# Python drivers require the blend file to be trusted (auto run python scripts) and the addon enabled.
+# The solved camera parameters and resolution are the same as in solve_print_layout(), the margins in
+# percent relate to the pixel settings (i.e. the resolution as of the last apply).
+#
+DRIVER_FUNCTION = "print_layout_driver"
+
+# Driver variable name -> print setting (relative to the scene):
+DRIVER_VARIABLES = (
+        ('p', 'print_settings.preset'),
+        ('o', 'print_settings.orientation'),
+        ('u', 'print_settings.unit_from'),
+        ('d', 'print_settings.dpi'),
+        ('w', 'print_settings.width_cm'),
+        ('h', 'print_settings.height_cm'),
+        ('x', 'print_settings.width_px'),
+        ('y', 'print_settings.height_px'),
+        ('m', 'print_settings.use_margins'),
+        ('t', 'print_settings.margin_top'),
+        ('r', 'print_settings.margin_right'),
+        ('b', 'print_settings.margin_bottom'),
+        ('l', 'print_settings.margin_left'),
+        ('s', 'print_settings.scale_factor'),
+        ('k', 'unit_settings.scale_length'),
+        )
+
+# Driven property (relative to the ID, data path and index) -> PrintLayout output:
+CAMERA_DRIVERS = (
+        ('data', 'ortho_scale', -1, 'ortho_scale'),
+        ('object', 'delta_location', 0, 'camera_delta_x'),
+        ('object', 'delta_location', 1, 'camera_delta_y'),
+        )
+RENDER_DRIVERS = (
+        ('render.resolution_x', -1, 'width_px'),
+        ('render.resolution_y', -1, 'height_px'),
+        )
+
+
+
+#
+# Driver namespace function, enums are passed as their item's index (like driver variables do).
+#
+@functools.lru_cache(maxsize=64)
+def print_layout_driver(output, p, o, u, d, w, h, x, y, m, t, r, b, l, s, k):
+    layout = solve_print_layout(
+            preset=paper_presets[int(p)][0],
+            orientation=("Portrait", "Landscape")[int(o)],
+            unit_from=("CM_TO_PIXELS", "PIXELS_TO_CM")[int(u)],
+            dpi=int(d), width_cm=w, height_cm=h, width_px=int(x), height_px=int(y),
+            use_margins=bool(m), margin_top=t, margin_right=r, margin_bottom=b, margin_left=l,
+            scale_factor=s, scale_length=k,
+            )
+    value = getattr(layout, output)
+    if value is None: # The camera offset without margins.
+        return 0.0
+    if output in ('width_px', 'height_px'):
+        return min(value, RENDER_RESOLUTION_MAX)
+    return value
+
+
+
+def register_driver_namespace():
+    bpy.app.driver_namespace[DRIVER_FUNCTION] = print_layout_driver
+
+
+
+def add_print_layout_driver(id, data_path, index, output, scene):
+    fcurve = id.driver_add(data_path, index)
+    driver = fcurve.driver
+    driver.type = 'SCRIPTED'
+    for variable in list(driver.variables):
+        driver.variables.remove(variable)
+    for name, setting in DRIVER_VARIABLES:
+        variable = driver.variables.new()
+        variable.name = name
+        variable.type = 'SINGLE_PROP'
+        variable.targets[0].id_type = 'SCENE'
+        variable.targets[0].id = scene
+        variable.targets[0].data_path = setting
+    driver.expression = "%s('%s',%s)" % (DRIVER_FUNCTION, output, ",".join(name for name, setting in DRIVER_VARIABLES))
+    return fcurve
+
+
+
+#
+# Installs the drivers on the scene's camera (made orthographic) and render resolution.
+#
+def install_print_drivers(scene):
+    register_driver_namespace()
+    camera = scene.camera
+    if camera and camera.type == 'CAMERA':
+        camera.data.type = 'ORTHO'
+        for owner, data_path, index, output in CAMERA_DRIVERS:
+            add_print_layout_driver(camera.data if owner == 'data' else camera, data_path, index, output, scene)
+    for data_path, index, output in RENDER_DRIVERS:
+        add_print_layout_driver(scene, data_path, index, output, scene)
+    log.info("Installed the print layout drivers of scene %s.", scene.name)
+
+
+
+#
+# Removes the drivers installed by install_print_drivers() (others on the same properties are left alone).
+#
+def remove_print_drivers(scene):
+    def is_print_driver(id, data_path, index):
+        animation_data = id.animation_data
+        if not animation_data:
+            return False
+        for fcurve in animation_data.drivers:
+            if fcurve.data_path == data_path and index in (-1, fcurve.array_index):
+                return DRIVER_FUNCTION in fcurve.driver.expression
+        return False
+
+    camera = scene.camera
+    if camera and camera.type == 'CAMERA':
+        for owner, data_path, index, output in CAMERA_DRIVERS:
+            id = camera.data if owner == 'data' else camera
+            if is_print_driver(id, data_path, index):
+                id.driver_remove(data_path, index)
+    for data_path, index, output in RENDER_DRIVERS:
+        if is_print_driver(scene, data_path, index):
+            scene.driver_remove(data_path, index)
+
+
+
+#
+# The F-curves of the drivers installed by install_print_drivers().
+#
+def print_driver_fcurves(scene):
+    ids = [scene]
+    camera = scene.camera
+    if camera and camera.type == 'CAMERA':
+        ids += [camera, camera.data]
+    return [fcurve for id in ids if id.animation_data for fcurve in id.animation_data.drivers
+            if DRIVER_FUNCTION in fcurve.driver.expression]
+
+
+
+#
+# Mutes the print layout drivers within the block, e.g. while tiles are rendered with their own
+# resolution and camera (the drivers would set those of the whole print again before each render).
+#
+@contextmanager
+def print_drivers_muted(scene):
+    fcurves = [fcurve for fcurve in print_driver_fcurves(scene) if not fcurve.mute]
+    for fcurve in fcurves:
+        fcurve.mute = True
+    try:
+        yield
+    finally:
+        for fcurve in fcurves:
+            fcurve.mute = False
+
+
+
+def update_drivers_cb(self, context):
+    if self.use_drivers:
+        install_print_drivers(self.id_data)
+    else:
+        remove_print_drivers(self.id_data)
+
+
+
+
+#
+# The result of solve_print_layouts(): one numpy array per field, all of the same (broadcast) shape.
+#
+PrintLayouts = namedtuple('PrintLayouts', (
+        'width_cm', 'height_cm',
+        'width_px', 'height_px',
+        'ortho_scale',
+        'printable_width_m', 'printable_height_m', 'printable_area_m2',
+        ))
+
+
+
+#
+# Vectorized counterpart of solve_print_layout() for paper presets, e.g. for quotation tables
+# covering many presets, orientations, dpi values and scales. Any of the arguments may be a
+# scalar or an array, they are broadcast against each other (see print_layout_sweep() for all
+# combinations).
+#
+# Uses the same formulas as m_to_pixels() and solve_print_layout(). Margins are absolute (meters)
+# and clamped to the paper size, as there is no render resolution relative margins could refer to.
+#
+def solve_print_layouts(presets, orientations="Portrait", dpis=300, scale_factors=1.0,
+        margin_top=.015, margin_right=.015, margin_bottom=.015, margin_left=.015,
+        use_margins=True, scale_length=1.0):
+    import numpy as np
+
+    # Look up each distinct preset only once:
+    preset_ids, preset_index = np.unique(np.asarray(presets), return_inverse=True)
+    dims = np.empty((len(preset_ids), 2))
+    for i, idname in enumerate(preset_ids):
+        tipo, dim_w, dim_h = paper_presets_data[idname]
+        if tipo == "custom":
+            raise ValueError("Preset %s has no paper dimensions." % idname)
+        dims[i] = dim_w, dim_h
+    preset_index = preset_index.reshape(np.shape(presets))
+    dim_w = dims[preset_index, 0]
+    dim_h = dims[preset_index, 1]
+
+    landscape = np.asarray(orientations) == "Landscape"
+    dpis = np.asarray(dpis, dtype=float)
+    scale_factors = np.asarray(scale_factors, dtype=float)
+    width_cm, height_cm, dpis, scale_factors = np.broadcast_arrays(
+            np.where(landscape, dim_h, dim_w),
+            np.where(landscape, dim_w, dim_h),
+            dpis, scale_factors)
+
+    width_m = width_cm / m_TO_cm
+    height_m = height_cm / m_TO_cm
+    if use_margins:
+        margin_left = np.minimum(margin_left, width_m - np.asarray(margin_right))
+        margin_right = np.minimum(margin_right, width_m - margin_left)
+        margin_top = np.minimum(margin_top, height_m - np.asarray(margin_bottom))
+        margin_bottom = np.minimum(margin_bottom, height_m - margin_top)
+    else:
+        margin_top = margin_right = margin_bottom = margin_left = 0.0
+
+    inner_width_m = width_m - margin_left - margin_right
+    inner_height_m = height_m - margin_top - margin_bottom
+    width_px = np.maximum(np.round(inner_width_m * m_TO_cm / in_TO_cm * dpis), 4).astype(np.int64)
+    height_px = np.maximum(np.round(inner_height_m * m_TO_cm / in_TO_cm * dpis), 4).astype(np.int64)
+
+    longer_side = np.where(width_cm > height_cm, inner_width_m, inner_height_m)
+    ortho_scale = (longer_side / scale_length) / scale_factors
+
+    printable_width_m = width_px / dpis * in_TO_cm / m_TO_cm
+    printable_height_m = height_px / dpis * in_TO_cm / m_TO_cm
+
+    return PrintLayouts(
+            width_cm=width_cm, height_cm=height_cm,
+            width_px=width_px, height_px=height_px,
+            ortho_scale=ortho_scale,
+            printable_width_m=printable_width_m,
+            printable_height_m=printable_height_m,
+            printable_area_m2=printable_width_m * printable_height_m,
+            )
+
+
+
+#
+# Evaluates every combination of the given presets (defaults to all paper presets), orientations,
+# dpi values and scale factors at once.
+#
+# Returns the flattened input columns (presets, orientations, dpis, scale_factors) and the PrintLayouts.
+#
+def print_layout_sweep(presets=None, orientations=("Portrait", "Landscape"), dpis=(300,), scale_factors=(1.0,), **kwargs):
+    import numpy as np
+
+    if presets is None:
+        presets = sorted(idname for idname, (tipo, dim_w, dim_h) in paper_presets_data.items() if tipo != "custom")
+    grid = np.meshgrid(np.asarray(presets), np.asarray(orientations),
+            np.asarray(dpis, dtype=float), np.asarray(scale_factors, dtype=float), indexing='ij')
+    presets, orientations, dpis, scale_factors = (column.ravel() for column in grid)
+    layouts = solve_print_layouts(presets, orientations, dpis, scale_factors, **kwargs)
+    return (presets, orientations, dpis, scale_factors), layouts
+
+
+
+#
+# BEST FIT
+#
+# Finds the paper presets, orientations and standard scales a model fits on, given its extents as
+# seen by the camera. The printable area of every preset and orientation only depends on the dpi
+# and the margins, thus it is computed once into an index (sorted by paper area) with numpy columns.
+# A query then derives the largest scale each sheet allows and looks up the largest standard scale not
+# exceeding it by bisection (searchsorted), for all sheets at once. As every sheet may fit, a query can't
+# skip sheets, but there is no python loop over them; most of its time goes into building the fits returned.
+#
+
+# Standard drawing scales 1:1 .. 1:5000 (denominators):
+STANDARD_SCALES = (1, 2, 5, 10, 20, 25, 50, 100, 200, 250, 500, 1000, 1250, 2000, 2500, 5000)
+
+# The standard scale factors, ascending for bisection:
+standard_scale_factors = tuple(sorted(1.0 / denominator for denominator in STANDARD_SCALES))
+
+#
+# A sheet a model fits on. The fill is the fraction of the printable width and height the printed
+# model takes up at most (1 = touching the margins).
+#
+PrintFit = namedtuple('PrintFit', (
+        'preset', 'orientation', 'scale_factor',
+        'width_cm', 'height_cm',
+        'fill',
+        ))
+
+
+
+#
+# The index of all paper presets in both orientations with their printable width and height (in
+# meters as printed, as resulting from the rounding to pixels), sorted by paper area.
+#
+# Relative margins (>= 1, percent) refer to the paper's width or height here. The sheets are solved by
+# solve_print_layouts(), i.e. the margins are clamped to the paper like a render of the whole sheet does.
+#
+@functools.lru_cache(maxsize=16)
+def print_fit_index(dpi=300, use_margins=True, margin_top=.015, margin_right=.015, margin_bottom=.015, margin_left=.015):
+    sheets = [(idname, orientation, width_cm, height_cm)
+            for idname, (tipo, dim_w, dim_h) in paper_presets_data.items() if tipo != "custom"
+            for orientation, width_cm, height_cm in (("Portrait", dim_w, dim_h), ("Landscape", dim_h, dim_w))]
+    layouts = solve_print_layouts(
+            [idname for idname, orientation, width_cm, height_cm in sheets],
+            [orientation for idname, orientation, width_cm, height_cm in sheets],
+            dpis=dpi, use_margins=use_margins,
+            margin_top=[rel_to_abs_m(margin_top, height_cm / m_TO_cm) for idname, orientation, width_cm, height_cm in sheets],
+            margin_right=[rel_to_abs_m(margin_right, width_cm / m_TO_cm) for idname, orientation, width_cm, height_cm in sheets],
+            margin_bottom=[rel_to_abs_m(margin_bottom, height_cm / m_TO_cm) for idname, orientation, width_cm, height_cm in sheets],
+            margin_left=[rel_to_abs_m(margin_left, width_cm / m_TO_cm) for idname, orientation, width_cm, height_cm in sheets])
+    index = [(width_cm * height_cm, idname, orientation, width_cm, height_cm, float(printable_width_m), float(printable_height_m))
+            for (idname, orientation, width_cm, height_cm), printable_width_m, printable_height_m
+            in zip(sheets, layouts.printable_width_m, layouts.printable_height_m)]
+    return tuple(sorted(index))
+
+
+
+#
+# Ranks the sheets a model of the given extents (model units along the camera's x and y axes) fits on:
+# the smallest sheet first and for each sheet the largest standard scale it allows. Scale factors below
+# min_scale_factor are ruled out. Returns a list of PrintFit.
+#
+# The extents are assumed to be centered in the camera's view, see fit_print_to_objects().
+#
+def find_print_fits(extent_x, extent_y, scale_length=1.0, min_scale_factor=0.0, scale_factors=standard_scale_factors, **index_kwargs):
+    import numpy as np
+
+    index, area, printable_width_m, printable_height_m = print_fit_columns(**index_kwargs)
+    factors = scale_factor_column(tuple(scale_factors))
+    # The largest scale factor each sheet allows, printed size = extent * scale_length * scale_factor:
+    scale_max = np.minimum(printable_width_m / (extent_x * scale_length) if extent_x > 0 else np.inf,
+            printable_height_m / (extent_y * scale_length) if extent_y > 0 else np.inf)
+    # Tolerate rounding, e.g. for a model that fits exactly:
+    i = np.searchsorted(factors, scale_max * (1.0 + 1e-9), side='right') - 1
+    fitting = i >= 0
+    scale_factor = factors[np.maximum(i, 0)]
+    fitting &= scale_factor >= min_scale_factor
+    fill = np.maximum(extent_x * scale_length * scale_factor / printable_width_m,
+            extent_y * scale_length * scale_factor / printable_height_m)
+    # Smallest sheet first, then the largest scale and fill:
+    order = np.lexsort((-fill, -scale_factor, area))
+    scale_factor, fill = scale_factor.tolist(), fill.tolist()
+    return [PrintFit(index[k][1], index[k][2], scale_factor[k], index[k][3], index[k][4], fill[k])
+            for k in order[fitting[order]].tolist()]
+
+
+
+#
+# The print fit index along with its numeric columns (area, printable width and height) as numpy arrays.
+#
+@functools.lru_cache(maxsize=16)
+def print_fit_columns(**index_kwargs):
+    import numpy as np
+
+    index = print_fit_index(**index_kwargs)
+    columns = np.array([(area, printable_width_m, printable_height_m)
+            for area, idname, orientation, width_cm, height_cm, printable_width_m, printable_height_m in index])
+    return index, columns[:, 0], columns[:, 1], columns[:, 2]
+
+
+
+@functools.lru_cache(maxsize=16)
+def scale_factor_column(scale_factors):
+    import numpy as np
+
+    return np.array(scale_factors, dtype=float)
+
+
+
+#
+# CAMERA SPACE BOUNDS
+#
+# The exact extents of objects as seen by the scene's (orthographic) camera, from their evaluated vertices
+# instead of the coarser bounding boxes. The vertex coordinates are read with foreach_get into a numpy
+# array and transformed into the camera's frame with one matrix multiply per object (in chunks of at most
+# BOUNDS_CHUNK_VERTICES, so memory stays bounded for huge meshes). Only the rotation and scale part is
+# applied per vertex, the translation is added to the resulting bounds.
+#
+# The bounds are cached per object, keyed by its geometry version (incremented by a depsgraph handler
+# whenever its evaluated geometry changed) and its transform into the camera's frame. So repeated queries
+# (fitting, centering, checking the coverage) read each unchanged object's vertices only once. As Blender
+# reuses the memory of removed objects, an entry is only valid for the same object and data names and data
+# pointer (see object_identity()).
+#
+BOUNDS_CHUNK_VERTICES = 1 << 20
+
+bounds_cache = {} # object pointer -> ((identity, geometry version), transform, bounds)
+geometry_versions = {} # object pointer -> number of evaluated geometry changes
+
+
+
+#
+# The evaluated vertex coordinates of an object as (n, 3) float32 array,
+# or None for objects without geometry (e.g. empties, cameras, lights).
+#
+def object_vertex_coordinates(obj_eval):
+    import numpy as np
+
+    if obj_eval.type == 'MESH':
+        vertices = obj_eval.data.vertices
+        co = np.empty(len(vertices) * 3, dtype=np.float32)
+        vertices.foreach_get("co", co)
+        return co.reshape(-1, 3)
+
+    if obj_eval.type in ('CURVE', 'SURFACE', 'FONT', 'META'):
+        mesh = obj_eval.to_mesh()
+        try:
+            if mesh is None:
+                return None
+            co = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+            mesh.vertices.foreach_get("co", co)
+        finally:
+            obj_eval.to_mesh_clear()
+        return co.reshape(-1, 3)
+
+    return None
+
+
+
+#
+# The (min, max) bounds (numpy arrays) of coordinates transformed by a 4x4 matrix (numpy array).
+#
+def transformed_bounds(co, matrix):
+    import numpy as np
+
+    rotation_scale = matrix[:3, :3].T
+    bound_min = np.full(3, np.inf)
+    bound_max = np.full(3, -np.inf)
+    for start in range(0, len(co), BOUNDS_CHUNK_VERTICES):
+        chunk = co[start:start + BOUNDS_CHUNK_VERTICES] @ rotation_scale
+        np.minimum(bound_min, chunk.min(axis=0), out=bound_min)
+        np.maximum(bound_max, chunk.max(axis=0), out=bound_max)
+    return bound_min + matrix[:3, 3], bound_max + matrix[:3, 3]
+
+
+
+#
+# What tells an object apart from another one later allocated at the same pointer.
+#
+def object_identity(obj):
+    data = obj.data
+    return (obj.name, data.name, data.as_pointer()) if data else (obj.name, None, 0)
+
+
+
+#
+# An object's bounds in the frame given by the to_camera matrix (inverted camera world matrix),
+# None if it has no geometry.
+#
+def object_camera_bounds(obj, depsgraph, to_camera):
+    import numpy as np
+
+    obj_eval = obj.evaluated_get(depsgraph)
+    matrix = np.array(to_camera @ obj_eval.matrix_world, dtype=np.float64)
+    key = obj.as_pointer()
+    version = (object_identity(obj), geometry_versions.get(key, 0))
+    cached = bounds_cache.get(key)
+    if cached and cached[0] == version and np.array_equal(cached[1], matrix):
+        return cached[2]
+
+    co = object_vertex_coordinates(obj_eval)
+    bounds = transformed_bounds(co, matrix) if co is not None and len(co) else None
+    bounds_cache[key] = (version, matrix, bounds)
+    return bounds
+
+
+
+#
+# The bounds of objects in the camera's frame (model units), see CAMERA SPACE BOUNDS.
+# Returns the (min, max) corners or None if none of the objects has geometry.
+#
+def camera_space_bounds(context, objects, depsgraph=None):
+    import numpy as np
+    from mathutils import Vector
+
+    if depsgraph is None:
+        depsgraph = context.evaluated_depsgraph_get()
+    to_camera = context.scene.camera.matrix_world.inverted()
+    bounds = [b for b in (object_camera_bounds(obj, depsgraph, to_camera) for obj in objects) if b is not None]
+    if not bounds:
+        return None
+    return (Vector(np.min([b[0] for b in bounds], axis=0)),
+            Vector(np.max([b[1] for b in bounds], axis=0)))
+
+
+
+@persistent
+def bounds_depsgraph_update(scene, depsgraph=None):
+    if depsgraph is None:
+        return
+    for update in depsgraph.updates:
+        if update.is_updated_geometry and isinstance(update.id, Object):
+            key = update.id.original.as_pointer()
+            geometry_versions[key] = geometry_versions.get(key, 0) + 1
+
+
+
+# Undo and loading files reallocate the objects:
+@persistent
+def bounds_load_post(*args):
+    bounds_cache.clear()
+    geometry_versions.clear()
+
+
+
+#
+# Moves the scene's camera along its own x and y axes such that the objects' bounds are centered in its
+# view (taking the camera's shift into account). Returns the offset in the camera's frame, None if there
+# is nothing to center on.
+#
+def center_camera_on_objects(context, objects, depsgraph=None):
+    from mathutils import Vector
+
+    find_or_create_camera_and_assign(context)
+    bounds = camera_space_bounds(context, objects, depsgraph)
+    if bounds is None:
+        return None
+    camera = context.scene.camera
+    center = (bounds[0] + bounds[1]) / 2.0
+    offset = Vector((center[0] - camera.data.shift_x * camera.data.ortho_scale,
+            center[1] - camera.data.shift_y * camera.data.ortho_scale, 0.0))
+    world_offset = camera.matrix_world.to_3x3() @ offset
+    if camera.parent:
+        world_offset = (camera.parent.matrix_world @ camera.matrix_parent_inverse).inverted().to_3x3() @ world_offset
+    camera.location = camera.location + world_offset
+    return offset
+
+
+
+#
+# How much of the objects the scene's camera covers with its orthographic scale (default sensor fit, i.e.
+# the orthographic scale spans the larger render dimension). The overflow is the largest distance (model
+# units) the objects reach beyond the view, zero if they are covered.
+#
+PrintCoverage = namedtuple('PrintCoverage', (
+        'covered',
+        'view_width', 'view_height',
+        'bounds_width', 'bounds_height',
+        'overflow',
+        ))
+
+
+
+def ortho_coverage(context, objects, depsgraph=None):
+    scene = context.scene
+    bounds = camera_space_bounds(context, objects, depsgraph)
+    if bounds is None:
+        return None
+    camera_data = scene.camera.data
+    render = scene.render
+    longer_side = max(render.resolution_x, render.resolution_y)
+    view_width = camera_data.ortho_scale * render.resolution_x / longer_side
+    view_height = camera_data.ortho_scale * render.resolution_y / longer_side
+    view_x = camera_data.shift_x * camera_data.ortho_scale
+    view_y = camera_data.shift_y * camera_data.ortho_scale
+    overflow = max(0.0,
+            view_x - view_width / 2.0 - bounds[0][0], bounds[1][0] - view_x - view_width / 2.0,
+            view_y - view_height / 2.0 - bounds[0][1], bounds[1][1] - view_y - view_height / 2.0)
+    return PrintCoverage(
+            covered=overflow == 0.0,
+            view_width=view_width, view_height=view_height,
+            bounds_width=bounds[1][0] - bounds[0][0], bounds_height=bounds[1][1] - bounds[0][1],
+            overflow=overflow,
+            )
+
+
+
+#
+# Finds the best fits for objects as seen by the scene's camera, using the scene's print settings'
+# dpi and margins.
+#
+def fit_print_to_objects(context, objects, min_scale_factor=0.0):
+    ps = context.scene.print_settings
+    find_or_create_camera_and_assign(context)
+    bounds = camera_space_bounds(context, objects)
+    if bounds is None:
+        return []
+    extents = bounds[1] - bounds[0]
+    return find_print_fits(extents[0], extents[1], context.scene.unit_settings.scale_length, min_scale_factor,
+            dpi=ps.dpi, use_margins=ps.use_margins, margin_top=ps.margin_top, margin_right=ps.margin_right,
+            margin_bottom=ps.margin_bottom, margin_left=ps.margin_left)
+
+
+
+#
+# Writes a PrintFit to the print settings at once, see print_settings_update().
+#
+def apply_print_fit(context, fit):
+    with print_settings_update(context.scene, context=context) as ps:
+        ps.preset = fit.preset
+        ps.orientation = fit.orientation
+        ps.scale_factor = fit.scale_factor
+
+
+
+#
+# The panel's render preflight of the solved layout and (with use_viewing_distance) the viewing distance
+# savings, as (preflight, savings or None). The panel is redrawn far more often than anything changes, thus
+# both are kept per scene, keyed by the print layout's fingerprint (the stored one while the layout is in
+# sync, see PRINT LAYOUT CACHE) and the estimate's settings. Changes to the render settings, the camera or
+# the geometry (triangles) drop them, see print_panel_depsgraph_update().
+#
+def print_panel_estimates(context, ps):
+    scene = context.scene
+    key = (ps.layout_fingerprint or print_layout_fingerprint(context, ps), ps.use_viewing_distance,
+            ps.preflight_memory_budget, ps.preflight_memory_limit, ps.preflight_time_budget, ps.preflight_time_factor)
+    cached = ps.panel_estimates
+    if cached and cached[0] == key:
+        return cached[1]
+
+    # The pixel settings are clamped to the render resolution limit, the solved layout is not:
+    print_layout = solve_print_layout(**read_print_inputs(context, ps))
+    preflight = render_preflight(scene, print_layout.width_px, print_layout.height_px)
+    savings = viewing_distance_savings(context, ps) if ps.use_viewing_distance else None
+    ps.panel_estimates = (key, (preflight, savings))
+    return preflight, savings
+
+
+
+@persistent
+def print_panel_depsgraph_update(scene, depsgraph=None):
+    ps = scene.print_settings
+    if not ps.panel_estimates:
+        return
+    if (depsgraph is None or depsgraph.id_type_updated('SCENE') or depsgraph.id_type_updated('CAMERA')
+            or any(update.is_updated_geometry for update in depsgraph.updates)):
+        ps.panel_estimates = None
+
+
+
+class RENDER_PT_print(Panel):
+    bl_idname = "OBJECT_PT_print_panel"
+    bl_label = "Print"
+    bl_space_type = 'VIEW_3D'
+    bl_region_type = 'UI'
+    bl_category = 'Print'
+
+    def draw(self, context):
+
+        layout = self.layout
+        scene = context.scene
+        ps = scene.print_settings
+
+
+        #PRINT2SCALE
+        row00 = layout.row(align=True)
+        text = "Print to scale "
+        text = text + convertScaleFactorToRatioString(ps.scale_factor)
+
+        row00.prop(ps, "print_to_scale", text=text)
+
+        row = layout.row(align=True)
+        row.active = ps.print_to_scale
+        row.prop(ps, "scale_factor", text="Scale factor")
+
+        row = layout.row(align=True)
+        row.active = ps.print_to_scale
+        row.operator("render.fit_print_to_selection", icon="FULLSCREEN_ENTER")
+        row.prop(ps, "fit_min_scale", text="")
+
+        row = layout.row(align=True)
+        row.operator("render.center_camera_on_selection", icon="PIVOT_BOUNDBOX")
+        row.operator("render.check_print_coverage", icon="VIEWZOOM")
+
+        row = layout.row(align=True)
+        row.active = ps.print_to_scale
+        row.prop(ps, "add_scale_ratio_text", text="Add scale ratio text")
+
+        row = layout.row(align=True)
+        row.active = ps.print_to_scale
+        row.prop(ps, "text_height", text="Text height")
+
+        row = layout.row(align=True)
+        row.active = ps.print_to_scale
+        #row.label(text="Positioning margins:")
+        row.operator("object.position_within_render")#, icon="",
+        row.prop(ps, "margin_left_right", text="Margin left, right.")
+        row.prop(ps, "margin_top_bottom", text="Margin top, bottom.")
+        #PRINT2SCALE -END
+
+        #GENERAL PRINT SETTINGS
+        # Not needed directly by render to print, nevertheless located in print settings for single source principle, may be used by various extensions that require margin information:
+        row = layout.row(align=True)
+        row.prop(ps, "use_margins", text="")
+        row.prop(ps, "margin_top", text="Top margin")
+        row.prop(ps, "margin_right", text="Right margin")
+        row.prop(ps, "margin_bottom", text="Bottom margin")
+        row.prop(ps, "margin_left", text="Left margin")
+        row.active = ps.use_margins
+
+        row = layout.row(align=True)
+        row1 = layout.row(align=True)
+        row2 = layout.row(align=True)
+        row3 = layout.row(align=True)
+        row4 = layout.row(align=True)
+        row12 = layout.row(align=True)
+        row5 = layout.row(align=True)
+        row13 = layout.row(align=True)
+        row6 = layout.row(align=True)
+        row7 = layout.row(align=True)
+        col = layout.column(align=True)
+
+        row.prop(ps, "unit_from")
+        row1.prop(ps, "orientation")
+        row2.prop(ps, "preset")
+
+        col.separator()
+        row3.prop(ps, "width_cm")
+        row3.separator()
+        row3.prop(ps, "height_cm")
+        col.separator()
+        row4.prop(ps, "dpi")
+        row4.enabled = not ps.use_viewing_distance
+        row12.prop(ps, "use_viewing_distance", text="")
+        row12.prop(ps, "viewing_distance")
+        row12.prop(ps, "visual_acuity", text="Acuity")
+        col.separator()
+        row5.prop(ps, "width_px")
+        row5.separator()
+        row5.prop(ps, "height_px")
+        preflight, savings = print_panel_estimates(context, ps)
+        if savings:
+            if savings.pixels < savings.reference_pixels:
+                row13.label(text="%s dpi: %.0f%% fewer pixels, %s less render time than at %s dpi" % (
+                        savings.dpi, 100.0 * (1.0 - savings.pixels / savings.reference_pixels),
+                        format_duration(savings.reference_time_s - savings.time_s), savings.reference_dpi))
+
+        col.separator()
+        row6.label(text="Inch Width: %.2f" % (ps.width_cm / in_TO_cm))
+        row6.label(text="Inch Height: %.2f" % (ps.height_cm / in_TO_cm))
+        col.separator()
+
+        #split = row7.split()
+        #row = split.row()
+        row71 = row7
+        row71.active = True
+        row71.prop(ps, "update_manually")
+        row71.prop(ps, "update_delay", text="Delay")
+        row71.prop(ps, "use_drivers")
+        #row = split.row()
+        if ps.update_manually:
+        #    row.active = True
+        #else:
+        #    row.active = False
+            row71.operator("render.apply_print_settings", icon="RENDER_STILL")
+
+        row10 = layout.row(align=True)
+        row10.alert = preflight.status != 'OK'
+        row10.label(text="%s x %s px: %s" % (preflight.width_px, preflight.height_px, preflight.message),
+                icon="ERROR" if preflight.status != 'OK' else "INFO")
+        row11 = layout.row(align=True)
+        row11.prop(ps, "preflight_memory_budget", text="Budget MB")
+        row11.prop(ps, "preflight_memory_limit", text="Limit MB")
+        row11.prop(ps, "preflight_time_budget", text="Time s")
+        row11.operator("render.use_max_dpi")
+
+        row16 = layout.row(align=True)
+        row16.prop(ps, "use_render_cache", text="")
+        row16.prop(ps, "render_cache_dir", text="")
+        row16.prop(ps, "render_cache_size_mb", text="MB")
+        row16.prop(ps, "use_region_render", text="", icon="FONT_DATA")
+        row16.operator("render.render_print", icon="RENDER_STILL")
+        row16.operator("render.scene_fingerprint", icon="FILE_REFRESH")
+
+        row8 = layout.row(align=True)
+        row8.prop(ps, "tile_memory_budget", text="Tile MB")
+        row8.prop(ps, "tile_overlap", text="Overlap")
+        row8.operator("render.render_print_tiles", icon="RENDER_RESULT")
+        row9 = layout.row(align=True)
+        row9.prop(ps, "stitch_format", text="")
+        row9.prop(ps, "stitch_depth", text="")
+        row9.active = ps.stitch_format != 'NONE'
+        row14 = layout.row(align=True)
+        row14.prop(ps, "poster_sheet_preset", text="")
+        row14.prop(ps, "poster_sheet_orientation", text="")
+        row14.prop(ps, "poster_overlap")
+        row14.prop(ps, "poster_sheet_margin", text="Margin")
+        row15 = layout.row(align=True)
+        row15.prop(ps, "poster_only_needed", text="")
+        row15.operator("render.render_poster_sheets", icon="MESH_GRID")
+        row15.operator("render.export_poster_jobs", icon="EXPORT")
+
+        # Hide UI elements when logic demands it:
+        tipo = paper_presets_data[ps.preset][0]
+
+        if tipo != "custom":
+            #ps.unit_from = 'CM_TO_PIXELS' TODO
+            row.active = False
+            row.enabled = False
+
+        if ps.unit_from == "CM_TO_PIXELS":
+            row5.active = False
+            row5.enabled = False
+
+            if tipo == "custom":
+                row3.active = True
+                row3.enabled = True
+                row1.active = False
+                row1.enabled = False
+            elif tipo != "custom" and ps.orientation == "Landscape":
+                row3.active = False
+                row3.enabled = False
+                row1.active = True
+                row1.enabled = True
+            elif tipo != "custom" and ps.orientation == "Portrait":
+                row3.active = False
+                row3.enabled = False
+                row1.active = True
+                row1.enabled = True
+        else:
+            row3.active = False
+            row3.enabled = False
+
+            if tipo == "custom":
+                row1.active = False
+                row1.enabled = False
+            elif tipo != "custom" and ps.orientation == "Landscape":
+                row1.active = True
+                row1.enabled = True
+                row5.active = False
+                row5.enabled = False
+            elif tipo != "custom" and ps.orientation == "Portrait":
+                row1.active = True
+                row1.enabled = True
+                row5.active = False
+                row5.enabled = False
+
+
+# The lines of the latest trace shown in the Profile panel at most:
+TRACE_PANEL_LINES = 40
+
+class RENDER_PT_print_profile(Panel):
+    bl_idname = "OBJECT_PT_print_profile_panel"
+    bl_label = "Profile"
+    bl_space_type = 'VIEW_3D'
+    bl_region_type = 'UI'
+    bl_category = 'Print'
+    bl_parent_id = "OBJECT_PT_print_panel"
+    bl_options = {'DEFAULT_CLOSED'}
+
+    def draw(self, context):
+        layout = self.layout
+        ps = context.scene.print_settings
+
+        row = layout.row(align=True)
+        row.prop(ps, "profile")
+        row.prop(ps, "profile_path", text="")
+
+        record = print_profiler.last
+        if not record:
+            layout.label(text="No apply recorded yet.")
+        else:
+            col = layout.column(align=True)
+            col.label(text="%s: %.1f ms, %s depsgraph updates" % (record['stage'], record['total_s'] * 1000.0, record['depsgraph_updates']))
+            for stage, entry in sorted(record['stages'].items(), key=lambda item: -item[1]['s']):
+                col.label(text="%s: %.1f ms (%sx)" % (stage, entry['s'] * 1000.0, entry['calls']))
+            for idname, count in sorted(record['operators'].items()):
+                col.label(text="bpy.ops.%s: %sx" % (idname, count))
+
+        row = layout.row(align=True)
+        row.prop(ps, "trace")
+        row.prop(ps, "trace_path", text="")
+
+        trace = print_tracer.last
+        if trace:
+            col = layout.column(align=True)
+            col.label(text="%s calls, depth %s, %s writes (%s redundant)" % (trace['calls'], trace['depth'], trace['writes'], trace['redundant_writes']))
+            for line in format_trace(trace['root'])[:TRACE_PANEL_LINES]:
+                col.label(text=line)
+
+
+
+m_TO_cm = 100.0
+
+class OBJECT_OT_text_change(Operator):
+    bl_idname = "object.text_change"
+    bl_label = "Change text."
+    bl_description = "Change the text of the selected text objects."
+    bl_options = {'REGISTER', 'UNDO'}
+
+    def execute(self, context):#, text_object, text=""):
+        text_objects = list(context.selected_objects)
+        if context.active_object and context.active_object not in text_objects:
+            text_objects.append(context.active_object)
+        change_texts(text_objects, text=context.scene.name)#<- HACK. TODO Solve properly. Or use self.text if possible and reliable?)
+        return {'FINISHED'}
+
+
+
+class OBJECT_OT_position_within_render(Operator):
+    '''Position within render, e.g. in a corner if margins are set as such. Note that proper results may require the print settings to be applied to the camera, render settings.'''
+    bl_idname = "object.position_within_render"
+    bl_label = "Position within render"
+    bl_description = "Position within render, e.g. in a corner if margins are set as such. Note that proper results may require the print settings to be applied to the camera, render settings."
+    bl_options = {'REGISTER', 'UNDO'}
+
+    def execute(self, context):#, text_object, text=""):
+        #HACK rotation_clear() now fixed it. position_within_render(context)
+        #bpy.ops.render.apply_print_settings() <- some extensions may prefer or require to handle this own their own. Also if the position within render operator is called frequently then not applying the print settings may save performance (this could be mitigated by checking if the settings changed before applying, e.g. comparing render settings' and the print settings' resolution).
+        return position_within_render(context)
+
+
+
+class OBJECT_OT_position_in_top_left_corner(Operator):
+    bl_idname = "object.position_in_top_left_corner"
+    bl_label = "Position in top left corner."
+    bl_description = "Position within render, in the top left corner."
+    bl_options = {'REGISTER', 'UNDO'}
+
+    def execute(self, context):#, text_object, text=""):
+        return position_in_top_left_corner(context)
+
+
+
+class OBJECT_OT_position_in_top_right_corner(Operator):
+    bl_idname = "object.position_in_top_right_corner"
+    bl_label = "Position in top right corner."
+    bl_description = "Position within render, in the top right corner."
+    bl_options = {'REGISTER', 'UNDO'}
+
+    def execute(self, context):
+        return position_in_top_right_corner(context)
+
+
+
+class OBJECT_OT_position_in_bottom_right_corner(Operator):
+    bl_idname = "object.position_in_bottom_right_corner"
+    bl_label = "Position in bottom right corner."
+    bl_description = "Position within render, in the bottom right corner."
+    bl_options = {'REGISTER', 'UNDO'}
+
+    def execute(self, context):#, text_object, text=""):
+        return position_in_bottom_right_corner(context)
+
+
+
+class OBJECT_OT_position_in_bottom_left_corner(Operator):
+    bl_idname = "object.position_in_bottom_left_corner"
+    bl_label = "Position in bottom left corner."
+    bl_description = "Position within render, in the bottom left corner."
+    bl_options = {'REGISTER', 'UNDO'}
+
+    def execute(self, context):#, text_object, text=""):
+        return position_in_bottom_left_corner(context)
+
+
+
+class RENDER_OT_fit_print_to_selection(Operator):
+    bl_idname = "render.fit_print_to_selection"
+    bl_label = "Fit print to selection"
+    bl_description = "Choose the smallest paper preset and orientation the selected objects fit on at the minimum scale or larger (as seen by the camera, margins considered) and the largest standard scale it allows, apply them and center the camera on the selection."
+    bl_options = {'REGISTER', 'UNDO'}
+
+    def execute(self, context):
+        objects = list(context.selected_objects)
+        if context.active_object and context.active_object not in objects:
+            objects.append(context.active_object)
+        denominator = int(context.scene.print_settings.fit_min_scale)
+        fits = fit_print_to_objects(context, objects, min_scale_factor=1.0 / denominator if denominator else 0.0)
+        if not fits:
+            self.report({'WARNING'}, "The selection fits on no paper preset at the minimum scale or larger.")
+            return {'CANCELLED'}
+        fit = fits[0]
+        apply_print_fit(context, fit)
+        # The fits assume the selection to be centered:
+        center_camera_on_objects(context, objects)
+        self.report({'INFO'}, "%s %s at %s (%s fits)." % (fit.preset, fit.orientation,
+                convertScaleFactorToRatioString(fit.scale_factor).strip(), len(fits)))
+        return {'FINISHED'}
+
+
+
+class RENDER_OT_center_camera_on_selection(Operator):
+    bl_idname = "render.center_camera_on_selection"
+    bl_label = "Center camera"
+    bl_description = "Move the camera along its view plane such that the selected objects' geometry is centered in the render."
+    bl_options = {'REGISTER', 'UNDO'}
+
+    def execute(self, context):
+        objects = list(context.selected_objects)
+        if context.active_object and context.active_object not in objects:
+            objects.append(context.active_object)
+        if center_camera_on_objects(context, objects) is None:
+            self.report({'WARNING'}, "No geometry selected to center the camera on.")
+            return {'CANCELLED'}
+        return {'FINISHED'}
+
+
+
+class RENDER_OT_check_print_coverage(Operator):
+    bl_idname = "render.check_print_coverage"
+    bl_label = "Check coverage"
+    bl_description = "Check whether the camera's orthographic scale covers the selected objects' geometry."
+
+    def execute(self, context):
+        objects = list(context.selected_objects)
+        if context.active_object and context.active_object not in objects:
+            objects.append(context.active_object)
+        if not context.scene.camera:
+            self.report({'WARNING'}, "The scene has no camera.")
+            return {'CANCELLED'}
+        coverage = ortho_coverage(context, objects)
+        if coverage is None:
+            self.report({'WARNING'}, "No geometry selected to check the coverage of.")
+            return {'CANCELLED'}
+        if coverage.covered:
+            self.report({'INFO'}, "The render covers the selection (%.3g x %.3g of %.3g x %.3g)." % (
+                    coverage.bounds_width, coverage.bounds_height, coverage.view_width, coverage.view_height))
+        else:
+            self.report({'WARNING'}, "The selection reaches %.3g beyond the render (%.3g x %.3g of %.3g x %.3g)." % (
+                    coverage.overflow, coverage.bounds_width, coverage.bounds_height, coverage.view_width, coverage.view_height))
+        return {'FINISHED'}
+
+
+
+class RENDER_OT_ensure_height(Operator):
+    bl_idname = "render.ensure_height"
+    bl_label = "Ensure a certain printed height."
+    bl_description = "Set the dimensions of the selected text objects such that they are printed out in a certain height."
+    bl_options = {'REGISTER', 'UNDO'}
+
+    def execute(self, context):#, resulting_height, obj):
+        objects = list(context.selected_objects)
+        if context.active_object and context.active_object not in objects:
+            objects.append(context.active_object)
+        return ensure_heights(objects, print_settings=context.scene.print_settings)
+
+
+
+
+
+
+class RenderPrintSettings(PropertyGroup):
+    update_manually = BoolProperty(
+            name="Update manually"
+            ,description="If enabled apply settings manually instead of realtime update."
+            ,default=False
+            ,update=traced_update('update_manually', update_settings_cb)
+    )
+    # References, so the objects needn't be searched (see find_scale_ratio_text_object()):
+    scale_ratio_text_object = PointerProperty(
+            name="Scale ratio text"
+            ,description="The text object showing the scale ratio."
+            ,type=Object
+    )
+    camera_object = PointerProperty(
+            name="Print camera"
+            ,description="The camera the print settings were applied to last."
+            ,type=Object
+    )
+
+    # Print layout cache (see print_layout_in_sync()):
+    layout_fingerprint = StringProperty(
+            name="Layout fingerprint"
+            ,description="Internal: Fingerprint of the inputs the print settings were applied with, empty if outdated."
+            ,default=""
+            ,options={'HIDDEN'}
+    )
+    cached_ortho_scale = FloatProperty(
+            name="Cached orthographic scale"
+            ,description="Internal: The orthographic scale the print settings were applied with."
+            ,default=0.0
+            ,options={'HIDDEN'}
+    )
+    cached_resolution = IntVectorProperty(
+            name="Cached resolution"
+            ,description="Internal: The render resolution the print settings were applied with."
+            ,size=2
+            ,default=(0, 0)
+            ,options={'HIDDEN'}
+    )
+    cached_camera_delta = FloatVectorProperty(
+            name="Cached camera offset"
+            ,description="Internal: The camera offset (due to the margins) the print settings were applied with."
+            ,size=2
+            ,default=(0.0, 0.0)
+            ,options={'HIDDEN'}
+    )
+
+    # Profiling (see PrintProfiler):
+    profile = BoolProperty(
+            name="Profile"
+            ,description="Record the time spent per stage, the operators dispatched and the depsgraph updates when applying the print settings."
+            ,default=False
+            ,update=update_profile_cb
+    )
+    profile_path = StringProperty(
+            name="Profile path"
+            ,description="If given, each profile record is appended to this file as JSON line."
+            ,default=""
+            ,subtype='FILE_PATH'
+            ,update=update_profile_cb
+    )
+    trace = BoolProperty(
+            name="Trace"
+            ,description="Record the tree of update callbacks, stages and operators each edit of the print settings triggers, including redundant writes."
+            ,default=False
+            ,update=update_trace_cb
+    )
+    trace_path = StringProperty(
+            name="Trace path"
+            ,description="If given, each trace is appended to this file in folded stack format (for flame graph tools)."
+            ,default=""
+            ,subtype='FILE_PATH'
+            ,update=update_trace_cb
+    )
+
+    # Per scene update state (instead of module globals, so scenes don't affect each other), not saved:
+    # Suppresses the update callbacks while the print settings are being applied.
+    updating = transient_print_state('updating')
+    # Suppresses the scale factor's update callback while it is being rounded.
+    updating_scale = transient_print_state('updating_scale')
+    # Changes are waiting to be applied by the update timer.
+    update_pending = transient_print_state('update_pending')
+    # Tiles or regions are being rendered (which don't calibrate the render time estimate).
+    rendering_tiles = transient_print_state('rendering_tiles')
+    # The panel's render estimates by their inputs, see print_panel_estimates().
+    panel_estimates = transient_print_state('panel_estimates')
+
+    # Per scene solver state:
+    scale_factor_previous = FloatProperty(
+            name="Previous scale factor"
+            ,description="Internal: The scale factor before the last change, determines whether to round up or down."
+            ,default=1
+            ,options={'HIDDEN'}
+    )
+    update_delay = FloatProperty(
+            name="Update delay"
+            ,description="Seconds to gather changes of the print settings (e.g. while dragging a slider) before applying them all at once. Zero applies each change immediately."
+            ,default=.1
+            ,min=0.0
+            ,max=5.0
+    )
+
+    unit_from = EnumProperty(
+            name="Set from",
+            description="Set from",
+            items=(
+                ("CM_TO_PIXELS", "CM -> Pixel", "Centermeters to Pixels"),
+                ("PIXELS_TO_CM", "Pixel -> CM", "Pixels to Centermeters")
+                ),
+            default="CM_TO_PIXELS",
+            )
+    orientation = EnumProperty(
+            name="Page Orientation",
+            description="Set orientation",
+            items=(
+                ("Portrait", "Portrait", "Portrait"),
+                ("Landscape", "Landscape", "Landscape")
+            ),
+            default="Portrait",
+            update=traced_update('orientation', update_settings_cb),
+            )
+    preset = EnumProperty(
+            name="Select Preset",
+            description="Select from preset",
+            items=paper_presets,
+            default="custom_1_1",
+            update=traced_update('preset', update_settings_cb),
+            )
+    dpi = IntProperty(
+            name="DPI",
+            description="Dots per Inch",
+            default=300,
+            min=DPI_MIN, max=DPI_MAX,
+            update=traced_update('dpi', update_settings_cb),
+            )
+    width_cm = FloatProperty(
+            name="Width",
+            description="Width in CM",
+            default=5.0,
+            min=1.0, max=100000.0,
+            update=traced_update('width_cm', update_settings_cb),
+            )
+    height_cm = FloatProperty(
+            name="Height",
+            description="Height in CM",
+            default=3.0,
+            min=1.0, max=100000.0,
+            update=traced_update('height_cm', update_settings_cb),
+            )
+    width_px = IntProperty(
+            name="Pixel Width",
+            description="Pixel Width",
+            default=900,
+            min=4, max=RENDER_RESOLUTION_MAX, # Use tiles if a render this big does not fit into memory.
+            update=traced_update('width_px', update_settings_cb),
+            )
+    height_px = IntProperty(
+            name="Pixel Height",
+            description="Pixel Height",
+            default=600,
+            min=4, max=RENDER_RESOLUTION_MAX, # Use tiles if a render this big does not fit into memory.
+            update=traced_update('height_px', update_settings_cb),
+            )
+    #PRINT TO SCALE
+    print_to_scale = BoolProperty(
+            name="Print to scale"
+            ,description="Print to scale by automatically calculate the correct distance of the camera to the object or the center of scene."
+            ,default=True
+            #,update=print2scale_reset_camera_focal_length_or_orthographic_scale
+    )
+    # Remapping probably will lead to much confusion. e.g. model 10 -> 1 on the plan means the output will be a model copy 10 times smaller.
+    # Many architects will accidentally fill in 1:10 instead because they forget that here the ratio is (model:plan) and not (plan:model) like printed
+    # on the plan. So unfortunately this will cost a lot of trees as the prints in that a size will be rendered useless.
+    # => SO NOW WE USE SCALE FACTOR ONLY! THAT'S MUCH MORE INTUITIVE AND IS NOTHING ELSE than print ratio but without the confusion.
+    #in_print2scale_scale_remap_source_model = IntProperty(
+    #        name="Model - Print ratio denominator (Model, Map source)"
+    #        ,description="If the model value is greater than the real world value (e.g. 2:1) then the printed output will be scaled down to 1/2 the model size. is e.g. 10 and the real world value 1, then we have a print ratio of 10:1, that is 10 model units print to 1 real world unit. So a 10m model becomes 1m. Thus the printed plan is to scale in a ratio of 1:10 (while the model is in the opposite ratio of 10:1)."
+    #        ,default=1
+    #        ,min=1
+    #        ,max=10000
+    #        ,update=print2scale_recalculate_camera_focal_length_or_orthographic_scale
+    #)
+    #in_print2scale_scale_remap_target_printed = IntProperty(
+
+    # NOTE:
+    # The print ratio is nothing else than a scale factor. E.g. 1:10 on a plan means the original real measurements are scaled down by factor 10.
+    # ATTENTION:
+    # Precondition is that the 3D model must be modelled to scale. Only then printing a plan to scale, scaled down or up, gives meaningful dimensions.
+    # E.g. if a 1m long wing is modelled with 1mm length in blender instead, then it has to be printed with a 1000:1 for a 1:1 scale on a 1m sheet
+    # or 100:1 on a 1/10m sheet, resulting in a factor of 1:10. Unfortunately the program can't know if the model now really is that small (1mm) or
+    # not and labels the plan as 100:1 in scale - obviously confusing all engineers and architects involved.
+    # Either scaling the model up or changing the unit settings scale can solve this. From experience the first approach can prove difficult
+    # as this can lead to strange behaviour of modifiers and any kind of relationsships of objects of the model - often messing up the complete model.
+    # The latter - changing the unit settings - is okay, but results in modularity problems if this setting is different in each scene,
+    # so when finally importing one model into another scene, a lot of new problems arise. Also problematic are discrepancies in the grid and blender's
+    # buildin-measurement functionality (N panel, e.g. edge info) as well as the bullet engine or other features that rely on physically accurate units
+    # (and from what reason ever (there are plenty!) don't take the unit scale into account correctly).
+    # The loss of modularity is such a big problem that it's good to know that all this trouble can be avoided by simply modelling to scale.
+    # (While model accuracy might prove inaccurate if modelling to scale without scaling up the model as the grids resolution is limited! So there is no silverbullet.)
+    scale_factor = FloatProperty(
+            name="Print scale factor"
+            ,description="Scale big models down (scale factor <1) or tiny models up (scale factor >1). E.g. 10 results in scaling up tenfold, a 1meter model will fill 10m on a giant sheet of papyrus when printed out with this setting. On the other hand 0.1 = 1/10 results in a 1:10 plan being printed."
+            ,default=1
+            ,min=0.00000001 #If zero is possible, problems will arise due to division by zero!
+            ,max=10000
+            ,update=traced_update('scale_factor', print2scale_recalculate_camera_focal_length_or_orthographic_scale)
+    )
+    #cache_scale_ratio_text_object = None # ObjectProperty or ReferenceProperty
+    add_scale_ratio_text = BoolProperty(
+            name="Add scale ratio text."
+            ,description="Whether to add a text representation of the scale factor (as ratio) or not."
+            ,default=True
+            ,update=traced_update('add_scale_ratio_text', print2scale)#_reset_camera_focal_length_or_orthographic_scale
+    )
+    # Remapping probably will lead to much confusion. e.g. model 10 -> 1 on the plan means the output will be a model copy 10 times smaller.
+    # Many architects will accidentally fill in 1:10 instead because they forget that here the ratio is (model:plan) and not (plan:model) like printed
+    text_height = FloatProperty(
+            name="Text height."
+            ,description="Text height as printed. Given in Standard International units. Defaults to 1cm if zero."
+            ,default=.005 # m = .5cm = 5mm
+            ,min=0.0
+            ,max=100.0 # 100m is quite huge already, even for graffity.
+            #,update=ensure_height <- if text object is selected and active.
+            ,update=traced_update('text_height', update_settings_cb)
+    )
+
+    # Margins for printers that require a blank border (due to technical or visual reasons):
+    use_margins = BoolProperty(
+            name="Use margins"
+            ,description="Calculate the render size such that margins won't be rendered (results in smaller rendered image)."
+            ,default=True
+            ,update=traced_update('use_margins', update_settings_cb)
+    )
+    margin_top = FloatProperty(
+            name="Top margin"
+            ,description="Blank space from the top paper edge."
+            ,default=.015 # 1.5cm  #1 # 1%
+            ,min=0.0
+            ,max=100.0
+            ,update=traced_update('margin_top', update_settings_cb)
+    )
+    margin_right = FloatProperty(
+            name="Right margin"
+            ,description="Blank space from the right paper edge."
+            ,default=.015 # 1.5cm  #1 # 1%
+            ,min=0.0
+            ,max=100.0
+            ,update=traced_update('margin_right', update_settings_cb)
+    )
+    margin_bottom = FloatProperty(
+            name="Bottom margin"
+            ,description="Blank space from the bottom paper edge."
+            ,default=.015 # 1.5cm  #1 # 1%
+            ,min=0.0
+            ,max=100.0
+            ,update=traced_update('margin_bottom', update_settings_cb)
+    )
+    margin_left = FloatProperty(
+            name="Left margin"
+            ,description="Blank space from the left paper edge."
+            ,default=.015 # 1.5cm  #1 # 1%
+            ,min=0.0
+            ,max=100.0
+            ,update=traced_update('margin_left', update_settings_cb)
+    )
+
+
+    # Position within render:
+    margin_top_bottom = FloatProperty(
+            name="Vertical margin"
+            ,description="Distance to top, bottom edges. Interpreted as percentage if >= 1."
+            ,default=1 # 1%
+            ,min=0.0
+            ,max=100.0
+    )
+    margin_left_right = FloatProperty(
+            name="Horizontal margin"
+            ,description="Distance to left, right edges. Interpreted as percentage if >= 1."
+            ,default=1 # 1%
+            ,min=0.0
+            ,max=100.0
+            #,update=position_within_render <- requires parameters.
+    )
+
+    # Best fit (see find_print_fits()):
+    fit_min_scale = EnumProperty(
+            name="Minimum scale"
+            ,description="The smallest scale fitting the selection may choose, thus the smallest sheet is chosen that fits the selection at this scale or larger"
+            ,items=[("0", "Any scale", "Choose the smallest sheet at whatever scale")]
+                + [(str(denominator), "1:%s" % denominator, "") for denominator in STANDARD_SCALES]
+            ,default="100"
+    )
+
+    # Poster sheets (see POSTER SHEETS):
+    poster_sheet_preset = EnumProperty(
+            name="Sheet"
+            ,description="Paper the print is split onto, e.g. for office printers"
+            ,items=sheet_presets
+            ,default="A4_21.0_29.7"
+    )
+    poster_sheet_orientation = EnumProperty(
+            name="Sheet orientation"
+            ,description="Orientation of the sheets"
+            ,items=(
+                ("Portrait", "Portrait", "Portrait"),
+                ("Landscape", "Landscape", "Landscape")
+            )
+            ,default="Portrait"
+    )
+    poster_overlap = FloatProperty(
+            name="Overlap"
+            ,description="Width (m) neighbouring sheets print both, to glue them"
+            ,default=.01 # 1cm
+            ,min=0.0
+            ,max=1.0
+    )
+    poster_sheet_margin = FloatProperty(
+            name="Sheet margin"
+            ,description="Margin (m) the printer can not print on, at each sheet edge"
+            ,default=.005 # 5mm
+            ,min=0.0
+            ,max=1.0
+    )
+    poster_only_needed = BoolProperty(
+            name="Only needed sheets"
+            ,description="Skip sheets no geometry is seen on"
+            ,default=True
+    )
+
+    # Render cache (see RENDER CACHE):
+    use_render_cache = BoolProperty(
+            name="Render cache"
+            ,description="Reuse earlier renders of the same scene state, camera and render settings instead of rendering again"
+            ,default=False
+    )
+    render_cache_dir = StringProperty(
+            name="Cache directory"
+            ,description="Directory of the render cache, may be shared by several processes"
+            ,default="//render_cache"
+            ,subtype='DIR_PATH'
+    )
+    render_cache_size_mb = IntProperty(
+            name="Cache size"
+            ,description="Size (MB) of the render cache beyond which the least recently used renders are removed"
+            ,default=4096
+            ,min=1
+            ,max=16777216
+    )
+
+    use_region_render = BoolProperty(
+            name="Annotations only"
+            ,description="If only annotations (the scale ratio text and the objects placed within the render area) changed since the last render, render just their regions again and patch them into the rendered image (keeps a .render.json record next to the image)"
+            ,default=False
+    )
+
+    fingerprint = StringProperty(
+            name="Scene fingerprint"
+            ,description="The scene fingerprint last computed (see scene_fingerprint())"
+            ,default=""
+    )
+
+    # Camera drivers (see print_layout_driver()):
+    use_drivers = BoolProperty(
+            name="Drivers"
+            ,description="Drive the camera's orthographic scale and offset and the render resolution by the print settings, so animated print settings or unit scales are applied per frame, in background renders too (requires trusted python scripts)"
+            ,default=False
+            ,update=traced_update('use_drivers', update_drivers_cb)
+    )
+
+    # Viewing distance (see viewing_distance_dpi()):
+    use_viewing_distance = BoolProperty(
+            name="Viewing distance"
+            ,description="Derive the dpi from the distance the print is viewed from, i.e. the smallest dot the eye resolves there"
+            ,default=False
+            ,update=traced_update('use_viewing_distance', update_viewing_distance_cb)
+    )
+    viewing_distance = FloatProperty(
+            name="Viewing distance"
+            ,description="Distance (m) the print is viewed from"
+            ,default=1.0
+            ,min=.05
+            ,max=1000.0
+            ,update=traced_update('viewing_distance', update_viewing_distance_cb)
+    )
+    visual_acuity = FloatProperty(
+            name="Visual acuity"
+            ,description="Smallest angle (arcminutes) the eye resolves, 1 for normal vision, less for critical viewers"
+            ,default=1.0
+            ,min=.1
+            ,max=10.0
+            ,update=traced_update('visual_acuity', update_viewing_distance_cb)
+    )
+
+    # Render preflight (see render_preflight()):
+    preflight_memory_budget = IntProperty(
+            name="Memory budget"
+            ,description="Render memory (MB) above which applying the print settings warns. Also the budget of the Max DPI operator."
+            ,default=16384
+            ,min=16
+            ,max=1048576
+    )
+    preflight_memory_limit = IntProperty(
+            name="Memory limit"
+            ,description="Render memory (MB) above which applying the print settings is refused (render in tiles instead). 0 for no limit."
+            ,default=65536
+            ,min=0
+            ,max=1048576
+    )
+    preflight_time_budget = FloatProperty(
+            name="Time budget"
+            ,description="Estimated render time (s) above which applying the print settings warns. 0 for no budget."
+            ,default=3600.0
+            ,min=0.0
+    )
+    preflight_time_factor = FloatProperty(
+            name="Time factor"
+            ,description="Render time (ns) per pixel and sample, calibrated by completed renders"
+            ,default=100.0
+            ,min=1e-6
+    )
+
+    # Tiled rendering of large prints:
+    tile_memory_budget = IntProperty(
+            name="Tile memory budget"
+            ,description="Memory (MB) a single render tile may use. The tile size is derived from it."
+            ,default=4096
+            ,min=16
+            ,max=1048576
+    )
+    tile_overlap = IntProperty(
+            name="Tile overlap"
+            ,description="Pixels rendered beyond each inner tile edge, to be cropped when stitching (avoids seams due to pixel filtering)."
+            ,default=4
+            ,min=0
+            ,max=256
+    )
+    stitch_format = EnumProperty(
+            name="Stitch tiles"
+            ,description="Assemble the rendered tiles into one image file (written tile by tile via memory mapping)"
+            ,items=(
+                ("NONE", "Keep tiles", "Do not stitch the tiles"),
+                ("TIFF", "BigTIFF", "Stitch into an uncompressed BigTIFF with the DPI as resolution"),
+                ("RAW", "Raw", "Stitch into raw interleaved RGBA pixels, top row first, described by a .json sidecar"),
+            )
+            ,default="TIFF"
+    )
+    stitch_depth = EnumProperty(
+            name="Stitch depth"
+            ,description="Sample type of the stitched image"
+            ,items=(
+                ("UINT16", "16 bit", "Unsigned 16 bit integer samples"),
+                ("FLOAT32", "32 bit float", "32 bit float samples"),
+            )
+            ,default="UINT16"
+    )
+
+
+
+
+
+class RENDER_OT_apply_print_settings(Operator):
+    bl_idname = "render.apply_print_settings"
+    bl_label = "Apply print settings."
+    bl_description = "Set the render dimension."
+
+    def execute(self, context):
+        ps = context.scene.print_settings
+        layout = solve_print_layout(**read_print_inputs(context, ps))
+        preflight = render_preflight(context.scene, layout.width_px, layout.height_px)
+        if preflight.status == 'REFUSED':
+            self.report({'ERROR'}, "Not applied, %s. Lower the dpi or render in tiles." % preflight.message)
+            return {'CANCELLED'}
+        if preflight.status == 'WARNING':
+            self.report({'WARNING'}, preflight.message[0].upper() + preflight.message[1:] + ".")
+        return apply_print_settings(context)
+
+
+
+class RENDER_OT_use_max_dpi(Operator):
+    bl_idname = "render.use_max_dpi"
+    bl_label = "Max DPI"
+    bl_description = "Set the highest dpi whose render fits into the preflight memory budget."
+
+    def execute(self, context):
+        ps = context.scene.print_settings
+        dpi = max_dpi_for_memory(context, ps, ps.preflight_memory_budget * 1024 * 1024)
+        if dpi is None:
+            self.report({'ERROR'}, "Not even %s dpi fit into the memory budget." % DPI_MIN)
+            return {'CANCELLED'}
+        ps.dpi = dpi
+        return {'FINISHED'}
+
+
+
+
+
+
+class RENDER_OT_render_print_tiles(Operator):
+    bl_idname = "render.render_print_tiles"
+    bl_label = "Render tiles"
+    bl_description = "Apply the print settings and render the print in tiles that fit into the tile memory budget, each to a file of its own (based on the output path)."
+
+    def execute(self, context):
+        ps = context.scene.print_settings
+        apply_print_settings(context)
+        tiles = render_print_tiles(context.scene, ps.tile_memory_budget * 1024 * 1024, ps.tile_overlap)
+        filepath = stitch_print_tiles(context.scene, tiles)
+        if filepath:
+            self.report({'INFO'}, "Rendered %s tiles, stitched into %s." % (len(tiles), filepath))
+        else:
+            self.report({'INFO'}, "Rendered %s tiles." % len(tiles))
+        return {'FINISHED'}
+
+
+
+class RENDER_OT_render_print(Operator):
+    bl_idname = "render.render_print"
+    bl_label = "Render print"
+    bl_description = "Apply the print settings and render the print to the output path, reusing a cached render if nothing it depends on changed (see the render cache option), or rendering only the regions of changed annotations (see the annotations only option)."
+
+    def execute(self, context):
+        scene = context.scene
+        ps = scene.print_settings
+        layout = solve_print_layout(**read_print_inputs(context, ps))
+        preflight = render_preflight(scene, layout.width_px, layout.height_px)
+        if preflight.status == 'REFUSED':
+            self.report({'ERROR'}, "Not rendered, %s. Lower the dpi or render in tiles." % preflight.message)
+            return {'CANCELLED'}
+        apply_print_settings(context, ps, layout)
+        filepath, status, tiles = render_print_still(scene, render_cache(scene))
+        if status == 'REGIONS':
+            self.report({'INFO'}, "Rendered %s changed annotation region(s) (%s px) into %s." % (len(tiles),
+                    sum(tile.render_width * tile.render_height for tile in tiles), filepath))
+        elif status == 'UNCHANGED':
+            self.report({'INFO'}, "Nothing changed since %s was rendered." % filepath)
+        else:
+            self.report({'INFO'}, "%s %s." % ("Reused the cached render for" if status == 'CACHED' else "Rendered", filepath))
+        return {'FINISHED'}
+
+
+
+class RENDER_OT_scene_fingerprint(Operator):
+    bl_idname = "render.scene_fingerprint"
+    bl_label = "Fingerprint"
+    bl_description = "Compute the fingerprint of what the render sees of the visible objects and report whether it changed since the last time."
+
+    def execute(self, context):
+        ps = context.scene.print_settings
+        start = time.perf_counter()
+        fingerprint = scene_fingerprint(context.scene)
+        elapsed = time.perf_counter() - start
+        self.report({'INFO'}, "Scene fingerprint %s (%s, %.0f ms)." % (fingerprint[:12],
+                "unchanged" if fingerprint == ps.fingerprint else "changed", elapsed * 1000.0))
+        if ps.fingerprint != fingerprint:
+            ps.fingerprint = fingerprint
+        return {'FINISHED'}
+
+
+
+class RENDER_OT_render_poster_sheets(Operator):
+    bl_idname = "render.render_poster_sheets"
+    bl_label = "Render sheets"
+    bl_description = "Apply the print settings and render the print as poster sheets, each to a file of its own (based on the output path). Sheets already rendered are skipped, i.e. an interrupted poster render resumes."
+
+    def execute(self, context):
+        ps = context.scene.print_settings
+        apply_print_settings(context)
+        rendered, skipped = render_poster_sheets(context, ps.poster_only_needed)
+        self.report({'INFO'}, "Rendered %s sheets, %s already rendered." % (len(rendered), len(skipped)))
+        return {'FINISHED'}
+
+
+
+class RENDER_OT_export_poster_jobs(Operator):
+    bl_idname = "render.export_poster_jobs"
+    bl_label = "Export sheet jobs"
+    bl_description = "Write a print job manifest rendering each poster sheet as a job of its own (see render_to_print.py --manifest), e.g. to render the sheets in several processes."
+
+    filepath = StringProperty(subtype='FILE_PATH')
+
+    def execute(self, context):
+        ps = context.scene.print_settings
+        if not bpy.data.filepath:
+            self.report({'ERROR'}, "Save the blend file first, the jobs load it.")
+            return {'CANCELLED'}
+        apply_print_settings(context)
+        output = bpy.path.abspath(context.scene.render.filepath)
+        manifest_path = bpy.path.abspath(self.filepath) if self.filepath else output + "_sheets.json"
+        jobs = poster_print_jobs(context, bpy.data.filepath, output, ps.poster_only_needed)
+        write_print_jobs(jobs, manifest_path)
+        self.report({'INFO'}, "Wrote %s sheet jobs to %s." % (len(jobs), manifest_path))
+        return {'FINISHED'}
+
+
+
+#
+# TILED RENDERING
+#
+# A print too big to be rendered at once is split into tiles, each rendered on its own with the
+# camera shifted such that the pixel grid and the scale are exactly those of the full render.
+#
+# Pixel coordinates have their origin in the bottom left corner (like Blender's image buffers).
+# The tile (x, y, width, height) is its part of the final image, the render_* area additionally
+# includes the overlap towards neighbouring tiles, which has to be cropped when stitching.
+#
+Tile = namedtuple('Tile', (
+        'column', 'row',
+        'x', 'y', 'width', 'height',
+        'render_x', 'render_y', 'render_width', 'render_height',
+        'shift_x', 'shift_y', 'ortho_scale',
+        ))
+
+# Rough render memory use per pixel (float RGBA combined pass, render result and display buffers).
+RENDER_BYTES_PER_PIXEL = 64
+
+
+
+#
+# Splits a width_px x height_px render with the given orthographic scale into as few tiles as
+# possible, each fitting into memory_budget bytes (overlap included).
+#
+# Assumes the default (automatic) sensor fit, i.e. the orthographic scale and the camera shift
+# refer to the larger of the render dimensions. The camera's own shift (in units of the full
+# render) is kept.
+#
+def solve_tiles(width_px, height_px, ortho_scale, memory_budget, overlap=0,
+        bytes_per_pixel=RENDER_BYTES_PER_PIXEL, shift_x=0.0, shift_y=0.0):
+    max_pixels = max(memory_budget // bytes_per_pixel, 1)
+
+    best = None
+    for columns in range(1, width_px + 1):
+        tile_width = -(-width_px // columns) + (2 * overlap if columns > 1 else 0)
+        tile_height_max = max_pixels // tile_width - 2 * overlap
+        if tile_height_max < 1:
+            continue
+        rows = -(-height_px // tile_height_max)
+        if rows == 1:
+            tile_height_max = height_px
+        candidate = (columns * rows, abs(tile_width - tile_height_max), columns, rows)
+        if best is None or candidate < best:
+            best = candidate
+        if rows == 1:
+            break # More columns would only add tiles.
+    if best is None:
+        raise ValueError("A memory budget of %s bytes is too small for tiles with %s px overlap." % (memory_budget, overlap))
+    count, squareness, columns, rows = best
+
+    tiles = []
+    for row in range(rows):
+        y = height_px * row // rows
+        height = height_px * (row + 1) // rows - y
+        render_y = max(y - overlap, 0)
+        render_height = min(y + height + overlap, height_px) - render_y
+        for column in range(columns):
+            x = width_px * column // columns
+            width = width_px * (column + 1) // columns - x
+            render_x = max(x - overlap, 0)
+            render_width = min(x + width + overlap, width_px) - render_x
+
+            tile_shift_x, tile_shift_y, tile_ortho_scale = tile_camera(render_x, render_y, render_width, render_height,
+                    width_px, height_px, ortho_scale, shift_x, shift_y)
+            tiles.append(Tile(
+                    column=column, row=row,
+                    x=x, y=y, width=width, height=height,
+                    render_x=render_x, render_y=render_y,
+                    render_width=render_width, render_height=render_height,
+                    shift_x=tile_shift_x, shift_y=tile_shift_y,
+                    ortho_scale=tile_ortho_scale,
+                    ))
+    return tiles
+
+
+
+#
+# The camera shift and orthographic scale rendering exactly the pixels (x, y, width, height) of a
+# width_px x height_px render with the given orthographic scale and shift.
+#
+def tile_camera(x, y, width, height, width_px, height_px, ortho_scale, shift_x=0.0, shift_y=0.0):
+    m_per_px = ortho_scale / max(width_px, height_px)
+    tile_ortho_scale = m_per_px * max(width, height)
+    # Offset of the tile's center to the render's center:
+    dx_m = (x + width / 2.0 - width_px / 2.0) * m_per_px
+    dy_m = (y + height / 2.0 - height_px / 2.0) * m_per_px
+    return ((shift_x * ortho_scale + dx_m) / tile_ortho_scale,
+            (shift_y * ortho_scale + dy_m) / tile_ortho_scale,
+            tile_ortho_scale)
+
+
+
+def tile_filepath(filepath, tile):
+    return "%s_tile_%03d_%03d" % (filepath, tile.row, tile.column)
+
+
+
+#
+# Renders the scene's current camera frame in tiles, each to its own file derived from the
+# render output path (see tile_filepath()). The render and camera settings are restored afterwards.
+#
+# Returns the list of (tile, filepath).
+#
+def render_print_tiles(scene, memory_budget, overlap=0, filepath=None):
+    render = scene.render
+    camera_data = scene.camera.data
+    tiles = solve_tiles(render.resolution_x, render.resolution_y, camera_data.ortho_scale,
+            memory_budget, overlap, shift_x=camera_data.shift_x, shift_y=camera_data.shift_y)
+    return render_tiles(scene, tiles, filepath)
+
+
+
+#
+# Renders each tile's render area to the file tile_filepath(filepath, tile) (filepath defaults to the render
+# output path), see render_print_tiles(). Returns the list of (tile, filepath).
+#
+def render_tiles(scene, tiles, filepath=None, tile_filepath=tile_filepath):
+    render = scene.render
+    camera_data = scene.camera.data
+    if filepath is None:
+        filepath = render.filepath
+
+    settings_old = (render.resolution_x, render.resolution_y, render.resolution_percentage, render.filepath,
+            camera_data.ortho_scale, camera_data.shift_x, camera_data.shift_y)
+    cache = render_cache(scene)
+    rendered = []
+    scene.print_settings.rendering_tiles = True
+    try:
+        with print_drivers_muted(scene):
+            render.resolution_percentage = 100
+            for tile in tiles:
+                render.resolution_x = tile.render_width
+                render.resolution_y = tile.render_height
+                camera_data.ortho_scale = tile.ortho_scale
+                camera_data.shift_x = tile.shift_x
+                camera_data.shift_y = tile.shift_y
+                render.filepath = tile_filepath(filepath, tile)
+                rendered.append((tile, render_still(scene, cache)[0]))
+    finally:
+        (render.resolution_x, render.resolution_y, render.resolution_percentage, render.filepath,
+                camera_data.ortho_scale, camera_data.shift_x, camera_data.shift_y) = settings_old
+        scene.print_settings.rendering_tiles = False
+    return rendered
+
+
+
+#
+# TILE STITCHING
+#
+# The stitched image is preallocated on disk and memory-mapped, each tile is cropped to its
+# part of the image and written straight into the mapping. So memory use stays at about one
+# tile, whatever the size of the print.
+#
+
+# BigTIFF field types:
+TIFF_SHORT = 3
+TIFF_LONG = 4
+TIFF_RATIONAL = 5
+TIFF_LONG8 = 16
+
+# Rows per TIFF strip, i.e. per StripOffsets/StripByteCounts entry:
+TIFF_ROWS_PER_STRIP = 64
+
+
+
+#
+# Creates an uncompressed, interleaved RGBA BigTIFF of the given size (filled with zeros) and
+# returns the offset of the pixel data, which is stored top row first.
+#
+def write_bigtiff_header(filepath, width, height, dpi, dtype, channels=4):
+    import struct
+    import numpy as np
+
+    dtype = np.dtype(dtype)
+    row_bytes = width * channels * dtype.itemsize
+    strip_count = -(-height // TIFF_ROWS_PER_STRIP)
+
+    entries = [
+        (256, TIFF_LONG, 1, struct.pack('<I', width)),
+        (257, TIFF_LONG, 1, struct.pack('<I', height)),
+        (258, TIFF_SHORT, channels, struct.pack('<%sH' % channels, *([dtype.itemsize * 8] * channels))),
+        (259, TIFF_SHORT, 1, struct.pack('<H', 1)), # no compression
+        (262, TIFF_SHORT, 1, struct.pack('<H', 2)), # RGB
+        (273, TIFF_LONG8, strip_count, None), # strip offsets, filled in below
+        (277, TIFF_SHORT, 1, struct.pack('<H', channels)),
+        (278, TIFF_LONG, 1, struct.pack('<I', TIFF_ROWS_PER_STRIP)),
+        (279, TIFF_LONG8, strip_count, None), # strip byte counts, filled in below
+        (282, TIFF_RATIONAL, 1, struct.pack('<II', int(dpi), 1)),
+        (283, TIFF_RATIONAL, 1, struct.pack('<II', int(dpi), 1)),
+        (284, TIFF_SHORT, 1, struct.pack('<H', 1)), # chunky
+        (296, TIFF_SHORT, 1, struct.pack('<H', 2)), # inch
+        (338, TIFF_SHORT, 1, struct.pack('<H', 2)), # unassociated alpha
+        (339, TIFF_SHORT, channels, struct.pack('<%sH' % channels, *([3 if dtype.kind == 'f' else 1] * channels))),
+        ]
+
+    ifd_offset = 16
+    ifd_size = 8 + len(entries) * 20 + 8
+    strip_offsets_offset = ifd_offset + ifd_size
+    strip_byte_counts_offset = strip_offsets_offset + strip_count * 8
+    data_offset = strip_byte_counts_offset + strip_count * 8
+    data_offset += -data_offset % 4096 # page aligned for the memory mapping
+
+    strip_offsets = []
+    strip_byte_counts = []
+    for strip in range(strip_count):
+        rows = min(TIFF_ROWS_PER_STRIP, height - strip * TIFF_ROWS_PER_STRIP)
+        strip_offsets.append(data_offset + strip * TIFF_ROWS_PER_STRIP * row_bytes)
+        strip_byte_counts.append(rows * row_bytes)
+
+    with open(filepath, 'wb') as f:
+        f.write(struct.pack('<2sHHHQ', b'II', 43, 8, 0, ifd_offset))
+        f.write(struct.pack('<Q', len(entries)))
+        for tag, field_type, count, value in entries:
+            if tag == 273:
+                value = struct.pack('<Q', strip_offsets_offset) if strip_count > 1 else struct.pack('<Q', strip_offsets[0])
+            elif tag == 279:
+                value = struct.pack('<Q', strip_byte_counts_offset) if strip_count > 1 else struct.pack('<Q', strip_byte_counts[0])
+            f.write(struct.pack('<HHQ', tag, field_type, count) + value.ljust(8, b'\0'))
+        f.write(struct.pack('<Q', 0)) # no further IFD
+        f.write(struct.pack('<%sQ' % strip_count, *strip_offsets))
+        f.write(struct.pack('<%sQ' % strip_count, *strip_byte_counts))
+        f.truncate(data_offset + height * row_bytes)
+
+    return data_offset
+
+
+
+#
+# Creates the stitched image file and returns it memory-mapped as (height, width, channels)
+# array, top row first.
+#
+def create_stitched_image(filepath, width, height, dpi, dtype='uint16', file_format='TIFF', channels=4):
+    import json
+    import numpy as np
+
+    if file_format == 'TIFF':
+        offset = write_bigtiff_header(filepath, width, height, dpi, dtype, channels)
+    else:
+        offset = 0
+        with open(filepath, 'wb') as f:
+            f.truncate(width * height * channels * np.dtype(dtype).itemsize)
+        with open(filepath + '.json', 'w') as f:
+            json.dump(dict(width=width, height=height, channels=channels, dtype=np.dtype(dtype).str,
+                    dpi=dpi, row_order='top_to_bottom'), f, indent=2)
+    return np.memmap(filepath, dtype=dtype, mode='r+', offset=offset, shape=(height, width, channels))
+
+
+
+#
+# Crops the tile's overlap and writes it into the stitched image.
+# The pixels are given as (render_height, render_width, channels) floats, bottom row first
+# (as blender's image buffers are).
+#
+def stitch_tile(image, tile, pixels):
+    import numpy as np
+
+    height, width, channels = image.shape
+    left = tile.x - tile.render_x
+    bottom = tile.y - tile.render_y
+    core = pixels[bottom:bottom + tile.height, left:left + tile.width]
+    if core.shape[2] < channels:
+        # E.g. RGB tiles: opaque alpha.
+        padding = np.ones(core.shape[:2] + (channels - core.shape[2],), dtype=core.dtype)
+        core = np.concatenate((core, padding), axis=2)
+    core = core[::-1, :, :channels] # top row first
+    if image.dtype.kind != 'f':
+        maximum = np.iinfo(image.dtype).max
+        core = np.rint(np.clip(core, 0.0, 1.0) * maximum)
+    top = height - tile.y - tile.height
+    image[top:top + tile.height, tile.x:tile.x + tile.width] = core
+    image.flush() # Keep at most one tile of dirty pages.
+
+
+
+#
+# Loads a rendered tile's pixels as (height, width, channels) float array, bottom row first.
+#
+def load_tile_pixels(filepath):
+    import numpy as np
+
+    image = bpy.data.images.load(filepath)
+    try:
+        width, height = image.size
+        pixels = np.empty(width * height * image.channels, dtype=np.float32)
+        image.pixels.foreach_get(pixels)
+        return pixels.reshape(height, width, image.channels)
+    finally:
+        bpy.data.images.remove(image)
+
+
+
+#
+# Stitches the tiles rendered by render_print_tiles() according to the print settings'
+# stitch_format and stitch_depth, tagged with the print settings' dpi.
+#
+# Returns the stitched image's path or None if the tiles shall be kept as they are.
+#
+def stitch_print_tiles(scene, rendered, filepath=None):
+    ps = scene.print_settings
+    if ps.stitch_format == 'NONE' or not rendered:
+        return None
+
+    if filepath is None:
+        filepath = bpy.path.abspath(scene.render.filepath) + ('.tif' if ps.stitch_format == 'TIFF' else '.raw')
+    width = max(tile.x + tile.width for tile, path in rendered)
+    height = max(tile.y + tile.height for tile, path in rendered)
+    image = create_stitched_image(filepath, width, height, ps.dpi,
+            dtype='float32' if ps.stitch_depth == 'FLOAT32' else 'uint16', file_format=ps.stitch_format)
+    try:
+        for tile, path in rendered:
+            stitch_tile(image, tile, load_tile_pixels(path))
+    finally:
+        del image
+    return filepath
+
+
+
+#
+# POSTER SHEETS
+#
+# A print bigger than the printer's paper (e.g. an A0 plan for an office printer) is printed as a grid of
+# overlapping sheets (e.g. A4), which are trimmed and glued together. Each sheet is the part of the print's
+# pixel grid within the sheet's printable area (the sheet less the printer's margins), rendered with the
+# camera shifted like a render tile (see tile_camera()), so every sheet is exactly to scale. Neighbouring
+# sheets share overlap pixels, to glue them.
+#
+# Sheets are numbered row by row from the top left. Each sheet renders on its own: sheets without
+# geometry are skipped, sheets already rendered are not rendered again (so a poster render can be resumed)
+# and as print jobs (see poster_print_jobs()) the sheets can be rendered by several processes.
+#
+
+#
+# Splits a width_px x height_px render (with the given orthographic scale and shift) into the sheets
+# printing it, returned as Tiles (the render area being the sheet's). The sheet sizes are in m.
+#
+def solve_poster_sheets(width_px, height_px, ortho_scale, dpi, sheet_width_m, sheet_height_m,
+        overlap_m=0.0, margin_m=0.0, shift_x=0.0, shift_y=0.0):
+    sheet_width_px = m_to_pixels(sheet_width_m - 2.0 * margin_m, dpi)
+    sheet_height_px = m_to_pixels(sheet_height_m - 2.0 * margin_m, dpi)
+    overlap_px = m_to_pixels(overlap_m, dpi)
+    step_x = sheet_width_px - overlap_px
+    step_y = sheet_height_px - overlap_px
+    if step_x < 1 or step_y < 1:
+        raise ValueError("The sheet's printable area (%s x %s px) must be larger than the overlap (%s px)."
+                % (sheet_width_px, sheet_height_px, overlap_px))
+    columns = max(-(-(width_px - overlap_px) // step_x), 1)
+    rows = max(-(-(height_px - overlap_px) // step_y), 1)
+
+    sheets = []
+    for row in range(rows):
+        top = row * step_y
+        height = min(sheet_height_px, height_px - top)
+        # Pixel rows count from the bottom:
+        y = height_px - top - height
+        for column in range(columns):
+            x = column * step_x
+            width = min(sheet_width_px, width_px - x)
+            sheet_shift_x, sheet_shift_y, sheet_ortho_scale = tile_camera(x, y, width, height,
+                    width_px, height_px, ortho_scale, shift_x, shift_y)
+            sheets.append(Tile(
+                    column=column, row=row,
+                    x=x, y=y, width=width, height=height,
+                    render_x=x, render_y=y, render_width=width, render_height=height,
+                    shift_x=sheet_shift_x, shift_y=sheet_shift_y,
+                    ortho_scale=sheet_ortho_scale,
+                    ))
+    return sheets
+
+
+
+#
+# The sheets printing the scene's current camera frame with the print settings' poster options.
+#
+def poster_sheets(scene, ps=None):
+    if not ps:
+        ps = scene.print_settings
+    tipo, dim_w, dim_h = paper_presets_data[ps.poster_sheet_preset]
+    if ps.poster_sheet_orientation == "Landscape":
+        dim_w, dim_h = dim_h, dim_w
+    render = scene.render
+    camera_data = scene.camera.data
+    return solve_poster_sheets(render.resolution_x, render.resolution_y, camera_data.ortho_scale, ps.dpi,
+            dim_w / m_TO_cm, dim_h / m_TO_cm, ps.poster_overlap, ps.poster_sheet_margin,
+            camera_data.shift_x, camera_data.shift_y)
+
+
+
+#
+# The sheets any of the objects' geometry is seen on (by their bounds in the camera's frame).
+#
+def needed_poster_sheets(context, sheets, objects, depsgraph=None):
+    scene = context.scene
+    if depsgraph is None:
+        depsgraph = context.evaluated_depsgraph_get()
+    to_camera = scene.camera.matrix_world.inverted()
+    bounds = [b for b in (object_camera_bounds(obj, depsgraph, to_camera) for obj in objects) if b is not None]
+
+    needed = []
+    for sheet in sheets:
+        half_width = sheet.ortho_scale * sheet.width / max(sheet.width, sheet.height) / 2.0
+        half_height = sheet.ortho_scale * sheet.height / max(sheet.width, sheet.height) / 2.0
+        center_x = sheet.shift_x * sheet.ortho_scale
+        center_y = sheet.shift_y * sheet.ortho_scale
+        if any(b[0][0] <= center_x + half_width and b[1][0] >= center_x - half_width
+                and b[0][1] <= center_y + half_height and b[1][1] >= center_y - half_height for b in bounds):
+            needed.append(sheet)
+    return needed
+
+
+
+def sheet_filepath(filepath, sheet):
+    return "%s_sheet_%02d_%02d" % (filepath, sheet.row + 1, sheet.column + 1)
+
+
+
+#
+# Renders the poster's sheets, each to its own file (see sheet_filepath()), skipping sheets without
+# geometry (if only_needed) and sheets whose file exists. Returns the rendered and the skipped sheets.
+#
+def render_poster_sheets(context, only_needed=True, filepath=None):
+    import os
+
+    scene = context.scene
+    render = scene.render
+    if filepath is None:
+        filepath = render.filepath
+    sheets = poster_sheets(scene)
+    if only_needed:
+        objects = [obj for obj in scene.objects if obj.visible_get() and obj != scene.camera]
+        sheets = needed_poster_sheets(context, sheets, objects)
+
+    filepath_old = render.filepath
+    pending = []
+    skipped = []
+    try:
+        for sheet in sheets:
+            render.filepath = sheet_filepath(filepath, sheet)
+            if os.path.exists(bpy.path.abspath(render.frame_path(frame=scene.frame_current))):
+                skipped.append(sheet)
+            else:
+                pending.append(sheet)
+    finally:
+        render.filepath = filepath_old
+    return render_tiles(scene, pending, filepath, sheet_filepath), skipped
+
+
+
+#
+# One print job per (needed) sheet, to be run by run_print_jobs(), possibly split among several processes.
+# The output paths are derived from output like sheet_filepath() does.
+#
+def poster_print_jobs(context, blend, output, only_needed=True):
+    scene = context.scene
+    ps = scene.print_settings
+    sheets = poster_sheets(scene)
+    if only_needed:
+        objects = [obj for obj in scene.objects if obj.visible_get() and obj != scene.camera]
+        sheets = needed_poster_sheets(context, sheets, objects)
+    return [PrintJob(
+            blend=blend, output=sheet_filepath(output, sheet),
+            scene=scene.name, camera=scene.camera.name,
+            preset=ps.preset, orientation=ps.orientation, dpi=ps.dpi, scale_factor=ps.scale_factor,
+            use_margins=ps.use_margins,
+            sheet_preset=ps.poster_sheet_preset, sheet_orientation=ps.poster_sheet_orientation,
+            sheet_overlap=ps.poster_overlap, sheet_margin=ps.poster_sheet_margin,
+            sheet_row=sheet.row, sheet_column=sheet.column,
+            ) for sheet in sheets]
+
+
+
+def write_print_jobs(jobs, manifest_path):
+    import json
+
+    with open(manifest_path, 'w') as f:
+        json.dump(dict(jobs=[dict((key, value) for key, value in job._asdict().items() if value is not None)
+                for job in jobs]), f, indent=2)
+
+
+
+#
+# SCENE FINGERPRINT
+#
+# A hash of what the render sees of the objects it renders (see render_objects()): their transforms,
+# evaluated vertex positions, materials (settings, shader nodes and their images, see node_tree_settings()),
+# light settings and modifier settings. Each object's geometry digest is kept and
+# only hashed again once its geometry changed (as counted by bounds_depsgraph_update()) or its modifiers
+# differ, the vertex positions are read with foreach_get into a reused buffer and streamed into the hash
+# without copies. Thus fingerprinting a 10M vertex scene takes a fraction of a second, and repeatedly only the
+# edited objects cost anything.
+#
+FINGERPRINT_VERSION = 2
+
+# Light settings seen by the render (those a light type lacks are None):
+LIGHT_SETTINGS = ('type', 'energy', 'color', 'shadow_soft_size', 'size', 'size_y', 'shape', 'spot_size', 'spot_blend',
+        'angle', 'use_shadow', 'specular_factor', 'diffuse_factor', 'volume_factor', 'use_nodes')
+
+# Object pointer -> (validity, geometry digest), see geometry_fingerprint() and object_identity():
+object_digests = {}
+
+# Reused for reading vertex positions, grown as needed:
+vertex_buffer = [None]
+
+
+
+def get_vertex_buffer(count):
+    import numpy as np
+
+    if vertex_buffer[0] is None or len(vertex_buffer[0]) < count * 3:
+        vertex_buffer[0] = np.empty(max(count * 3, 1024), dtype=np.float32)
+    return vertex_buffer[0][:count * 3]
+
+
+
+#
+# The settings of an RNA struct (e.g. a modifier) as tuple of (identifier, value), IDs by name.
+#
+def rna_settings(struct):
+    values = []
+    for prop in struct.bl_rna.properties:
+        if prop.identifier == 'rna_type' or prop.type == 'COLLECTION':
+            continue
+        value = getattr(struct, prop.identifier, None)
+        if prop.type == 'POINTER':
+            value = value.name if isinstance(value, bpy.types.ID) else None
+        elif getattr(prop, 'is_array', False):
+            value = tuple(value)
+        values.append((prop.identifier, value))
+    return tuple(values)
+
+
+
+def material_settings(material):
+    if material is None:
+        return None
+    settings = [material.name, tuple(material.diffuse_color), material.metallic, material.roughness]
+    if material.use_nodes:
+        settings.append(node_tree_settings(material.node_tree))
+    return tuple(settings)
+
+
+
+def light_settings(light):
+    settings = [light.name]
+    for name in LIGHT_SETTINGS:
+        value = getattr(light, name, None)
+        settings.append(tuple(value) if hasattr(value, '__len__') and not isinstance(value, str) else value)
+    if getattr(light, 'use_nodes', False):
+        settings.append(node_tree_settings(light.node_tree))
+    return tuple(settings)
+
+
+
+def world_settings(world):
+    if world is None:
+        return None
+    settings = [world.name, tuple(world.color), world.use_nodes]
+    if world.use_nodes:
+        settings.append(node_tree_settings(world.node_tree))
+    return tuple(settings)
+
+
+
+#
+# The settings of a node tree: per node its unlinked inputs' values and its own settings (e.g. the blend
+# type, a color ramp's stops, an image or a group's node tree), and the links.
+#
+def node_tree_settings(node_tree, trees=None):
+    if node_tree is None:
+        return None
+    if trees is None:
+        trees = set()
+    if node_tree.name in trees: # A group used several times.
+        return node_tree.name
+    trees.add(node_tree.name)
+    settings = [node_tree.name]
+    for node in node_tree.nodes:
+        settings.append((node.bl_idname, node.name, node_settings(node, trees), tuple(
+                (socket.identifier, tuple(socket.default_value) if hasattr(socket.default_value, '__len__')
+                    else socket.default_value)
+                for socket in node.inputs if not socket.is_linked and hasattr(socket, 'default_value'))))
+    settings.extend((link.from_node.name, link.from_socket.identifier, link.to_node.name, link.to_socket.identifier)
+            for link in node_tree.links)
+    return tuple(settings)
+
+
+
+#
+# The properties a node type adds to those of all nodes (e.g. blend_type, image, color_ramp, node_tree),
+# as tuple of (identifier, value).
+#
+def node_settings(node, trees):
+    values = []
+    for prop in node.bl_rna.properties:
+        if prop.identifier in node_base_properties() or prop.type == 'COLLECTION':
+            continue
+        value = getattr(node, prop.identifier, None)
+        if isinstance(value, bpy.types.Image):
+            value = image_settings(value)
+        elif isinstance(value, bpy.types.NodeTree):
+            value = node_tree_settings(value, trees)
+        elif isinstance(value, bpy.types.ColorRamp):
+            value = (value.color_mode, value.interpolation, value.hue_interpolation,
+                    tuple((element.position, tuple(element.color)) for element in value.elements))
+        elif isinstance(value, bpy.types.CurveMapping):
+            value = (tuple(value.black_level), tuple(value.white_level), tuple(
+                    tuple((tuple(point.location), point.handle_type) for point in curve.points) for curve in value.curves))
+        elif prop.type == 'POINTER':
+            value = value.name if isinstance(value, bpy.types.ID) else (rna_settings(value) if value is not None else None)
+        elif getattr(prop, 'is_array', False):
+            value = tuple(value)
+        values.append((prop.identifier, value))
+    return tuple(values)
+
+
+
+@functools.lru_cache(maxsize=1)
+def node_base_properties():
+    return frozenset(prop.identifier for prop in bpy.types.Node.bl_rna.properties)
+
+
+
+#
+# What a render sees of an image: its source and color space, and its file's size and modification time
+# (or its pixels if they were edited in blender and not saved).
+#
+def image_settings(image):
+    import os
+    import hashlib
+    import numpy as np
+
+    settings = [image.name, image.source, image.filepath, image.colorspace_settings.name,
+            getattr(image, 'alpha_mode', None), bool(image.packed_file)]
+    if image.source == 'GENERATED':
+        settings.extend((image.generated_type, tuple(image.generated_color), image.generated_width, image.generated_height))
+    elif not image.packed_file:
+        try:
+            stat = os.stat(bpy.path.abspath(image.filepath, library=image.library))
+            settings.extend((stat.st_size, stat.st_mtime_ns))
+        except OSError:
+            settings.append(None)
+    if image.is_dirty:
+        pixels = np.empty(len(image.pixels), dtype=np.float32)
+        image.pixels.foreach_get(pixels)
+        settings.append(hashlib.blake2b(pixels, digest_size=20).hexdigest())
+    return tuple(settings)
+
+
+
+#
+# The digest of an object as the render sees it, see SCENE FINGERPRINT.
+#
+def object_fingerprint(obj, depsgraph, frame=None, materials=None):
+    import hashlib
+    import numpy as np
+
+    if materials is None:
+        materials = {}
+    obj_eval = obj.evaluated_get(depsgraph)
+    for slot in obj.material_slots:
+        if slot.material and slot.material.name not in materials:
+            materials[slot.material.name] = material_settings(slot.material)
+    digest = hashlib.blake2b(repr((FINGERPRINT_VERSION, obj.name,
+            tuple(materials.get(slot.material.name) if slot.material else None for slot in obj.material_slots),
+            light_settings(obj.data) if obj.type == 'LIGHT' else None,
+            )).encode(), digest_size=20)
+    digest.update(np.array(obj_eval.matrix_world, dtype=np.float64).tobytes())
+    digest.update(geometry_fingerprint(obj, obj_eval, frame).encode())
+    return digest.hexdigest()
+
+
+
+#
+# The digest of an object's evaluated geometry, hashed again only once it may have changed.
+#
+def geometry_fingerprint(obj, obj_eval, frame=None):
+    import hashlib
+
+    key = obj.as_pointer()
+    data = obj.data
+    inputs = repr((obj.type, data.name if data else None,
+            tuple((modifier.type, rna_settings(modifier)) for modifier in obj.modifiers)))
+    # The frame matters as animated modifiers or shape keys change the geometry without a depsgraph update,
+    # the identity as the pointer may be reused by another object:
+    validity = (object_identity(obj), geometry_versions.get(key, 0), frame, inputs)
+    cached = object_digests.get(key)
+    if cached and cached[0] == validity:
+        return cached[1]
+
+    digest = hashlib.blake2b(inputs.encode(), digest_size=20)
+    if obj_eval.type == 'MESH':
+        co = get_vertex_buffer(len(obj_eval.data.vertices))
+        obj_eval.data.vertices.foreach_get("co", co)
+        digest.update(co)
+    else:
+        co = object_vertex_coordinates(obj_eval)
+        if co is not None:
+            digest.update(co)
+    object_digests[key] = (validity, digest.hexdigest())
+    return object_digests[key][1]
+
+
+
+#
+# The fingerprint of the scene's rendered objects (or the given objects), see SCENE FINGERPRINT.
+#
+def scene_fingerprint(scene, depsgraph=None, objects=None):
+    import hashlib
+
+    digest = hashlib.blake2b(digest_size=20)
+    for name, fingerprint in sorted(object_fingerprints(scene, depsgraph, objects).items()):
+        digest.update(fingerprint.encode())
+    return digest.hexdigest()
+
+
+
+#
+# The objects the render of the view layer (the scene's first by default) includes: those of its collections
+# enabled in renders (see a collection's hide_render, also hiding its children), not hidden in renders
+# themselves. Unlike visible_get(), hiding objects or collections in the viewport doesn't matter.
+#
+def render_objects(scene, view_layer=None):
+    if view_layer is None:
+        view_layer = scene.view_layers[0]
+    rendered = set()
+    collections = [scene.collection]
+    while collections:
+        collection = collections.pop()
+        if collection.hide_render:
+            continue
+        rendered.update(collection.objects)
+        collections.extend(collection.children)
+    return [obj for obj in view_layer.objects if not obj.hide_render and obj in rendered]
+
+
+
+#
+# The fingerprints of the scene's rendered objects (or the given objects) by object name.
+#
+def object_fingerprints(scene, depsgraph=None, objects=None):
+    if depsgraph is None:
+        depsgraph = scene_depsgraph(scene)
+    if objects is None:
+        objects = render_objects(scene)
+    materials = {}
+    return dict((obj.name, object_fingerprint(obj, depsgraph, scene.frame_current, materials)) for obj in objects)
+
+
+
+# Undo and loading files reallocate the objects:
+@persistent
+def fingerprint_load_post(*args):
+    object_digests.clear()
+
+
+
+#
+# The scene's evaluated depsgraph, also for scenes other than the context's (e.g. in print jobs).
+#
+def scene_depsgraph(scene):
+    if bpy.context.scene == scene:
+        return bpy.context.evaluated_depsgraph_get()
+    depsgraph = scene.view_layers[0].depsgraph
+    depsgraph.update()
+    return depsgraph
+
+
+
+#
+# RENDER CACHE
+#
+# Renders are stored in a directory under a hash of everything they depend on (see render_cache_key()):
+# the scene fingerprint (see SCENE FINGERPRINT), the camera, the world, the color management and the
+# render settings (i.e. the solved resolution, orthographic scale and shift, the border). A render with the
+# same key is not rendered again,
+# its image is copied from the cache. E.g. re-exporting a sheet after changing back a margin, or rendering
+# sheets that did not change after editing another part of the plan, costs no render.
+#
+# The cache's least recently used images are evicted beyond its size limit. Several processes (e.g. print
+# job workers) may share the directory: images are written to a temporary file and renamed into place
+# atomically, eviction is serialized by a lock file, and an image evicted while being read is a miss.
+#
+RENDER_CACHE_VERSION = 3
+RENDER_CACHE_LOCK = ".lock"
+
+
+
+#
+# The cache key of rendering the scene as currently set up, see RENDER CACHE.
+#
+def render_cache_key(scene, depsgraph=None):
+    import hashlib
+
+    if depsgraph is None:
+        depsgraph = scene_depsgraph(scene)
+    digest = hashlib.blake2b(digest_size=20)
+    digest.update(render_settings_key(scene).encode())
+    digest.update(scene_fingerprint(scene, depsgraph).encode())
+    return digest.hexdigest()
+
+
+
+#
+# The digest of the camera, the world and the render and color management settings, i.e. of everything
+# the render depends on but the rendered objects.
+#
+def render_settings_key(scene):
+    import hashlib
+    import numpy as np
+
+    render = scene.render
+    image_settings = render.image_settings
+    view_settings = scene.view_settings
+    camera = scene.camera
+    digest = hashlib.blake2b(digest_size=20)
+    digest.update(repr((RENDER_CACHE_VERSION,
+            render.resolution_x, render.resolution_y, render.resolution_percentage, render.engine,
+            render_samples(scene), scene.frame_current, getattr(render, 'film_transparent', None),
+            image_settings.file_format, image_settings.color_depth, getattr(image_settings, 'color_mode', None),
+            render.use_border, render.border_min_x, render.border_min_y, render.border_max_x, render.border_max_y,
+            render.use_crop_to_border,
+            view_settings.view_transform, view_settings.look, view_settings.exposure, view_settings.gamma,
+            scene.display_settings.display_device,
+            world_settings(scene.world),
+            )).encode())
+    if camera:
+        camera_data = camera.data
+        digest.update(repr(tuple(getattr(camera_data, name, None) for name in (
+                'type', 'ortho_scale', 'lens', 'shift_x', 'shift_y', 'sensor_fit', 'clip_start', 'clip_end'))).encode())
+        digest.update(np.array(camera.matrix_world, dtype=np.float64).tobytes())
+    return digest.hexdigest()
+
+
+
+class RenderCache:
+    def __init__(self, directory, max_bytes):
+        import os
+
+        self.directory = bpy.path.abspath(directory)
+        self.max_bytes = max_bytes
+        os.makedirs(self.directory, exist_ok=True)
+
+    def path(self, key, extension):
+        import os
+
+        return os.path.join(self.directory, key + extension)
+
+    #
+    # Copies the cached image to filepath, returns False if there is none.
+    #
+    def fetch(self, key, extension, filepath):
+        import os
+        import shutil
+
+        path = self.path(key, extension)
+        try:
+            shutil.copyfile(path, filepath)
+            os.utime(path) # Recently used.
+        except OSError: # Not cached or evicted meanwhile.
+            return False
+        return True
+
+    def store(self, key, extension, filepath):
+        import os
+        import shutil
+        import tempfile
+
+        descriptor, temporary = tempfile.mkstemp(dir=self.directory, prefix=".", suffix=extension)
+        os.close(descriptor)
+        try:
+            shutil.copyfile(filepath, temporary)
+            os.replace(temporary, self.path(key, extension))
+        except OSError:
+            if os.path.exists(temporary):
+                os.remove(temporary)
+            raise
+        self.evict()
+
+    #
+    # Removes the least recently used images beyond the size limit (temporary files of other processes
+    # are left alone).
+    #
+    def evict(self):
+        import os
+
+        with open(os.path.join(self.directory, RENDER_CACHE_LOCK), 'a+') as lock:
+            file_lock(lock)
+            entries = []
+            for entry in os.scandir(self.directory):
+                if entry.name.startswith(".") or not entry.is_file():
+                    continue
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+            total = sum(size for mtime, size, path in entries)
+            for mtime, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                except OSError: # E.g. being read on Windows.
+                    continue
+                total -= size
+
+
+
+#
+# Locks a file exclusively until it is closed.
+#
+def file_lock(f):
+    try:
+        import fcntl
+    except ImportError:
+        import msvcrt
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+    else:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+
+
+
+def render_cache(scene):
+    ps = scene.print_settings
+    if not ps.use_render_cache:
+        return None
+    return RenderCache(ps.render_cache_dir, ps.render_cache_size_mb * 1024 * 1024)
+
+
+
+#
+# Renders the scene's still image to its output path, through the render cache if enabled (see
+# RENDER CACHE). Returns the image's path and whether it came from the cache.
+#
+def render_still(scene, cache=None):
+    import os
+
+    filepath = bpy.path.abspath(scene.render.frame_path(frame=scene.frame_current))
+    if cache is None:
+        bpy.ops.render.render(write_still=True, scene=scene.name)
+        return filepath, False
+    extension = os.path.splitext(filepath)[1]
+    key = render_cache_key(scene)
+    if cache.fetch(key, extension, filepath):
+        log.info("Render cache hit %s: %s", key, filepath)
+        return filepath, True
+    bpy.ops.render.render(write_still=True, scene=scene.name)
+    cache.store(key, extension, filepath)
+    return filepath, False
+
+
+
+#
+# ANNOTATION RE-RENDER
+#
+# Annotations (the scale ratio text and the other objects placed within the render area, i.e. parented
+# to the camera) change far more often than the model they annotate, e.g. a reworded title or a moved
+# legend. If only annotations changed since the output image was rendered, just the pixels they covered
+# before and cover now are rendered again and patched into the image. Each such region is rendered like a
+# render tile (see tile_camera()), so its pixels are those of a full render. On a 20k pixel print this
+# turns most of an hour of rendering into seconds.
+#
+# What changed is told by the render record kept next to the output image (see render_record()): the
+# render settings key (camera, world, color management and render settings), the rendered objects'
+# fingerprints (see SCENE FINGERPRINT, lights included), the annotations' pixel rectangles, found from their
+# bounds in the camera's frame like needed_poster_sheets() does, and the size and modification time of the
+# image. Any other change (the model, a light, the camera, the render settings, the image written by
+# something else) or a missing or incomplete record means a full render.
+#
+# Annotations are assumed to be seen directly only, not in shadows or reflections on the model, which holds
+# for annotations in front of the model as position_within_render() places them.
+#
+# Images of a lossy file format are always rendered fully, as patching re-encodes the whole image and it
+# would lose quality with every edit. So are renders through the compositor: its effects spreading pixels
+# (e.g. glare, blur, denoising) make a region's pixels differ from those of a full render.
+#
+RENDER_RECORD_VERSION = 2
+LOSSY_FILE_FORMATS = ('JPEG', 'JPEG2000', 'WEBP', 'AVI_JPEG', 'FFMPEG')
+RENDER_RECORD_SUFFIX = ".render.json"
+
+# Pixels around an annotation's bounds rendered again, and around a region rendered but not patched in,
+# covering antialiasing and the pixel filter:
+REGION_PADDING_PX = 4
+
+
+
+def is_annotation(scene, obj):
+    return ((scene.camera is not None and obj.parent == scene.camera)
+            or obj == scene.print_settings.scale_ratio_text_object)
+
+
+
+#
+# The pixel rectangle [x, y, width, height] (from the bottom left) an object covers in the render of the
+# scene's orthographic camera, padded by REGION_PADDING_PX. None if it is not seen.
+#
+def object_pixel_rect(scene, obj, depsgraph, to_camera):
+    import math
+
+    bounds = object_camera_bounds(obj, depsgraph, to_camera)
+    if bounds is None:
+        return None
+    width_px = scene.render.resolution_x
+    height_px = scene.render.resolution_y
+    camera_data = scene.camera.data
+    m_per_px = camera_data.ortho_scale / max(width_px, height_px)
+    center_x = camera_data.shift_x * camera_data.ortho_scale
+    center_y = camera_data.shift_y * camera_data.ortho_scale
+    left = max(math.floor((bounds[0][0] - center_x) / m_per_px + width_px / 2.0) - REGION_PADDING_PX, 0)
+    right = min(math.ceil((bounds[1][0] - center_x) / m_per_px + width_px / 2.0) + REGION_PADDING_PX, width_px)
+    bottom = max(math.floor((bounds[0][1] - center_y) / m_per_px + height_px / 2.0) - REGION_PADDING_PX, 0)
+    top = min(math.ceil((bounds[1][1] - center_y) / m_per_px + height_px / 2.0) + REGION_PADDING_PX, height_px)
+    if left >= right or bottom >= top:
+        return None # Outside the render area.
+    return [left, bottom, right - left, top - bottom]
+
+
+
+#
+# The record of rendering the scene as currently set up, see ANNOTATION RE-RENDER.
+#
+def render_record(scene, depsgraph=None):
+    if depsgraph is None:
+        depsgraph = scene_depsgraph(scene)
+    objects = render_objects(scene)
+    to_camera = scene.camera.matrix_world.inverted()
+    return dict(
+            version=RENDER_RECORD_VERSION,
+            settings=render_settings_key(scene),
+            objects=object_fingerprints(scene, depsgraph, objects),
+            annotations=dict((obj.name, object_pixel_rect(scene, obj, depsgraph, to_camera))
+                    for obj in objects if is_annotation(scene, obj)),
+            )
+
+
+
+def read_render_record(filepath):
+    import json
+
+    try:
+        with open(filepath + RENDER_RECORD_SUFFIX) as f:
+            record = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return record if record.get('version') == RENDER_RECORD_VERSION else None
+
+
+
+#
+# Writes the record of the image at filepath, once the image is written.
+#
+def write_render_record(filepath, record):
+    import json
+
+    with open(filepath + RENDER_RECORD_SUFFIX, 'w') as f:
+        json.dump(dict(record, image=image_file_stat(filepath)), f, indent=2, sort_keys=True)
+
+
+
+#
+# The size and modification time of an image file, None if there is none.
+#
+def image_file_stat(filepath):
+    import os
+
+    try:
+        stat = os.stat(filepath)
+    except OSError:
+        return None
+    return [stat.st_size, stat.st_mtime_ns]
 
 
 
-class OBJECT_OT_position_in_top_left_corner(Operator):
-    bl_idname = "object.position_in_top_left_corner"
-    bl_label = "Position in top left corner."
-    bl_description = "Position within render, in the top left corner."
-    bl_options = {'REGISTER', 'UNDO'}
+#
+# The pixel rectangles to render again for the image at filepath to show the scene as in the given record
+# (see render_record()). An empty list if nothing changed, None if the image needs a full render.
+#
+def changed_regions(scene, filepath, record):
+    previous = read_render_record(filepath)
+    if (previous is None or not render_record_complete(previous) or previous['settings'] != record['settings']
+            or previous['image'] != image_file_stat(filepath)
+            or scene.camera.data.type != 'ORTHO' or scene.render.resolution_percentage != 100
+            or scene.render.image_settings.file_format in LOSSY_FILE_FORMATS
+            or (scene.render.use_compositing and scene.use_nodes and scene.node_tree)):
+        return None
+    objects = record['objects']
+    previous_objects = previous['objects']
+    rects = []
+    for name in sorted(set(objects) | set(previous_objects)):
+        if objects.get(name) == previous_objects.get(name):
+            continue
+        if name not in record['annotations'] and name not in previous['annotations']:
+            return None # The model changed.
+        rects.extend(rect for rect in (previous['annotations'].get(name), record['annotations'].get(name)) if rect)
+    return merge_rects(rects)
+
+
+
+def render_record_complete(record):
+    return (bool(record.get('settings')) and record.get('image') is not None
+            and isinstance(record.get('objects'), dict) and isinstance(record.get('annotations'), dict)
+            and all(record['objects'].values()))
 
-    def execute(self, context):#, text_object, text=""):
-        return position_in_top_left_corner(context)
 
 
+#
+# Merges overlapping rectangles [x, y, width, height] into their bounding rectangles.
+#
+def merge_rects(rects):
+    merged = []
+    for x, y, width, height in rects:
+        left, bottom, right, top = x, y, x + width, y + height
+        i = 0
+        while i < len(merged):
+            other = merged[i]
+            if left < other[2] and other[0] < right and bottom < other[3] and other[1] < top:
+                left, bottom = min(left, other[0]), min(bottom, other[1])
+                right, top = max(right, other[2]), max(top, other[3])
+                del merged[i]
+                i = 0 # The grown rectangle may overlap ones already passed.
+            else:
+                i += 1
+        merged.append((left, bottom, right, top))
+    return [[left, bottom, right - left, top - bottom] for left, bottom, right, top in merged]
 
-class OBJECT_OT_position_in_top_right_corner(Operator):
-    bl_idname = "object.position_in_top_right_corner"
-    bl_label = "Position in top right corner."
-    bl_description = "Position within render, in the top right corner."
-    bl_options = {'REGISTER', 'UNDO'}
 
-    def execute(self, context):
-        return position_in_top_right_corner(context)
 
+#
+# The regions as Tiles of the scene's render, each rendered with REGION_PADDING_PX around it.
+#
+def region_tiles(scene, regions):
+    width_px = scene.render.resolution_x
+    height_px = scene.render.resolution_y
+    camera_data = scene.camera.data
+    tiles = []
+    for index, (x, y, width, height) in enumerate(regions):
+        render_x = max(x - REGION_PADDING_PX, 0)
+        render_y = max(y - REGION_PADDING_PX, 0)
+        render_width = min(x + width + REGION_PADDING_PX, width_px) - render_x
+        render_height = min(y + height + REGION_PADDING_PX, height_px) - render_y
+        shift_x, shift_y, ortho_scale = tile_camera(render_x, render_y, render_width, render_height,
+                width_px, height_px, camera_data.ortho_scale, camera_data.shift_x, camera_data.shift_y)
+        tiles.append(Tile(
+                column=index, row=0,
+                x=x, y=y, width=width, height=height,
+                render_x=render_x, render_y=render_y, render_width=render_width, render_height=render_height,
+                shift_x=shift_x, shift_y=shift_y,
+                ortho_scale=ortho_scale,
+                ))
+    return tiles
+
+
+
+def region_filepath(filepath, tile):
+    return "%s_region_%03d" % (filepath, tile.column)
 
 
-class OBJECT_OT_position_in_bottom_right_corner(Operator):
-    bl_idname = "object.position_in_bottom_right_corner"
-    bl_label = "Position in bottom right corner."
-    bl_description = "Position within render, in the bottom right corner."
-    bl_options = {'REGISTER', 'UNDO'}
 
-    def execute(self, context):#, text_object, text=""):
-        return position_in_bottom_right_corner(context)
+#
+# Writes the rendered tiles' pixels (cropped to the tiles like stitch_tile() does) into the image at
+# filepath, which is saved in its own format.
+#
+def patch_image(filepath, rendered):
+    import numpy as np
+
+    image = bpy.data.images.load(filepath)
+    try:
+        width, height = image.size
+        channels = image.channels
+        pixels = np.empty(width * height * channels, dtype=np.float32)
+        image.pixels.foreach_get(pixels)
+        pixels = pixels.reshape(height, width, channels) # bottom row first
+        for tile, path in rendered:
+            left = tile.x - tile.render_x
+            bottom = tile.y - tile.render_y
+            core = load_tile_pixels(path)[bottom:bottom + tile.height, left:left + tile.width]
+            if core.shape[2] < channels:
+                # E.g. RGB tiles: opaque alpha.
+                padding = np.ones(core.shape[:2] + (channels - core.shape[2],), dtype=core.dtype)
+                core = np.concatenate((core, padding), axis=2)
+            pixels[tile.y:tile.y + tile.height, tile.x:tile.x + tile.width] = core[:, :, :channels]
+        image.pixels.foreach_set(pixels.ravel())
+        image.save()
+    finally:
+        bpy.data.images.remove(image)
 
 
 
-class OBJECT_OT_position_in_bottom_left_corner(Operator):
-    bl_idname = "object.position_in_bottom_left_corner"
-    bl_label = "Position in bottom left corner."
-    bl_description = "Position within render, in the bottom left corner."
-    bl_options = {'REGISTER', 'UNDO'}
+#
+# Renders the scene's still image to its output path like render_still(), but only the annotations'
+# regions if nothing else changed since it was last rendered (with the region render option, see
+# ANNOTATION RE-RENDER). Returns the image's path, how it was made ('RENDERED', 'CACHED', 'REGIONS' or
+# 'UNCHANGED') and the regions rendered again as Tiles.
+#
+def render_print_still(scene, cache=None):
+    import os
+
+    if not scene.print_settings.use_region_render:
+        filepath, cached = render_still(scene, cache)
+        return filepath, 'CACHED' if cached else 'RENDERED', []
+
+    depsgraph = scene_depsgraph(scene)
+    filepath = bpy.path.abspath(scene.render.frame_path(frame=scene.frame_current))
+    record = render_record(scene, depsgraph)
+    regions = changed_regions(scene, filepath, record)
+    tiles = []
+    if regions is None:
+        if os.path.exists(filepath + RENDER_RECORD_SUFFIX):
+            # Not valid anymore, even if the render fails:
+            os.remove(filepath + RENDER_RECORD_SUFFIX)
+        filepath, cached = render_still(scene, cache)
+        status = 'CACHED' if cached else 'RENDERED'
+    elif not regions:
+        status = 'UNCHANGED'
+    else:
+        tiles = region_tiles(scene, regions)
+        rendered = render_tiles(scene, tiles, scene.render.filepath, region_filepath)
+        try:
+            patch_image(filepath, rendered)
+        finally:
+            for tile, path in rendered:
+                os.remove(path)
+        if cache is not None:
+            cache.store(render_cache_key(scene, depsgraph), os.path.splitext(filepath)[1], filepath)
+        status = 'REGIONS'
+    write_render_record(filepath, record)
+    return filepath, status, tiles
 
-    def execute(self, context):#, text_object, text=""):
-        return position_in_bottom_left_corner(context)
 
 
 
-class RENDER_OT_ensure_height(Operator):
-    bl_idname = "render.ensure_height"
-    bl_label = "Ensure a certain printed height."
-    bl_description = "Set the dimensions of a text object such that it is printed out in a certain height."
-    bl_options = {'REGISTER', 'UNDO'}
 
-    def execute(self, context):#, resulting_height, obj):
-        return ensure_height(obj=bpy.context.active_object, print_settings=context.scene.print_settings)
 
+def getLastObjectInSelection(context):
+    return context.selected_objects[len(context.selected_objects) - 1]
 
 
 
 
+#
+# HEADLESS BATCH RENDERING
+#
+# Renders print jobs listed in a JSON or CSV manifest in background mode, e.g.:
+#   blender -b -P render_to_print.py -- --manifest jobs.json --report report.json
+#
+# Each job (JSON object or CSV row) has the fields of PrintJob. Relative blend and output paths
+# are resolved relative to the manifest. Jobs sharing a .blend file are grouped, so each file
+# is loaded only once. Jobs with a sheet preset render a single poster sheet (see POSTER SHEETS).
+# With --resume, jobs whose output file exists are skipped.
+#
+PrintJob = namedtuple('PrintJob', (
+        'blend', 'output',
+        'scene', 'camera',
+        'preset', 'orientation', 'dpi', 'scale_factor',
+        'use_margins',
+        'tile_memory_mb',
+        'sheet_preset', 'sheet_orientation', 'sheet_overlap', 'sheet_margin', 'sheet_row', 'sheet_column',
+        ), defaults=(
+        None, None,
+        "A4_21.0_29.7", "Portrait", 300, 1.0,
+        None,
+        None,
+        None, "Portrait", 0.0, 0.0, 0, 0,
+        ))
 
-class RenderPrintSettings(PropertyGroup):
-    update_manually = BoolProperty(
-            name="Update manually"
-            ,description="If enabled apply settings manually instead of realtime update."
-            ,default=False
-            ,update=update_settings_cb
-    )
 
-    unit_from = EnumProperty(
-            name="Set from",
-            description="Set from",
-            items=(
-                ("CM_TO_PIXELS", "CM -> Pixel", "Centermeters to Pixels"),
-                ("PIXELS_TO_CM", "Pixel -> CM", "Pixels to Centermeters")
-                ),
-            default="CM_TO_PIXELS",
-            )
-    orientation = EnumProperty(
-            name="Page Orientation",
-            description="Set orientation",
-            items=(
-                ("Portrait", "Portrait", "Portrait"),
-                ("Landscape", "Landscape", "Landscape")
-            ),
-            default="Portrait",
-            update=update_settings_cb,
-            )
-    preset = EnumProperty(
-            name="Select Preset",
-            description="Select from preset",
-            items=paper_presets,
-            default="custom_1_1",
-            update=update_settings_cb,
-            )
-    dpi = IntProperty(
-            name="DPI",
-            description="Dots per Inch",
-            default=300,
-            min=72, max=1800,
-            update=update_settings_cb,
-            )
-    width_cm = FloatProperty(
-            name="Width",
-            description="Width in CM",
-            default=5.0,
-            min=1.0, max=100000.0,
-            update=update_settings_cb,
-            )
-    height_cm = FloatProperty(
-            name="Height",
-            description="Height in CM",
-            default=3.0,
-            min=1.0, max=100000.0,
-            update=update_settings_cb,
-            )
-    width_px = IntProperty(
-            name="Pixel Width",
-            description="Pixel Width",
-            default=900,
-            min=4, max=10000,
-            update=update_settings_cb,
-            )
-    height_px = IntProperty(
-            name="Pixel Height",
-            description="Pixel Height",
-            default=600,
-            min=4, max=10000,
-            update=update_settings_cb,
-            )
-    #PRINT TO SCALE
-    print_to_scale = BoolProperty(
-            name="Print to scale"
-            ,description="Print to scale by automatically calculate the correct distance of the camera to the object or the center of scene."
-            ,default=True
-            #,update=print2scale_reset_camera_focal_length_or_orthographic_scale
-    )
-    # Remapping probably will lead to much confusion. e.g. model 10 -> 1 on the plan means the output will be a model copy 10 times smaller.
-    # Many architects will accidentally fill in 1:10 instead because they forget that here the ratio is (model:plan) and not (plan:model) like printed
-    # on the plan. So unfortunately this will cost a lot of trees as the prints in that a size will be rendered useless.
-    # => SO NOW WE USE SCALE FACTOR ONLY! THAT'S MUCH MORE INTUITIVE AND IS NOTHING ELSE than print ratio but without the confusion.
-    #in_print2scale_scale_remap_source_model = IntProperty(
-    #        name="Model - Print ratio denominator (Model, Map source)"
-    #        ,description="If the model value is greater than the real world value (e.g. 2:1) then the printed output will be scaled down to 1/2 the model size. is e.g. 10 and the real world value 1, then we have a print ratio of 10:1, that is 10 model units print to 1 real world unit. So a 10m model becomes 1m. Thus the printed plan is to scale in a ratio of 1:10 (while the model is in the opposite ratio of 10:1)."
-    #        ,default=1
-    #        ,min=1
-    #        ,max=10000
-    #        ,update=print2scale_recalculate_camera_focal_length_or_orthographic_scale
-    #)
-    #in_print2scale_scale_remap_target_printed = IntProperty(
 
-    # NOTE:
-    # The print ratio is nothing else than a scale factor. E.g. 1:10 on a plan means the original real measurements are scaled down by factor 10.
-    # ATTENTION:
-    # Precondition is that the 3D model must be modelled to scale. Only then printing a plan to scale, scaled down or up, gives meaningful dimensions.
-    # E.g. if a 1m long wing is modelled with 1mm length in blender instead, then it has to be printed with a 1000:1 for a 1:1 scale on a 1m sheet
-    # or 100:1 on a 1/10m sheet, resulting in a factor of 1:10. Unfortunately the program can't know if the model now really is that small (1mm) or
-    # not and labels the plan as 100:1 in scale - obviously confusing all engineers and architects involved.
-    # Either scaling the model up or changing the unit settings scale can solve this. From experience the first approach can prove difficult
-    # as this can lead to strange behaviour of modifiers and any kind of relationsships of objects of the model - often messing up the complete model.
-    # The latter - changing the unit settings - is okay, but results in modularity problems if this setting is different in each scene,
-    # so when finally importing one model into another scene, a lot of new problems arise. Also problematic are discrepancies in the grid and blender's
-    # buildin-measurement functionality (N panel, e.g. edge info) as well as the bullet engine or other features that rely on physically accurate units
-    # (and from what reason ever (there are plenty!) don't take the unit scale into account correctly).
-    # The loss of modularity is such a big problem that it's good to know that all this trouble can be avoided by simply modelling to scale.
-    # (While model accuracy might prove inaccurate if modelling to scale without scaling up the model as the grids resolution is limited! So there is no silverbullet.)
-    scale_factor = FloatProperty(
-            name="Print scale factor"
-            ,description="Scale big models down (scale factor <1) or tiny models up (scale factor >1). E.g. 10 results in scaling up tenfold, a 1meter model will fill 10m on a giant sheet of papyrus when printed out with this setting. On the other hand 0.1 = 1/10 results in a 1:10 plan being printed."
-            ,default=1
-            ,min=0.00000001 #If zero is possible, problems will arise due to division by zero!
-            ,max=10000
-            ,update=print2scale_recalculate_camera_focal_length_or_orthographic_scale
-    )
-    #cache_scale_ratio_text_object = None # ObjectProperty or ReferenceProperty
-    add_scale_ratio_text = BoolProperty(
-            name="Add scale ratio text."
-            ,description="Whether to add a text representation of the scale factor (as ratio) or not."
-            ,default=True
-            ,update=print2scale#_reset_camera_focal_length_or_orthographic_scale
-    )
-    # Remapping probably will lead to much confusion. e.g. model 10 -> 1 on the plan means the output will be a model copy 10 times smaller.
-    # Many architects will accidentally fill in 1:10 instead because they forget that here the ratio is (model:plan) and not (plan:model) like printed
-    text_height = FloatProperty(
-            name="Text height."
-            ,description="Text height as printed. Given in Standard International units. Defaults to 1cm if zero."
-            ,default=.005 # m = .5cm = 5mm
-            ,min=0.0
-            ,max=100.0 # 100m is quite huge already, even for graffity.
-            #,update=ensure_height <- if text object is selected and active.
-            ,update=update_settings_cb
-    )
+def parse_bool(value):
+    if isinstance(value, str):
+        return value.strip().lower() in ("1", "true", "yes", "on")
+    return bool(value)
 
-    # Margins for printers that require a blank border (due to technical or visual reasons):
-    use_margins = BoolProperty(
-            name="Use margins"
-            ,description="Calculate the render size such that margins won't be rendered (results in smaller rendered image)."
-            ,default=True
-            ,update=update_settings_cb
-    )
-    margin_top = FloatProperty(
-            name="Top margin"
-            ,description="Blank space from the top paper edge."
-            ,default=.015 # 1.5cm  #1 # 1%
-            ,min=0.0
-            ,max=100.0
-            ,update=update_settings_cb
-    )
-    margin_right = FloatProperty(
-            name="Right margin"
-            ,description="Blank space from the right paper edge."
-            ,default=.015 # 1.5cm  #1 # 1%
-            ,min=0.0
-            ,max=100.0
-            ,update=update_settings_cb
-    )
-    margin_bottom = FloatProperty(
-            name="Bottom margin"
-            ,description="Blank space from the bottom paper edge."
-            ,default=.015 # 1.5cm  #1 # 1%
-            ,min=0.0
-            ,max=100.0
-            ,update=update_settings_cb
-    )
-    margin_left = FloatProperty(
-            name="Left margin"
-            ,description="Blank space from the left paper edge."
-            ,default=.015 # 1.5cm  #1 # 1%
-            ,min=0.0
-            ,max=100.0
-            ,update=update_settings_cb
-    )
 
 
-    # Position within render:
-    margin_top_bottom = FloatProperty(
-            name="Vertical margin"
-            ,description="Distance to top, bottom edges. Interpreted as percentage if >= 1."
-            ,default=1 # 1%
-            ,min=0.0
-            ,max=100.0
-    )
-    margin_left_right = FloatProperty(
-            name="Horizontal margin"
-            ,description="Distance to left, right edges. Interpreted as percentage if >= 1."
-            ,default=1 # 1%
-            ,min=0.0
-            ,max=100.0
-            #,update=position_within_render <- requires parameters.
-    )
+#
+# Reads the jobs from a .json (list of objects or {"jobs": [...]}) or .csv manifest.
+#
+def load_print_jobs(manifest_path):
+    import os
+    import csv
+    import json
+
+    if manifest_path.lower().endswith(".csv"):
+        with open(manifest_path, newline='') as f:
+            rows = list(csv.DictReader(f))
+    else:
+        with open(manifest_path) as f:
+            rows = json.load(f)
+        if isinstance(rows, dict):
+            rows = rows["jobs"]
+
+    base_dir = os.path.dirname(os.path.abspath(manifest_path))
+    jobs = []
+    for number, row in enumerate(rows, 1):
+        # Empty CSV cells fall back to the defaults:
+        row = {key.strip(): value for key, value in row.items() if value not in (None, "")}
+        if "scale" in row:
+            row["scale_factor"] = row.pop("scale")
+        unknown = set(row) - set(PrintJob._fields)
+        if unknown:
+            raise ValueError("Unknown print job field(s) %s in %s" % (sorted(unknown), manifest_path))
+        missing = [field for field in ('blend', 'output') if field not in row]
+        if missing:
+            raise ValueError("Print job %s in %s lacks the required field(s) %s: %s" % (number, manifest_path,
+                    missing, row))
+        job = PrintJob(**row)
+        job = job._replace(
+                blend=os.path.join(base_dir, job.blend),
+                output=os.path.join(base_dir, job.output),
+                dpi=int(job.dpi),
+                scale_factor=float(job.scale_factor),
+                use_margins=None if job.use_margins is None else parse_bool(job.use_margins),
+                tile_memory_mb=None if job.tile_memory_mb is None else int(job.tile_memory_mb),
+                sheet_overlap=float(job.sheet_overlap),
+                sheet_margin=float(job.sheet_margin),
+                sheet_row=int(job.sheet_row),
+                sheet_column=int(job.sheet_column),
+                )
+        jobs.append(job)
+    return jobs
+
 
 
+#
+# Applies a print job's settings to the scene through the print layout solver, i.e. without
+# operators (which require a UI context). The scale ratio text (if any) shows the job's scale.
+#
+def apply_print_job(scene, job):
+    if job.camera:
+        scene.camera = scene.objects[job.camera]
+
+    # The layout is solved and written once below:
+    with print_settings_update(scene, apply=False) as ps:
+        ps.preset = job.preset
+        ps.orientation = job.orientation
+        ps.dpi = job.dpi
+        ps.scale_factor = job.scale_factor
+        if job.use_margins is not None:
+            ps.use_margins = job.use_margins
+
+    context = scene_context(scene)
+    layout = solve_print_layout(**read_print_inputs(context, ps))
+    write_print_layout(context, ps, layout, to_render=True)
+    if scene.camera and scene.camera.type == 'CAMERA':
+        scene.camera.data.type = 'ORTHO'
+        scene.camera.data.ortho_scale = layout.ortho_scale
+        # In sync now, thus placing the text does not apply the print settings again:
+        store_print_layout_cache(context, ps, layout)
+        scale_ratio_text_object = find_scale_ratio_text_object(scene)
+        if ps.print_to_scale and ps.add_scale_ratio_text and scale_ratio_text_object:
+            update_scale_ratio_text(context, ps, scale_ratio_text_object)
+    return layout
 
 
 
-class RENDER_OT_apply_print_settings(Operator):
-    bl_idname = "render.apply_print_settings"
-    bl_label = "Apply print settings."
-    bl_description = "Set the render dimension."
+#
+# Renders a job of the loaded .blend file and returns its report entry (load_s is the time spent loading
+# the file for it). With resume, a job whose output exists is skipped.
+#
+def run_print_job(job, load_s=0.0, resume=False):
+    import os
+    import time
+
+    entry = dict(job._asdict(), load_s=load_s, status='FINISHED')
+    try:
+        scene = bpy.data.scenes[job.scene] if job.scene else bpy.data.scenes[0]
+
+        time_apply = time.perf_counter()
+        layout = apply_print_job(scene, job)
+        entry['apply_s'] = time.perf_counter() - time_apply
+        entry['width_px'] = layout.width_px
+        entry['height_px'] = layout.height_px
+        entry['ortho_scale'] = layout.ortho_scale
+        entry['fingerprint'] = scene_fingerprint(scene)
+
+        scene.render.filepath = job.output
+        if resume and os.path.exists(bpy.path.abspath(scene.render.frame_path(frame=scene.frame_current))):
+            entry['skipped'] = True
+            entry['overhead_s'] = entry['load_s'] + entry['apply_s']
+            print("Print job %s: already rendered." % job.output)
+            return entry
+        time_render = time.perf_counter()
+        if job.sheet_preset:
+            camera_data = scene.camera.data
+            tipo, dim_w, dim_h = paper_presets_data[job.sheet_preset]
+            if job.sheet_orientation == "Landscape":
+                dim_w, dim_h = dim_h, dim_w
+            sheets = solve_poster_sheets(scene.render.resolution_x, scene.render.resolution_y,
+                    camera_data.ortho_scale, job.dpi, dim_w / m_TO_cm, dim_h / m_TO_cm,
+                    job.sheet_overlap, job.sheet_margin, camera_data.shift_x, camera_data.shift_y)
+            sheet = [sheet for sheet in sheets if (sheet.row, sheet.column) == (job.sheet_row, job.sheet_column)]
+            if not sheet:
+                raise ValueError("The poster has no sheet in row %s, column %s." % (job.sheet_row, job.sheet_column))
+            render_tiles(scene, sheet, job.output, lambda filepath, sheet: filepath)
+        elif job.tile_memory_mb:
+            tiles = render_print_tiles(scene, job.tile_memory_mb * 1024 * 1024,
+                    scene.print_settings.tile_overlap)
+            entry['tiles'] = len(tiles)
+            entry['stitched'] = stitch_print_tiles(scene, tiles)
+        else:
+            preflight = render_preflight(scene)
+            entry['preflight_memory_bytes'] = preflight.memory_bytes
+            if preflight.status == 'REFUSED':
+                raise ValueError("Render refused: %s (render in tiles instead)." % preflight.message)
+            filepath, status, tiles = render_print_still(scene, render_cache(scene))
+            entry['cached'] = status == 'CACHED'
+            entry['render_status'] = status
+        entry['render_s'] = time.perf_counter() - time_render
+    except Exception as e:
+        print("Print job %s failed: %s" % (job, e))
+        entry['status'] = 'CANCELLED'
+        entry['error'] = str(e)
+    entry['overhead_s'] = entry['load_s'] + entry.get('apply_s', 0.0)
+    print("Print job %s: %s (render %.2fs, overhead %.2fs)" % (
+            job.output, entry['status'], entry.get('render_s', 0.0), entry['overhead_s']))
+    return entry
 
-    def execute(self, context):
 
-        ps = context.scene.print_settings
 
-        pixels_from_print(context, ps)
+#
+# Renders all jobs and returns a report with the timings of each job. The overhead is the time
+# spent on anything else than rendering (loading the .blend file, applying the print settings, ..).
+#
+def run_print_jobs(jobs, report_path=None, resume=False):
+    import json
+    import time
+
+    ensure_registered()
+
+    # Group by .blend file, keeping the manifest order otherwise:
+    blend_order = []
+    for job in jobs:
+        if job.blend not in blend_order:
+            blend_order.append(job.blend)
+
+    report = []
+    run_start = time.perf_counter()
+    for blend in blend_order:
+        time_load = time.perf_counter()
+        bpy.ops.wm.open_mainfile(filepath=blend)
+        time_load = time.perf_counter() - time_load
+
+        for job in (job for job in jobs if job.blend == blend):
+            report.append(run_print_job(job, time_load, resume))
+            time_load = 0.0 # Only the first job of a file pays for loading it.
+
+    summary = dict(
+            jobs=len(report),
+            failed=sum(1 for entry in report if entry['status'] != 'FINISHED'),
+            total_s=time.perf_counter() - run_start,
+            overhead_s=sum(entry['overhead_s'] for entry in report),
+            render_s=sum(entry.get('render_s', 0.0) for entry in report),
+            )
+    if report_path:
+        with open(report_path, 'w') as f:
+            json.dump(dict(summary=summary, jobs=report), f, indent=2)
+    print("Rendered %(jobs)s print jobs (%(failed)s failed) in %(total_s).2fs, overhead %(overhead_s).2fs." % summary)
+    return summary, report
 
-        render = context.scene.render
-        render.resolution_x = max(ps.width_px, 4)
-        render.resolution_y = max(ps.height_px, 4)
 
-        print2scale(ps, context)
 
-        return {'FINISHED'}
+#
+# PARALLEL RENDERING
+#
+# A single blender process uses a many-core machine poorly at high resolutions (scene preparation and
+# compositing are serial), thus independent print jobs (e.g. poster sheets or scale variants) are rendered
+# by several background blender processes, each with a fixed number of render threads:
+#   blender -b -P render_to_print.py -- --manifest jobs.json --workers 8 --threads 8
+#
+# Each worker (render_to_print.py --worker) stays alive, reads jobs as JSON lines from its stdin and
+# writes each job's report entry as a line prefixed with WORKER_RESULT to its stdout (blender's own output
+# is passed through). Jobs of the .blend file a worker has loaded are preferred for it, so files are loaded
+# rarely. A job that failed, whose worker died or which took longer than the job timeout (its worker is
+# killed) is retried up to the given number of times, by a worker it hasn't failed on yet as long as there
+# is one. A dead worker is replaced. Only local processes are involved.
+#
+WORKER_RESULT = "RENDER_TO_PRINT_RESULT "
 
 
 
+#
+# The worker loop, see PARALLEL RENDERING.
+#
+def run_print_worker(resume=False):
+    import sys
+    import json
+    import time
+
+    ensure_registered()
+    loaded_blend = None
+    for line in sys.stdin:
+        if not line.strip():
+            continue
+        job = PrintJob(**json.loads(line))
+        time_load = 0.0
+        try:
+            if job.blend != loaded_blend:
+                loaded_blend = None
+                time_load = time.perf_counter()
+                bpy.ops.wm.open_mainfile(filepath=job.blend)
+                time_load = time.perf_counter() - time_load
+                loaded_blend = job.blend
+            entry = run_print_job(job, time_load, resume)
+        except Exception as e:
+            entry = dict(job._asdict(), load_s=time_load, overhead_s=time_load, status='CANCELLED', error=str(e))
+        sys.stdout.write(WORKER_RESULT + json.dumps(entry) + "\n")
+        sys.stdout.flush()
+
+
+
+class PrintWorker:
+    def __init__(self, index, command):
+        import queue
+        import threading
+        import subprocess
+
+        self.index = index
+        self.job = None
+        self.blend = None
+        self.started = None
+        self.jobs = 0
+        self.render_s = 0.0
+        self.busy_s = 0.0
+        self.results = queue.Queue()
+        self.process = subprocess.Popen(command, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                universal_newlines=True, bufsize=1)
+        self.reader = threading.Thread(target=self.read, daemon=True)
+        self.reader.start()
+
+    # Runs in the reader thread until the worker exits (then None is queued):
+    def read(self):
+        import json
+
+        for line in self.process.stdout:
+            if line.startswith(WORKER_RESULT):
+                self.results.put(json.loads(line[len(WORKER_RESULT):]))
+            else:
+                log.debug("Worker %s: %s", self.index, line.rstrip())
+        self.results.put(None)
+
+    def submit(self, job):
+        import json
+        import time
+
+        self.job = job
+        self.started = time.perf_counter()
+        self.process.stdin.write(json.dumps(job._asdict()) + "\n")
+        self.process.stdin.flush()
+
+    def stop(self):
+        try:
+            self.process.stdin.close()
+        except OSError:
+            pass
+        self.process.wait()
+
+
+
+def print_worker_command(blender=None, threads=0, resume=False):
+    import os
+
+    command = [blender or bpy.app.binary_path, "-b"]
+    if threads:
+        command += ["-t", str(threads)]
+    command += ["-P", os.path.abspath(__file__), "--", "--worker"]
+    if resume:
+        command.append("--resume")
+    return command
 
 
 
-def getLastObjectInSelection(context):
-    return context.selected_objects[len(context.selected_objects) - 1]
+#
+# Renders the jobs with a pool of workers, see PARALLEL RENDERING. Returns the summary (with per worker
+# statistics) and the report entries, like run_print_jobs(). command is the worker command line
+# (print_worker_command() by default).
+#
+def schedule_print_jobs(jobs, workers=2, threads=0, retries=2, blender=None, report_path=None,
+        resume=False, command=None, job_timeout=0.0):
+    import json
+    import time
+    import queue
+    from collections import deque
+
+    if command is None:
+        command = print_worker_command(blender, threads, resume)
+    pending = deque(jobs)
+    attempts = {}
+    failed_on = {} # job -> indices of the workers it failed on
+    report = []
+    pool = [PrintWorker(i, command) for i in range(min(max(workers, 1), len(jobs)))]
+    run_start = time.perf_counter()
+    last_progress = run_start
+
+    def next_job(worker):
+        # Jobs that failed on the worker are left to others, unless they failed on all:
+        candidates = [job for job in pending if worker.index not in failed_on.get(job, ())
+                or len(failed_on[job]) >= len(pool)]
+        if not candidates:
+            return None
+        # Prefer a job of the file the worker has loaded:
+        job = next((job for job in candidates if job.blend == worker.blend), candidates[0])
+        pending.remove(job)
+        return job
+
+    def replace_worker(worker):
+        worker.stop()
+        log.warning("Worker %s exited (%s), starting a new one.", worker.index, worker.process.returncode)
+        replacement = PrintWorker(worker.index, command)
+        replacement.jobs, replacement.render_s, replacement.busy_s = worker.jobs, worker.render_s, worker.busy_s
+        return replacement
+
+    def finish(worker, entry):
+        job = worker.job
+        worker.job = None
+        elapsed = time.perf_counter() - worker.started
+        worker.busy_s += elapsed
+        attempts[job] = attempts.get(job, 0) + 1
+        if entry is not None and entry['status'] == 'FINISHED':
+            worker.blend = job.blend
+            worker.jobs += 1
+            worker.render_s += entry.get('render_s', 0.0)
+        elif attempts[job] <= retries:
+            log.warning("Print job %s failed (attempt %s), retrying: %s", job.output, attempts[job],
+                    entry.get('error') if entry else "worker %s died" % worker.index)
+            failed_on.setdefault(job, set()).add(worker.index)
+            pending.append(job)
+            return
+        entry = entry or dict(job._asdict(), status='CANCELLED', error="worker %s died" % worker.index)
+        entry.update(worker=worker.index, attempts=attempts[job])
+        entry.setdefault('overhead_s', 0.0)
+        report.append(entry)
+        print("[%s/%s] Print job %s: %s (worker %s, %.2fs)" % (len(report), len(jobs), job.output,
+                entry['status'], worker.index, elapsed))
+
+    try:
+        while len(report) < len(jobs):
+            for i, worker in enumerate(pool):
+                if worker.job is None:
+                    if not pending:
+                        continue
+                    if worker.process.poll() is not None:
+                        pool[i] = worker = replace_worker(worker)
+                    job = next_job(worker)
+                    if job is None:
+                        continue
+                    try:
+                        worker.submit(job)
+                    except OSError as e:
+                        # E.g. BrokenPipeError, the worker died since it was polled:
+                        log.warning("Worker %s didn't take print job %s: %s", worker.index, job.output, e)
+                        finish(worker, None)
+                        pool[i] = replace_worker(worker)
+                        continue
+                try:
+                    entry = worker.results.get(timeout=.05)
+                except queue.Empty:
+                    if job_timeout and time.perf_counter() - worker.started > job_timeout:
+                        # A hung blender process, e.g. in a driver or an endless render:
+                        worker.process.kill()
+                        finish(worker, dict(worker.job._asdict(), status='CANCELLED',
+                                error="timed out after %.0fs on worker %s" % (job_timeout, worker.index)))
+                        pool[i] = replace_worker(worker)
+                    continue
+                finish(worker, entry)
+                if entry is None:
+                    pool[i] = replace_worker(worker)
+            if time.perf_counter() - last_progress > 10.0:
+                last_progress = time.perf_counter()
+                print("Rendering print jobs: %s of %s done, %s pending, workers: %s" % (len(report), len(jobs),
+                        len(pending), ", ".join("%s: %s" % (worker.index, worker.job.output if worker.job else "idle")
+                        for worker in pool)))
+    finally:
+        for worker in pool:
+            worker.stop()
+
+    total_s = time.perf_counter() - run_start
+    summary = dict(
+            jobs=len(report),
+            failed=sum(1 for entry in report if entry['status'] != 'FINISHED'),
+            total_s=total_s,
+            overhead_s=sum(entry['overhead_s'] for entry in report),
+            render_s=sum(entry.get('render_s', 0.0) for entry in report),
+            workers=[dict(worker=worker.index, jobs=worker.jobs, busy_s=worker.busy_s, render_s=worker.render_s,
+                    jobs_per_hour=worker.jobs / total_s * 3600.0 if total_s else 0.0) for worker in pool],
+            )
+    if report_path:
+        with open(report_path, 'w') as f:
+            json.dump(dict(summary=summary, jobs=report), f, indent=2)
+    for worker in summary['workers']:
+        print("Worker %(worker)s: %(jobs)s jobs, %(jobs_per_hour).1f per hour, busy %(busy_s).2fs." % worker)
+    print("Rendered %(jobs)s print jobs (%(failed)s failed) in %(total_s).2fs." % summary)
+    return summary, report
+
 
 
+#
+# Command line entry point, arguments follow blender's '--' separator.
+#
+def main(argv=None):
+    import sys
+    import argparse
+
+    if argv is None:
+        argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+    parser = argparse.ArgumentParser(prog="render_to_print.py", description="Render print jobs listed in a manifest.")
+    parser.add_argument("--manifest", help="JSON or CSV print job manifest.")
+    parser.add_argument("--report", help="Where to write the JSON run report.")
+    parser.add_argument("--resume", action='store_true', help="Skip jobs whose output file exists.")
+    parser.add_argument("--workers", type=int, default=0, help="Render with this many background blender processes.")
+    parser.add_argument("--threads", type=int, default=0, help="Render threads per worker (0: automatic).")
+    parser.add_argument("--retries", type=int, default=2, help="Retries of a failed job (with --workers).")
+    parser.add_argument("--job-timeout", type=float, default=0.0,
+            help="Seconds after which a job's worker is killed and the job retried (with --workers, 0: none).")
+    parser.add_argument("--blender", help="Blender executable of the workers (default: this one).")
+    parser.add_argument("--worker", action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    ensure_registered()
+    if args.worker:
+        run_print_worker(resume=args.resume)
+    elif args.manifest and args.workers:
+        summary, report = schedule_print_jobs(load_print_jobs(args.manifest), args.workers, args.threads,
+                args.retries, args.blender, report_path=args.report, resume=args.resume, job_timeout=args.job_timeout)
+        if summary['failed']:
+            sys.exit(1)
+    elif args.manifest:
+        summary, report = run_print_jobs(load_print_jobs(args.manifest), report_path=args.report, resume=args.resume)
+        if summary['failed']:
+            sys.exit(1)
+
+
+
+def ensure_registered():
+    if not hasattr(Scene, 'print_settings'):
+        register()
+
 
 
 def register():
     bpy.utils.register_class(RENDER_OT_apply_print_settings)
+    bpy.utils.register_class(RENDER_OT_use_max_dpi)
+    bpy.utils.register_class(RENDER_OT_render_print_tiles)
+    bpy.utils.register_class(RENDER_OT_render_print)
+    bpy.utils.register_class(RENDER_OT_scene_fingerprint)
+    bpy.utils.register_class(RENDER_OT_render_poster_sheets)
+    bpy.utils.register_class(RENDER_OT_export_poster_jobs)
     bpy.utils.register_class(RENDER_OT_ensure_height)
+    bpy.utils.register_class(RENDER_OT_fit_print_to_selection)
+    bpy.utils.register_class(RENDER_OT_center_camera_on_selection)
+    bpy.utils.register_class(RENDER_OT_check_print_coverage)
     bpy.utils.register_class(OBJECT_OT_text_change)
     bpy.utils.register_class(OBJECT_OT_position_within_render)
     bpy.utils.register_class(OBJECT_OT_position_in_top_left_corner)
@@ -1547,24 +5386,95 @@ def register():
     bpy.utils.register_class(OBJECT_OT_position_in_bottom_right_corner)
     bpy.utils.register_class(OBJECT_OT_position_in_bottom_left_corner)
     bpy.utils.register_class(RENDER_PT_print)
+    bpy.utils.register_class(RENDER_PT_print_profile)
     bpy.utils.register_class(RenderPrintSettings)
 
     Scene.print_settings = PointerProperty(type=RenderPrintSettings)
 
+    bpy.app.handlers.depsgraph_update_post.append(object_index_depsgraph_update)
+    bpy.app.handlers.depsgraph_update_post.append(print_layout_depsgraph_update)
+    bpy.app.handlers.depsgraph_update_post.append(profile_depsgraph_update)
+    bpy.app.handlers.depsgraph_update_post.append(bounds_depsgraph_update)
+    bpy.app.handlers.depsgraph_update_post.append(print_panel_depsgraph_update)
+    bpy.app.handlers.undo_post.append(object_index_load_post)
+    bpy.app.handlers.redo_post.append(object_index_load_post)
+    bpy.app.handlers.load_post.append(object_index_load_post)
+    bpy.app.handlers.undo_post.append(bounds_load_post)
+    bpy.app.handlers.redo_post.append(bounds_load_post)
+    bpy.app.handlers.load_post.append(bounds_load_post)
+    bpy.app.handlers.undo_post.append(fingerprint_load_post)
+    bpy.app.handlers.redo_post.append(fingerprint_load_post)
+    bpy.app.handlers.load_post.append(fingerprint_load_post)
+    bpy.app.handlers.undo_post.append(print_update_state_load_post)
+    bpy.app.handlers.redo_post.append(print_update_state_load_post)
+    bpy.app.handlers.load_post.append(print_update_state_load_post)
+    bpy.app.handlers.load_post.append(profile_load_post)
+    bpy.app.handlers.load_post.append(trace_load_post)
+    bpy.app.handlers.render_pre.append(preflight_render_pre)
+    register_driver_namespace()
+    bpy.app.handlers.render_post.append(preflight_render_post)
+    subscribe_object_renames()
+    try:
+        profile_load_post()
+        trace_load_post()
+    except AttributeError: # bpy.data is restricted while blender starts, load_post follows then.
+        pass
+
 
 def unregister():
+    bpy.msgbus.clear_by_owner(object_index_msgbus_owner)
+    for handlers, handler in ((bpy.app.handlers.depsgraph_update_post, object_index_depsgraph_update),
+            (bpy.app.handlers.depsgraph_update_post, print_layout_depsgraph_update),
+            (bpy.app.handlers.depsgraph_update_post, profile_depsgraph_update),
+            (bpy.app.handlers.depsgraph_update_post, bounds_depsgraph_update),
+            (bpy.app.handlers.depsgraph_update_post, print_panel_depsgraph_update),
+            (bpy.app.handlers.undo_post, object_index_load_post),
+            (bpy.app.handlers.redo_post, object_index_load_post),
+            (bpy.app.handlers.load_post, object_index_load_post),
+            (bpy.app.handlers.undo_post, bounds_load_post),
+            (bpy.app.handlers.redo_post, bounds_load_post),
+            (bpy.app.handlers.load_post, bounds_load_post),
+            (bpy.app.handlers.undo_post, fingerprint_load_post),
+            (bpy.app.handlers.redo_post, fingerprint_load_post),
+            (bpy.app.handlers.load_post, fingerprint_load_post),
+            (bpy.app.handlers.undo_post, print_update_state_load_post),
+            (bpy.app.handlers.redo_post, print_update_state_load_post),
+            (bpy.app.handlers.load_post, print_update_state_load_post),
+            (bpy.app.handlers.load_post, profile_load_post),
+            (bpy.app.handlers.load_post, trace_load_post),
+            (bpy.app.handlers.render_pre, preflight_render_pre),
+            (bpy.app.handlers.render_post, preflight_render_post)):
+        if handler in handlers:
+            handlers.remove(handler)
+    object_index.clear()
+    bounds_load_post()
+    fingerprint_load_post()
+    print_update_state_load_post()
+    bpy.app.driver_namespace.pop(DRIVER_FUNCTION, None)
+    if bpy.app.timers.is_registered(flush_print_updates):
+        bpy.app.timers.unregister(flush_print_updates)
     bpy.utils.unregister_class(RENDER_OT_apply_print_settings)
+    bpy.utils.unregister_class(RENDER_OT_use_max_dpi)
+    bpy.utils.unregister_class(RENDER_OT_render_print_tiles)
+    bpy.utils.unregister_class(RENDER_OT_render_print)
+    bpy.utils.unregister_class(RENDER_OT_scene_fingerprint)
+    bpy.utils.unregister_class(RENDER_OT_render_poster_sheets)
+    bpy.utils.unregister_class(RENDER_OT_export_poster_jobs)
     bpy.utils.unregister_class(RENDER_OT_ensure_height)
+    bpy.utils.unregister_class(RENDER_OT_fit_print_to_selection)
+    bpy.utils.unregister_class(RENDER_OT_center_camera_on_selection)
+    bpy.utils.unregister_class(RENDER_OT_check_print_coverage)
     bpy.utils.unregister_class(OBJECT_OT_text_change)
     bpy.utils.unregister_class(OBJECT_OT_position_within_render)
     bpy.utils.unregister_class(OBJECT_OT_position_in_top_left_corner)
     bpy.utils.unregister_class(OBJECT_OT_position_in_top_right_corner)
     bpy.utils.unregister_class(OBJECT_OT_position_in_bottom_right_corner)
     bpy.utils.unregister_class(OBJECT_OT_position_in_bottom_left_corner)
+    bpy.utils.unregister_class(RENDER_PT_print_profile)
     bpy.utils.unregister_class(RENDER_PT_print)
     bpy.utils.unregister_class(RenderPrintSettings)
     del Scene.print_settings
 
 
 if __name__ == "__main__":
-    register()
+    main()
@@ -0,0 +1,56 @@
+# Shared setup of the tests, which run outside Blender against the bpy stand-in in benchmarks/standin:
+#
+#   python -m pytest tests
+
+import os
+import sys
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(TESTS_DIR), "benchmarks", "standin"))
+sys.path.insert(0, os.path.dirname(TESTS_DIR))
+
+import bpy
+import pytest
+import render_to_print
+
+
+
+@pytest.fixture(scope="session", autouse=True)
+def registered():
+    render_to_print.register()
+    yield
+    render_to_print.unregister()
+
+
+
+#
+# A fresh scene with a camera, a model with a material, a light and a world, rendering to tmp_path.
+#
+@pytest.fixture
+def lit_scene(tmp_path):
+    scene = bpy.reset_standin()
+    scene.render.filepath = str(tmp_path / "print")
+    model = bpy.data.objects.new("Model", bpy.data.meshes.new("Model"))
+    model.material_slots.append(bpy.types.MaterialSlot(bpy.data.materials.new("Material")))
+    scene.collection.objects.link(model)
+    light = bpy.data.objects.new("Light", bpy.data.lights.new("Light"))
+    scene.collection.objects.link(light)
+    scene.world = bpy.data.worlds.new("World")
+    return scene
+
+
+
+# Edits of lit_scene changing what the render shows, by name:
+RENDER_INPUT_EDITS = dict(
+        light_energy=lambda scene: setattr(bpy.data.lights["Light"], 'energy', 500.0),
+        light_color=lambda scene: setattr(bpy.data.lights["Light"], 'color', (1.0, .5, .5)),
+        light_size=lambda scene: setattr(bpy.data.lights["Light"], 'shadow_soft_size', 1.0),
+        material_color=lambda scene: setattr(bpy.data.materials["Material"], 'diffuse_color', (.8, .1, .1, 1.0)),
+        material_roughness=lambda scene: setattr(bpy.data.materials["Material"], 'roughness', .9),
+        world=lambda scene: setattr(scene.world, 'color', (.5, .5, .5)),
+        exposure=lambda scene: setattr(scene.view_settings, 'exposure', 1.0),
+        view_transform=lambda scene: setattr(scene.view_settings, 'view_transform', 'Standard'),
+        look=lambda scene: setattr(scene.view_settings, 'look', 'High Contrast'),
+        border=lambda scene: setattr(scene.render, 'use_border', True),
+        hide_render=lambda scene: setattr(bpy.data.objects["Model"], 'hide_render', True),
+        )
@@ -0,0 +1,34 @@
+# Tests of sizing texts to their printed height, see ensure_heights() in render_to_print.py.
+
+import bpy
+import pytest
+import render_to_print
+
+
+
+@pytest.fixture
+def text(lit_scene):
+    bpy.ops.object.text_add()
+    text = bpy.context.active_object
+    text.data.body = "North elevation"
+    return text
+
+
+
+@pytest.mark.parametrize("scale_length", [1.0, .01])
+@pytest.mark.parametrize("height", [.01, .004, .05])
+def test_print_text_height_override(text, height, scale_length):
+    ps = bpy.context.scene.print_settings
+    ps.scale_factor = .01
+    bpy.context.scene.unit_settings.scale_length = scale_length
+    text['print_text_height'] = height
+    render_to_print.ensure_heights([text], ps)
+    assert text.dimensions[1] * ps.scale_factor * scale_length == pytest.approx(height, rel=1e-5)
+
+
+
+def test_default_height(text):
+    ps = bpy.context.scene.print_settings
+    ps.scale_factor = .01
+    render_to_print.ensure_heights([text], ps)
+    assert text.dimensions[1] * ps.scale_factor == pytest.approx(ps.text_height, rel=1e-5)
@@ -0,0 +1,68 @@
+# Tests of printing in poster sheets, see POSTER SHEETS in render_to_print.py.
+
+import pytest
+import render_to_print
+
+A4_M = (.21, .297)
+
+
+
+def sheet_grid(sheets):
+    return {(sheet.row, sheet.column): sheet for sheet in sheets}
+
+
+
+@pytest.mark.parametrize("overlap_m", [0.0, .01])
+@pytest.mark.parametrize("margin_m", [0.0, .005])
+def test_sheets_cover_the_render(overlap_m, margin_m):
+    dpi = 100
+    width_px, height_px = 2000, 1500
+    sheets = render_to_print.solve_poster_sheets(width_px, height_px, 4.0, dpi, *A4_M, overlap_m, margin_m)
+    sheet_width_px = render_to_print.m_to_pixels(A4_M[0] - 2 * margin_m, dpi)
+    sheet_height_px = render_to_print.m_to_pixels(A4_M[1] - 2 * margin_m, dpi)
+    overlap_px = render_to_print.m_to_pixels(overlap_m, dpi)
+
+    covered = [[0] * width_px for y in range(height_px)]
+    for sheet in sheets:
+        assert (sheet.render_x, sheet.render_y, sheet.render_width, sheet.render_height) \
+                == (sheet.x, sheet.y, sheet.width, sheet.height)
+        assert sheet.width <= sheet_width_px and sheet.height <= sheet_height_px
+        for y in range(sheet.y, sheet.y + sheet.height):
+            for x in range(sheet.x, sheet.x + sheet.width):
+                covered[y][x] += 1
+    assert all(count >= 1 for row in covered for count in row)
+
+    grid = sheet_grid(sheets)
+    for (row, column), sheet in grid.items():
+        right = grid.get((row, column + 1))
+        if right:
+            assert sheet.x + sheet.width - right.x == overlap_px
+        below = grid.get((row + 1, column))
+        if below:
+            assert below.y + below.height - sheet.y == overlap_px
+
+
+
+def test_first_row_is_at_the_top():
+    sheets = render_to_print.solve_poster_sheets(1000, 2500, 4.0, 100, *A4_M)
+    grid = sheet_grid(sheets)
+    # Pixel rows count from the bottom:
+    assert grid[(0, 0)].y + grid[(0, 0)].height == 2500
+    assert min(sheet.y for sheet in sheets) == 0
+    assert all(sheet.y == 0 for sheet in sheets if sheet.row == max(grid)[0])
+
+
+
+def test_sheets_are_to_scale():
+    sheets = render_to_print.solve_poster_sheets(2000, 1500, 4.0, 100, *A4_M, shift_x=.1)
+    for sheet in sheets:
+        assert (sheet.shift_x, sheet.shift_y, sheet.ortho_scale) == pytest.approx(render_to_print.tile_camera(
+                sheet.x, sheet.y, sheet.width, sheet.height, 2000, 1500, 4.0, .1, 0.0))
+
+
+
+def test_overlap_larger_than_the_sheet():
+    with pytest.raises(ValueError):
+        render_to_print.solve_poster_sheets(2000, 1500, 4.0, 100, *A4_M, overlap_m=.21)
+    with pytest.raises(ValueError):
+        render_to_print.solve_poster_sheets(2000, 1500, 4.0, 100, *A4_M, overlap_m=.1, margin_m=.06)
@@ -0,0 +1,46 @@
+# Tests of the render preflight, see RENDER PREFLIGHT in render_to_print.py.
+
+import bpy
+import pytest
+import render_to_print
+
+
+
+@pytest.fixture
+def ps(lit_scene):
+    ps = lit_scene.print_settings
+    ps.preset = "B0_100.0_141.4"
+    ps.dpi = 150
+    bpy.app.timers.run_all()
+    return ps
+
+
+
+def test_slider_typo_is_not_applied(ps):
+    scene = ps.id_data
+    resolution = (scene.render.resolution_x, scene.render.resolution_y)
+    ortho_scale = scene.camera.data.ortho_scale
+    ps.dpi = 1800 # Meant 180.
+    bpy.app.timers.run_all()
+    assert render_to_print.render_preflight(scene, ps.width_px, ps.height_px).status == 'REFUSED'
+    assert (scene.render.resolution_x, scene.render.resolution_y) == resolution
+    assert scene.camera.data.ortho_scale == ortho_scale
+
+
+
+def test_memory_limit_is_not_applied(ps):
+    scene = ps.id_data
+    resolution = (scene.render.resolution_x, scene.render.resolution_y)
+    ps.preflight_memory_limit = 100
+    ps.dpi = 300
+    bpy.app.timers.run_all()
+    assert (scene.render.resolution_x, scene.render.resolution_y) == resolution
+
+
+
+def test_budget_warns_but_applies(ps):
+    scene = ps.id_data
+    ps.preflight_memory_budget = 100
+    ps.dpi = 300
+    bpy.app.timers.run_all()
+    assert (scene.render.resolution_x, scene.render.resolution_y) == (ps.width_px, ps.height_px)
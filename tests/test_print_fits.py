@@ -0,0 +1,57 @@
+# Tests of the best fit sheet finder, see BEST FIT in render_to_print.py.
+
+import pytest
+import render_to_print
+
+A4 = "A4_21.0_29.7"
+
+
+
+def sheet_layout(preset, orientation, dpi=300, **margins):
+    tipo, dim_w, dim_h = render_to_print.paper_presets_data[preset]
+    width_cm, height_cm = (dim_h, dim_w) if orientation == "Landscape" else (dim_w, dim_h)
+    # The render of the whole sheet, which relative margins refer to:
+    return render_to_print.solve_print_layout(preset=preset, orientation=orientation, dpi=dpi,
+            resolution_x=render_to_print.m_to_pixels(width_cm / render_to_print.m_TO_cm, dpi),
+            resolution_y=render_to_print.m_to_pixels(height_cm / render_to_print.m_TO_cm, dpi),
+            add_scale_ratio_text=False, **margins)
+
+
+
+@pytest.mark.parametrize("orientation", ["Portrait", "Landscape"])
+@pytest.mark.parametrize("margin", [0.0, .015, .03])
+def test_index_matches_solver(orientation, margin):
+    margins = dict(margin_top=margin, margin_right=margin, margin_bottom=margin, margin_left=margin)
+    entry = next(entry for entry in render_to_print.print_fit_index(**margins) if entry[1:3] == (A4, orientation))
+    layout = sheet_layout(A4, orientation, **margins)
+    assert entry[5] == pytest.approx(layout.printable_width_m)
+    assert entry[6] == pytest.approx(layout.printable_height_m)
+
+
+
+def test_a4_portrait_with_3cm_margins():
+    margins = dict(margin_top=.03, margin_right=.03, margin_bottom=.03, margin_left=.03)
+    entry = next(entry for entry in render_to_print.print_fit_index(**margins) if entry[1:3] == (A4, "Portrait"))
+    assert entry[6] == pytest.approx(.2370, abs=1e-4)
+
+
+
+def test_fits_are_printable():
+    margins = dict(margin_top=.03, margin_right=.03, margin_bottom=.03, margin_left=.03)
+    extent_x, extent_y = 14.0, 24.0 # m, at 1:100 just not on A4 portrait with 3 cm margins
+    fits = render_to_print.find_print_fits(extent_x, extent_y, min_scale_factor=.01, **margins)
+    assert fits
+    assert (A4, "Portrait", .01) not in [(fit.preset, fit.orientation, fit.scale_factor) for fit in fits]
+    for fit in fits:
+        layout = sheet_layout(fit.preset, fit.orientation, **margins)
+        assert extent_x * fit.scale_factor <= layout.printable_width_m * (1.0 + 1e-9)
+        assert extent_y * fit.scale_factor <= layout.printable_height_m * (1.0 + 1e-9)
+        assert 0.0 < fit.fill <= 1.0 + 1e-9
+
+
+
+def test_smallest_sheet_first():
+    fits = render_to_print.find_print_fits(10.0, 10.0, min_scale_factor=.005)
+    areas = [fit.width_cm * fit.height_cm for fit in fits]
+    assert areas == sorted(areas)
+    assert fits[0].scale_factor >= .005
@@ -0,0 +1,53 @@
+# Tests of the render cache key, see RENDER CACHE in render_to_print.py.
+
+import bpy
+import pytest
+import render_to_print
+
+from conftest import RENDER_INPUT_EDITS
+
+
+
+@pytest.fixture
+def scene(lit_scene, tmp_path):
+    lit_scene.print_settings.use_render_cache = True
+    lit_scene.print_settings.render_cache_dir = str(tmp_path / "cache")
+    return lit_scene
+
+
+
+def render_twice(scene, change):
+    cache = render_to_print.render_cache(scene)
+    render_to_print.render_still(scene, cache)
+    change(scene)
+    return render_to_print.render_still(scene, cache)[1]
+
+
+
+def test_unchanged_scene_hits(scene):
+    assert render_twice(scene, lambda scene: None) is True
+
+
+
+@pytest.mark.parametrize("edit", sorted(RENDER_INPUT_EDITS))
+def test_changed_input_misses(scene, edit):
+    assert render_twice(scene, RENDER_INPUT_EDITS[edit]) is False
+
+
+
+def test_viewport_visibility_is_ignored(scene, monkeypatch):
+    # Hiding an object in the viewport doesn't change the render:
+    key = render_to_print.render_cache_key(scene)
+    monkeypatch.setattr(bpy.types.Object, 'visible_get', lambda self: self.name != "Model")
+    assert render_to_print.render_cache_key(scene) == key
+
+
+
+def test_collection_hidden_in_renders_misses(scene):
+    collection = bpy.data.collections.new("Props")
+    scene.collection.children.append(collection)
+    prop = bpy.data.objects.new("Prop", bpy.data.meshes.new("Prop"))
+    collection.objects.link(prop)
+    key = render_to_print.render_cache_key(scene)
+    collection.hide_render = True
+    assert render_to_print.render_cache_key(scene) != key
@@ -0,0 +1,101 @@
+# Tests of re-rendering only changed annotations, see ANNOTATION RE-RENDER in render_to_print.py.
+
+import os
+import json
+
+import bpy
+import pytest
+import render_to_print
+
+from conftest import RENDER_INPUT_EDITS
+
+
+
+#
+# A lit model with a label placed within the render, rendered once with region rendering enabled.
+#
+@pytest.fixture
+def scene(lit_scene):
+    scene = lit_scene
+    ps = scene.print_settings
+    ps.preset = "A4_21.0_29.7"
+    bpy.app.timers.run_all()
+
+    bpy.ops.object.text_add()
+    label = bpy.context.active_object
+    label.name = "label"
+    label.data.body = "North elevation"
+    label.data.size = .005
+    bpy.ops.object.position_within_render()
+    ps.use_region_render = True
+    assert render_to_print.render_print_still(scene)[1] == 'RENDERED'
+    return scene
+
+
+
+def test_unchanged_scene_is_not_rendered(scene):
+    assert render_to_print.render_print_still(scene)[1] == 'UNCHANGED'
+
+
+
+def test_changed_label_renders_regions(scene):
+    bpy.data.objects["label"].data.body = "North elevation (revised)"
+    assert render_to_print.render_print_still(scene)[1] == 'REGIONS'
+
+
+
+@pytest.mark.parametrize("edit", ["light_energy", "material_color", "world", "view_transform", "hide_render"])
+def test_changed_input_renders_fully(scene, edit):
+    RENDER_INPUT_EDITS[edit](scene)
+    assert render_to_print.render_print_still(scene)[1] == 'RENDERED'
+
+
+
+@pytest.mark.parametrize("file_format", ["JPEG", "WEBP"])
+def test_lossy_image_renders_fully(scene, file_format):
+    scene.render.image_settings.file_format = file_format
+    render_to_print.render_print_still(scene)
+    bpy.data.objects["label"].data.body = "North elevation (revised)"
+    assert render_to_print.render_print_still(scene)[1] == 'RENDERED'
+
+
+
+def test_composited_image_renders_fully(scene):
+    scene.use_nodes = True
+    scene.node_tree = object() # Any compositor node tree.
+    bpy.data.objects["label"].data.body = "North elevation (revised)"
+    assert render_to_print.render_print_still(scene)[1] == 'RENDERED'
+    scene.render.use_compositing = False
+    bpy.data.objects["label"].data.body = "North elevation"
+    assert render_to_print.render_print_still(scene)[1] == 'REGIONS'
+
+
+
+def test_image_written_elsewhere_renders_fully(scene):
+    filepath = render_to_print.render_print_still(scene)[0]
+    bpy.ops.render.render(write_still=True, scene=scene.name)
+    os.utime(filepath, ns=(0, 0))
+    assert render_to_print.render_print_still(scene)[1] == 'RENDERED'
+
+
+
+def test_incomplete_record_renders_fully(scene):
+    filepath = render_to_print.render_print_still(scene)[0]
+    with open(filepath + render_to_print.RENDER_RECORD_SUFFIX) as f:
+        record = json.load(f)
+    record['objects']["label"] = None
+    with open(filepath + render_to_print.RENDER_RECORD_SUFFIX, 'w') as f:
+        json.dump(record, f)
+    assert render_to_print.render_print_still(scene)[1] == 'RENDERED'
+
+
+
+def test_merge_rects():
+    # Overlapping:
+    assert render_to_print.merge_rects([[0, 0, 10, 10], [5, 5, 10, 10]]) == [[0, 0, 15, 15]]
+    # Disjoint, or merely touching:
+    assert sorted(render_to_print.merge_rects([[0, 0, 10, 10], [10, 0, 5, 5], [20, 20, 1, 1]])) \
+            == [[0, 0, 10, 10], [10, 0, 5, 5], [20, 20, 1, 1]]
+    # Joined by a later one, which then overlaps one passed before:
+    assert render_to_print.merge_rects([[0, 0, 4, 4], [10, 0, 4, 4], [20, 0, 4, 12], [2, 2, 10, 1], [12, 2, 10, 8]]) \
+            == [[0, 0, 24, 12]]
@@ -0,0 +1,78 @@
+# Tests of rendering in tiles, see TILED RENDERING in render_to_print.py.
+
+import bpy
+import pytest
+import render_to_print
+
+
+
+def rendered_size(filepath):
+    with open(filepath, 'rb') as f:
+        return tuple(int(value) for value in f.readline().split())
+
+
+
+@pytest.mark.parametrize("use_drivers", [False, True])
+def test_tiles_render_their_own_area(lit_scene, use_drivers):
+    scene = lit_scene
+    ps = scene.print_settings
+    ps.preset = "A4_21.0_29.7"
+    bpy.app.timers.run_all()
+    ps.use_drivers = use_drivers
+    bpy.context.evaluated_depsgraph_get()
+    resolution = (scene.render.resolution_x, scene.render.resolution_y)
+    ortho_scale = scene.camera.data.ortho_scale
+
+    memory_budget = resolution[0] * resolution[1] * render_to_print.RENDER_BYTES_PER_PIXEL // 3
+    rendered = render_to_print.render_print_tiles(scene, memory_budget)
+    assert len(rendered) > 1
+    for tile, filepath in rendered:
+        assert rendered_size(filepath) == (tile.render_width, tile.render_height)
+    assert (scene.render.resolution_x, scene.render.resolution_y) == resolution
+    assert scene.camera.data.ortho_scale == ortho_scale
+    assert not any(fcurve.mute for fcurve in render_to_print.print_driver_fcurves(scene))
+    assert len(render_to_print.print_driver_fcurves(scene)) == (5 if use_drivers else 0)
+
+
+
+@pytest.mark.parametrize("overlap", [0, 16])
+@pytest.mark.parametrize("memory_budget", [10**5, 10**6, 10**7])
+def test_tiles_partition_the_render(memory_budget, overlap):
+    width_px, height_px = 1003, 517
+    tiles = render_to_print.solve_tiles(width_px, height_px, 2.0, memory_budget, overlap, bytes_per_pixel=4)
+    covered = [[0] * width_px for y in range(height_px)]
+    for tile in tiles:
+        assert tile.render_width * tile.render_height * 4 <= memory_budget
+        assert tile.render_x == max(tile.x - overlap, 0)
+        assert tile.render_y == max(tile.y - overlap, 0)
+        assert tile.render_x + tile.render_width == min(tile.x + tile.width + overlap, width_px)
+        assert tile.render_y + tile.render_height == min(tile.y + tile.height + overlap, height_px)
+        for y in range(tile.y, tile.y + tile.height):
+            for x in range(tile.x, tile.x + tile.width):
+                covered[y][x] += 1
+    assert all(count == 1 for row in covered for count in row)
+
+
+
+def test_whole_render_fits_one_tile():
+    tiles = render_to_print.solve_tiles(200, 100, 2.0, 200 * 100 * 4, bytes_per_pixel=4, shift_x=.1, shift_y=-.2)
+    assert len(tiles) == 1
+    assert (tiles[0].render_width, tiles[0].render_height) == (200, 100)
+    assert (tiles[0].shift_x, tiles[0].shift_y, tiles[0].ortho_scale) == pytest.approx((.1, -.2, 2.0))
+
+
+
+def test_too_small_memory_budget():
+    with pytest.raises(ValueError):
+        render_to_print.solve_tiles(200, 100, 2.0, 100, overlap=8, bytes_per_pixel=4)
+
+
+
+def test_tile_camera():
+    # The left square of a 200 x 100 px render 2 m wide:
+    assert render_to_print.tile_camera(0, 0, 100, 100, 200, 100, 2.0) == pytest.approx((-.5, 0.0, 1.0))
+    # Its top right quarter, the render's shift kept:
+    shift_x, shift_y, ortho_scale = render_to_print.tile_camera(100, 50, 100, 50, 200, 100, 2.0, .25, .5)
+    assert ortho_scale == pytest.approx(1.0)
+    assert shift_x == pytest.approx((.25 * 2.0 + .5) / 1.0)
+    assert shift_y == pytest.approx((.5 * 2.0 + .25) / 1.0)
@@ -0,0 +1,73 @@
+# Tests of the print layout solver, see solve_print_layout() in render_to_print.py.
+
+import pytest
+import render_to_print
+
+A4 = "A4_21.0_29.7"
+
+
+
+def test_a4_portrait_without_margins():
+    layout = render_to_print.solve_print_layout(preset=A4, dpi=300, use_margins=False, scale_factor=.01)
+    assert (layout.width_cm, layout.height_cm) == (21.0, 29.7)
+    assert (layout.width_px, layout.height_px) == (2480, 3508)
+    assert layout.ortho_scale == pytest.approx(.297 / .01)
+    assert layout.camera_delta_x is None and layout.camera_delta_y is None
+
+
+
+def test_landscape_swaps_the_sides():
+    portrait = render_to_print.solve_print_layout(preset=A4, orientation="Portrait", use_margins=False)
+    landscape = render_to_print.solve_print_layout(preset=A4, orientation="Landscape", use_margins=False)
+    assert (landscape.width_px, landscape.height_px) == (portrait.height_px, portrait.width_px)
+    assert landscape.ortho_scale == pytest.approx(portrait.ortho_scale)
+
+
+
+def test_scale_and_unit_scale():
+    layout = render_to_print.solve_print_layout(preset=A4, use_margins=False, scale_factor=.02, scale_length=.001)
+    assert layout.ortho_scale == pytest.approx(.297 / .001 / .02)
+
+
+
+def test_absolute_margins():
+    layout = render_to_print.solve_print_layout(preset=A4, dpi=300,
+            margin_top=.02, margin_right=.01, margin_bottom=.03, margin_left=.04,
+            resolution_x=2480, resolution_y=3508)
+    assert layout.width_px == render_to_print.m_to_pixels(.21 - .05, 300)
+    assert layout.height_px == render_to_print.m_to_pixels(.297 - .05, 300)
+    assert layout.camera_delta_x == pytest.approx(.04 - .01)
+    assert layout.camera_delta_y == pytest.approx(.03 - .02)
+    assert layout.ortho_scale == pytest.approx(.297 - .05)
+
+
+
+def test_relative_margins_refer_to_the_render():
+    # 10 % of a 2480 x 3508 px render at 300 dpi:
+    layout = render_to_print.solve_print_layout(preset=A4, dpi=300,
+            margin_top=10, margin_right=10, margin_bottom=10, margin_left=10, resolution_x=2480, resolution_y=3508)
+    assert layout.margin_left_m == pytest.approx(render_to_print.pixels_to_m(248, 300))
+    assert layout.margin_top_m == pytest.approx(render_to_print.pixels_to_m(350.8, 300))
+
+
+
+def test_custom_size_from_pixels():
+    layout = render_to_print.solve_print_layout(preset="custom_1_1", unit_from="PIXELS_TO_CM", dpi=254,
+            width_px=1000, height_px=500, use_margins=False)
+    assert (layout.width_cm, layout.height_cm) == pytest.approx((10.0, 5.0))
+    assert (layout.width_px, layout.height_px) == (1000, 500)
+
+
+
+@pytest.mark.parametrize("preset", ["A4_21.0_29.7", "A0_84.1_118.9", "Letter_21.6_27.9"])
+@pytest.mark.parametrize("orientation", ["Portrait", "Landscape"])
+@pytest.mark.parametrize("dpi", [72, 300, 600])
+def test_matches_the_batch_solver(preset, orientation, dpi):
+    layouts = render_to_print.solve_print_layouts([preset], orientation, dpi, .01,
+            margin_top=.01, margin_right=.02, margin_bottom=.01, margin_left=.02)
+    layout = render_to_print.solve_print_layout(preset=preset, orientation=orientation, dpi=dpi, scale_factor=.01,
+            margin_top=.01, margin_right=.02, margin_bottom=.01, margin_left=.02,
+            resolution_x=int(layouts.width_px[0]) + 1000, resolution_y=int(layouts.height_px[0]) + 1000)
+    assert (layout.width_px, layout.height_px) == (layouts.width_px[0], layouts.height_px[0])
+    assert layout.ortho_scale == pytest.approx(layouts.ortho_scale[0])
+    assert layout.printable_height_m == pytest.approx(layouts.printable_height_m[0])